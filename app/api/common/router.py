@@ -2,7 +2,7 @@ import logging
 from typing import Union, Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import create_model, BaseModel, Field
 
 from app.api.common.requests import CreateCategory, TechnicalRequest
@@ -59,8 +59,9 @@ async def get_category_tree(
         service: CommonService = Depends(get_common_service),
 ) -> GetCategoryTree:
     try:
-        return GetCategoryTree(
-            result=await service.get_category_tree(t, on_moderating=False)
+        return Response(
+            content=await service.get_category_tree(t, on_moderating=False),
+            media_type="application/json"
         )
     except Exception as e:
         logger.exception(e)
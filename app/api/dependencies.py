@@ -1,7 +1,6 @@
 from fastapi import Depends
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from sqlalchemy.ext.asyncio import AsyncSession
-from redis.asyncio import Redis, ConnectionPool
 
 from app.repository.admin.repository import AdminRepository
 from app.repository.common.repository import CommonRepository
@@ -10,13 +9,16 @@ from app.repository.messages.repository import MessagesRepository
 from app.repository.mongo.client import get_mongo
 from app.repository.mongo.repository import MongoRepository
 from app.repository.offers.repository import OffersRepository
+from app.repository.redis.client import get_redis
 from app.repository.requests.repository import RequestsRepository
 from app.repository.session import get_session
 from app.repository.users.repository import UsersRepository
 from app.services.admin.service import AdminService
 from app.services.auth.service import Authenticator
-from app.services.cloud_service import CloudService
+from app.services.clicks.buffer import ClickBuffer, click_buffer
+from app.services.cloud_service import CloudService, cloud_service
 from app.services.common.service import CommonService
+from app.services.image_service import ImageService, image_service
 from app.services.items.service import ItemsService
 from app.services.messages.service import MessagesService
 from app.services.offers.service import OffersService
@@ -53,15 +55,16 @@ async def get_user_service(session: AsyncSession = Depends(get_session)):
     return user_service
 
 
-async def get_cloud_service():
-    return CloudService()
+async def get_cloud_service() -> CloudService:
+    return cloud_service
 
 
-async def get_redis():
-    pool = ConnectionPool.from_url('redis://192.168.0.141:6379/0')
-    client = Redis.from_pool(pool)
-    yield client
-    await client.close()
+async def get_image_service() -> ImageService:
+    return image_service
+
+
+async def get_click_buffer() -> ClickBuffer:
+    return click_buffer
 
 
 async def get_items_service(session: AsyncSession = Depends(get_session)):
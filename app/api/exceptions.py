@@ -130,3 +130,31 @@ class InternalServerError(BaseApiException):
             status_code=500,
             message=message
         )
+
+
+class PayloadTooLargeApiException(BaseApiException):
+    """
+    Наследник базового класса исключений сервера.
+    Используется, если загружаемый файл превышает допустимый размер.
+    """
+    def __init__(self, message: str = None):
+        super().__init__(
+            success=False,
+            error="Payload Too Large",
+            status_code=413,
+            message=message
+        )
+
+
+class UnsupportedMediaTypeApiException(BaseApiException):
+    """
+    Наследник базового класса исключений сервера.
+    Используется для неподдерживаемого формата файла.
+    """
+    def __init__(self, message: str = None):
+        super().__init__(
+            success=False,
+            error="Unsupported Media Type",
+            status_code=415,
+            message=message
+        )
@@ -76,6 +76,7 @@ class GetCards(BaseModel):
     from_days: int | None = None
     to_days: int | None = None
     q: str | None = None
+    cursor: str | None = None
 
 
 class PostItemReview(BaseModel):
@@ -7,9 +7,11 @@ from app.models.items import OffersDTO
 
 class Meta(BaseModel):
     page: int
-    total_items: int
-    total_pages: int
+    total_items: int | None = None
+    total_pages: int | None = None
     items_per_page: int
+    next_cursor: str | None = None
+    has_more: bool | None = None
 
 
 class PriceResponse(BaseModel):
@@ -27,6 +29,7 @@ class LocationResponse(BaseModel):
 class ItemPhotosResponse(BaseModel):
     id: int
     link: str
+    thumb: str | None = None
     index: int
 
 
@@ -4,22 +4,27 @@ from typing import Union, Annotated
 
 from fastapi import APIRouter, Depends, UploadFile, BackgroundTasks, Query
 from pydantic import create_model, Field, BaseModel
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
 
 from app.api.dependencies import get_items_service, get_common_service, get_cloud_service, get_offers_service, \
-    get_user_service
+    get_user_service, get_image_service, get_click_buffer
 from app.api.exceptions import ForbiddenApiException, UnprocessableApiException, InternalServerError, \
-    NotFoundApiException, BadRequestApiException, ErrorResponse
+    NotFoundApiException, BadRequestApiException, ErrorResponse, PayloadTooLargeApiException, \
+    UnsupportedMediaTypeApiException
 from app.api.v1.items.requests import CreateItem, UpdateItem, GetCards, PostItemReview
 from app.api.v1.items.responses import GetItemsResponse, Meta, GetItemResponse, GetItemResponseSeller, PriceResponse, \
     LocationResponse, ItemPhotosResponse, ProductionTimeResponse, SellerResponse
 from app.models.auth import TokenPayload
 from app.services.auth.service import Authenticator
+from app.services.clicks.buffer import ClickBuffer
 from app.services.cloud_service import CloudService
 from app.services.common.exceptions import CategoryNotFoundException, CityNotFoundException, CityNotActiveException
 from app.services.common.service import CommonService
+from app.services.exceptions import FileTooLargeException, UnsupportedFileTypeException
+from app.services.image_service import ImageService
 from app.services.items.exceptions import MinPriceOverMaxPriceException, CategoryDisabledException, \
-    CategoryOnModeratingException, ItemNotFoundException, PhotoNotFoundException, ItemException
+    CategoryOnModeratingException, ItemNotFoundException, PhotoNotFoundException, ItemException, \
+    InvalidCursorException
 from app.services.items.service import ItemsService
 from app.services.offers.service import OffersService
 from app.services.users.service import UserService
@@ -40,15 +45,20 @@ async def get_items_pages(
         body: GetCards,
         page: int = Query(1, ge=1),
         page_limit: int = Query(50, ge=1, le=100),
+        has_more: bool = Query(
+            False, description="Не считать общее количество, вернуть только признак следующей страницы"
+        ),
         user: TokenPayload = Depends(Authenticator.get_current_user),
         service: ItemsService = Depends(get_items_service),
         user_service: UserService = Depends(get_user_service)
 ):
     try:
         result = await service.get_filtered_items(
-            body, page, page_limit, user.id, user_service
+            body, page, page_limit, user.id, user_service, has_more
         )
-        return result
+        return Response(content=result, media_type="application/json")
+    except InvalidCursorException as e:
+        raise BadRequestApiException(str(e))
     except Exception as e:
         logger.exception(e)
         raise InternalServerError(str(e))
@@ -67,13 +77,10 @@ async def get_items_my_page(
 ):
     user_id = user.id
     try:
-        result, meta = await service.get_my_items(
+        result = await service.get_my_items(
             user_id, page, page_limit, q
         )
-        return GetItemsResponse(
-            items=result,
-            meta=meta,
-        )
+        return Response(content=result, media_type="application/json")
     except Exception as e:
         logger.exception(e)
         raise InternalServerError(str(e))
@@ -214,15 +221,14 @@ async def create_new_item(
 )
 async def get_item_card(
         item_id: int,
-        bg_task: BackgroundTasks,
         user: TokenPayload = Depends(Authenticator.get_current_user),
         service: ItemsService = Depends(get_items_service),
+        clicks: ClickBuffer = Depends(get_click_buffer),
 ):
     try:
         item = await service.get_item_by_id(item_id)
-        bg_task.add_task(
-            service.add_click, item_id, user.id
-        )
+        if item.seller.id != user.id:
+            clicks.add_item_click(item_id, user.id)
         return GetItemResponse(
             id=item.id,
             title=item.title,
@@ -309,10 +315,10 @@ async def add_item_photo(
         item_id: int,
         index: int,
         file: UploadFile,
-        bg_tasks: BackgroundTasks,
         user: TokenPayload = Depends(Authenticator.get_current_user),
         service: ItemsService = Depends(get_items_service),
-        cloud_service: CloudService = Depends(get_cloud_service)
+        cloud_service: CloudService = Depends(get_cloud_service),
+        image_service: ImageService = Depends(get_image_service)
 ) -> success_response:
     if not user.full_filled:
         raise UnprocessableApiException(
@@ -323,16 +329,9 @@ async def add_item_photo(
             "Добавить фото могут только продавцы"
         )
     try:
-        key = await service.add_photo(
-            user.id, item_id, index, cloud_service.get_link
+        await service.add_photo(
+            user.id, item_id, index, file, cloud_service, image_service
         )
-        if key:
-            await cloud_service.session()
-            bg_tasks.add_task(
-                cloud_service.save_file,
-                await file.read(),
-                key
-            )
         return JSONResponse(
             content={
                 "success": True
@@ -340,6 +339,10 @@ async def add_item_photo(
         )
     except ItemNotFoundException as e:
         raise NotFoundApiException(str(e))
+    except FileTooLargeException as e:
+        raise PayloadTooLargeApiException(str(e))
+    except UnsupportedFileTypeException as e:
+        raise UnsupportedMediaTypeApiException(str(e))
     except AssertionError:
         raise ForbiddenApiException(
             "Вы не можете добавить фото к товару/услуге, "
@@ -367,11 +370,12 @@ async def remove_item_photo(
             "Добавить фото могут только продавцы"
         )
     try:
-        key = await service.delete_photo(user.id, item_id, photo_id)
-        bg_tasks.add_task(
-            cloud_service.delete_file,
-            key
-        )
+        keys = await service.delete_photo(user.id, item_id, photo_id)
+        for key in keys:
+            bg_tasks.add_task(
+                cloud_service.delete_file,
+                key
+            )
     except (ItemNotFoundException, PhotoNotFoundException) as e:
         raise NotFoundApiException(str(e))
     except AssertionError:
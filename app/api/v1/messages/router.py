@@ -248,14 +248,17 @@ async def get_unread_total(
     status_code=200
 )
 async def get_threads(
+        offset: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=100),
         user: TokenPayload = Depends(Authenticator.get_current_user),
         service: MessagesService = Depends(get_messages_service),
 ):
     try:
-        result = await service.get_user_threads(user.id)
+        result, total = await service.get_user_threads(user.id, offset, limit)
         return JSONResponse(
             content={
-                "threads": result
+                "threads": result,
+                "total": total,
             }, status_code=200
         )
     except Exception as e:
@@ -22,11 +22,13 @@ class Meta(BaseModel):
     total_items: int
     total_pages: int
     items_per_page: int
+    next_cursor: str | None = None
 
 
 class ItemPhotosResponse(BaseModel):
     id: int
     link: str
+    thumb: str | None = None
     index: int
 
 
@@ -51,7 +53,7 @@ class ShortOfferResponseModel(BaseModel):
     to_user: UserShortResponse
     status: "OfferStatus"
     item: ItemShortResponse | None = None
-    request: None = None
+    request: RequestDTO | None = None
     date_create: str
 
 
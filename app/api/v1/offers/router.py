@@ -14,11 +14,11 @@ from app.services.auth.service import Authenticator
 from app.services.items.service import ItemsService
 from app.services.offers.exceptions import WrongOfferSenderException, ItemHasAnotherOwnerException, \
     WrongOfferReceiverException, SelfOfferException, DeleteOfferException, OfferNotFoundException, \
-    OfferNotBelongYouException, WrongNewStatus, OfferAlreadyClosed, UpdateStatusException
+    OfferNotBelongYouException, WrongNewStatus, OfferAlreadyClosed, UpdateStatusException, InvalidCursorException
 from app.services.offers.service import OffersService
 from app.services.users.exceptions import UserNotFoundException
 from app.services.users.service import UserService
-from app.utils.types import OffersTypes, success_response
+from app.utils.types import OffersTypes, OrdersStatus, success_response
 
 router = APIRouter(
     prefix="/offers",
@@ -98,19 +98,24 @@ async def get_all_offers(
         target: OffersTypes,
         page: int = Query(1, ge=1),
         page_limit: int = Query(50, ge=1, le=100),
+        status: OrdersStatus | None = None,
+        cursor: str | None = Query(
+            None, description="Курсор следующей страницы из meta.next_cursor, заменяет page"
+        ),
         user: TokenPayload = Depends(Authenticator.get_current_user),
         service: OffersService = Depends(get_offers_service),
 ) -> Annotated[dict, GetOffersResponse]:
     try:
         result, meta = await service.get_offers(
             user.id, target.value,
-            page, page_limit
+            page, page_limit, status, cursor
         )
         return GetOffersResponse(
             result=result,
             meta=meta
         ).model_dump(exclude_none=True)
-
+    except InvalidCursorException as e:
+        raise BadRequestApiException(str(e))
     except Exception as e:
         logger.exception(e)
         raise InternalServerError(str(e))
@@ -183,6 +188,10 @@ async def update_offer_status(
                 "success": True,
             }, status_code=200
         )
+    except OfferNotFoundException as e:
+        raise NotFoundApiException(str(e))
+    except OfferNotBelongYouException as e:
+        raise ForbiddenApiException(str(e))
     except (WrongNewStatus, OfferAlreadyClosed, UpdateStatusException) as e:
         raise BadRequestApiException(str(e))
     except Exception as e:
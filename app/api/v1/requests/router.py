@@ -2,19 +2,23 @@ import logging
 import uuid
 from typing import Annotated
 
-from fastapi import APIRouter, UploadFile, File, BackgroundTasks, Depends, Query
+from fastapi import APIRouter, UploadFile, File, Depends, Query
 from pydantic import create_model, BaseModel, Field
 from starlette.responses import JSONResponse
 
 from app.api.dependencies import get_cloud_service, get_requests_service, get_common_service, get_user_service, \
-    get_offers_service
-from app.api.exceptions import InternalServerError, BadRequestApiException, NotFoundApiException, ForbiddenApiException
+    get_offers_service, get_image_service, get_click_buffer
+from app.api.exceptions import InternalServerError, BadRequestApiException, NotFoundApiException, ForbiddenApiException, \
+    PayloadTooLargeApiException, UnsupportedMediaTypeApiException
 from app.api.v1.requests.requests import NewRequest
 from app.api.v1.requests.responses import RequestResponse, RequestsResponse
 from app.models.auth import TokenPayload
 from app.services.auth.service import Authenticator
+from app.services.clicks.buffer import ClickBuffer
 from app.services.cloud_service import CloudService
 from app.services.common.service import CommonService
+from app.services.exceptions import FileTooLargeException, UnsupportedFileTypeException
+from app.services.image_service import ImageService
 from app.services.offers.service import OffersService
 from app.services.requests.exceptions import CreateRequestException, RequestException, RequestNotFound
 from app.services.requests.service import RequestsService
@@ -33,10 +37,10 @@ logger = logging.getLogger("RequestRouter")
     summary="Загрузить фото и получить ключ"
 )
 async def photo_upload(
-        bg_tasks: BackgroundTasks,
         photo: UploadFile = File(...),
         _: TokenPayload = Depends(Authenticator.get_current_user),
-        service: CloudService = Depends(get_cloud_service)
+        service: CloudService = Depends(get_cloud_service),
+        image_service: ImageService = Depends(get_image_service)
 ) -> Annotated[
     JSONResponse, create_model(
         "SuccessPhotoUpload",
@@ -47,18 +51,18 @@ async def photo_upload(
 ]:
     try:
         key = f"{uuid.uuid4()}{_.id}.png"
-        link = service.get_link(key)
-        await service.session()
-        bg_tasks.add_task(
-            service.save_file,
-            await photo.read(), key
-        )
+        await service.save_upload(photo, key)
+        await image_service.upload_variants(photo, key, service)
         return JSONResponse(
             content={
                 "success": True,
-                "key": link,
+                "key": service.get_link(key),
             }, status_code=201
         )
+    except FileTooLargeException as e:
+        raise PayloadTooLargeApiException(str(e))
+    except UnsupportedFileTypeException as e:
+        raise UnsupportedMediaTypeApiException(str(e))
     except Exception as e:
         logger.exception(e)
         raise InternalServerError(str(e))
@@ -72,7 +76,8 @@ async def create_request(
         body: NewRequest,
         user: TokenPayload = Depends(Authenticator.get_current_user),
         service: RequestsService = Depends(get_requests_service),
-        common_service: CommonService = Depends(get_common_service)
+        common_service: CommonService = Depends(get_common_service),
+        cloud: CloudService = Depends(get_cloud_service)
 ) -> Annotated[
     JSONResponse, create_model(
         "SuccessRequestCreate",
@@ -82,7 +87,7 @@ async def create_request(
     )
 ]:
     try:
-        request_id = await service.add_request(user, body, common_service)
+        request_id = await service.add_request(user, body, common_service, cloud)
         return JSONResponse(
             content={
                 "success": True,
@@ -147,12 +152,16 @@ async def read_request(
         limit: int = Query(5, ge=1),
         user: TokenPayload = Depends(Authenticator.get_current_user),
         service: RequestsService = Depends(get_requests_service),
-        offer_service: OffersService = Depends(get_offers_service)
+        offer_service: OffersService = Depends(get_offers_service),
+        clicks: ClickBuffer = Depends(get_click_buffer),
 ) -> Annotated[dict, RequestResponse]:
     try:
         result = await service.get_request_by_id(
             request_id
         )
+        request = result.get("request")
+        if request and request["creator"]["id"] != user.id:
+            clicks.add_request_click(request_id, user.id)
         return result
     except RequestException as e:
         raise BadRequestApiException(str(e))
@@ -7,7 +7,7 @@ from redis.asyncio import Redis
 from app.api.dependencies import get_auth_service, AuthTools, get_user_service, get_redis, get_common_service, \
     get_cloud_service, get_items_service, get_messages_service
 from app.api.exceptions import BaseApiException, BadRequestApiException, ErrorResponse, InternalServerError, \
-    NotFoundApiException
+    NotFoundApiException, PayloadTooLargeApiException, UnsupportedMediaTypeApiException
 from app.api.v1.users.responses import RegistryUserResponse, ReviewsResponse, UserResponse
 from app.api.v1.users.requests import RegistryUserRequest, FullRegistryUserRequest, UpdateUserRequest, Contacts, \
     UpdateContactRequest, CompanyData, CreateSellerReviewRequest, ReportRequest
@@ -18,6 +18,7 @@ from app.services.auth.service import Authenticator
 from app.services.cloud_service import CloudService
 from app.services.common.exceptions import CityNotActiveException, CityNotFoundException
 from app.services.common.service import CommonService
+from app.services.exceptions import FileTooLargeException, UnsupportedFileTypeException
 from app.services.items.service import ItemsService
 from app.services.messages.service import MessagesService
 from app.services.users.exceptions import ReviewException, AssertionUserReviewException, UserNotFoundException, \
@@ -165,13 +166,17 @@ async def update_avatar(
 ):
     user_id = user.id
     try:
-        link = await service.update_avatar(user_id, await photo.read(), cloud)
+        link = await service.update_avatar(user_id, photo, cloud)
         bg_tasks.add_task(
             msg_service.update_user_avatar,
             user_id, link
         )
     except UNFException as e:
         raise NotFoundApiException(str(e))
+    except FileTooLargeException as e:
+        raise PayloadTooLargeApiException(str(e))
+    except UnsupportedFileTypeException as e:
+        raise UnsupportedMediaTypeApiException(str(e))
     except Exception as e:
         logger.exception(e)
         raise InternalServerError(str(e))
@@ -0,0 +1,28 @@
+"""
+Пересчет денормализованных рейтингов продавцов и агрегатов товаров
+по существующим отзывам и просмотрам.
+
+Запуск: python -m app.commands.backfill_ratings
+"""
+import asyncio
+import logging
+
+from app.repository.items.repository import ItemsRepository
+from app.repository.session import async_session, engine
+from app.repository.users.repository import UsersRepository
+
+logger = logging.getLogger("BackfillRatings")
+
+
+async def main():
+    async with async_session() as session:
+        sellers = await UsersRepository(session).recalculate_seller_ratings()
+        items = await ItemsRepository(session).recalculate_stats()
+        await session.commit()
+    await engine.dispose()
+    logger.info(f"Пересчитано пользователей: {sellers}, товаров: {items}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
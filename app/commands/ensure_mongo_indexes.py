@@ -0,0 +1,35 @@
+"""
+Создание индексов MongoDB, объявленных в app.repository.mongo.indexes.
+Повторный запуск безопасен. С флагом --check только выводит отсутствующие.
+
+Запуск: python -m app.commands.ensure_mongo_indexes [--check]
+"""
+import argparse
+import asyncio
+import logging
+
+from app.repository.mongo.client import init_mongo, close_mongo, mongo_database
+from app.repository.mongo.indexes import ensure_indexes, missing_indexes
+
+logger = logging.getLogger("EnsureMongoIndexes")
+
+
+async def main(check: bool):
+    await init_mongo()
+    db = mongo_database()
+    if not check:
+        await ensure_indexes(db)
+    missing = await missing_indexes(db)
+    close_mongo()
+    if missing:
+        logger.warning(f"Отсутствуют индексы: {', '.join(missing)}")
+    else:
+        logger.info("Все индексы на месте")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Индексы MongoDB")
+    parser.add_argument("--check", action="store_true", help="Только проверить наличие индексов")
+    args = parser.parse_args()
+    asyncio.run(main(args.check))
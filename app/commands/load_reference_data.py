@@ -0,0 +1,148 @@
+"""
+Загрузка справочников из CSV (private/*.csv, см. private/cities.py):
+федеральные округа, регионы, города и категории.
+
+Файлы читаются потоково и пишутся пачками INSERT ... ON DUPLICATE KEY UPDATE,
+поэтому повторный запуск обновляет названия и связи, не создавая дублей.
+Флаги, которые меняет администратор (активность региона, модерация и
+отключение категории), у существующих записей не перезаписываются.
+После загрузки перестраивается categories_closure и сбрасываются
+индексы категорий и городов в запущенных процессах.
+
+Запуск: python -m app.commands.load_reference_data [--dir private] [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import csv
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Iterator
+
+from app.repository.common.repository import CommonRepository
+from app.repository.models import FederalDistricts, Regions, Cities, Categories
+from app.repository.redis.client import init_redis, close_redis
+from app.repository.session import async_session, engine
+from app.services.common.category_index import category_indexes
+from app.services.common.city_index import city_index
+from app.utils.types import ItemType
+
+logger = logging.getLogger("LoadReferenceData")
+
+
+def _bool(value: str) -> bool:
+    return value.strip().lower() in ("true", "1", "yes")
+
+
+def _int_or_none(value: str) -> int | None:
+    return int(value) if value.strip() else None
+
+
+# (файл, модель, преобразование строки CSV, колонки для обновления)
+TABLES: list[tuple[str, type, Callable[[dict], dict], list[str]]] = [
+    (
+        "districts.csv", FederalDistricts,
+        lambda row: {"id": int(row["id"]), "name": row["fed_dist"]},
+        ["name"],
+    ),
+    (
+        "regions.csv", Regions,
+        lambda row: {
+            "id": int(row["id"]),
+            "name": row["region"],
+            "federal_district_id": int(row["fed_id"]),
+            "is_active": _bool(row["i_active"]),
+        },
+        ["name", "federal_district_id"],
+    ),
+    (
+        "cities.csv", Cities,
+        lambda row: {
+            "id": int(row["id"]),
+            "name": row["city"],
+            "region_id": int(row["region_id"]),
+            "federal_district_id": int(row["fed_id"]),
+        },
+        ["name", "region_id", "federal_district_id"],
+    ),
+    (
+        "categories.csv", Categories,
+        lambda row: {
+            "id": int(row["id"]),
+            "type": ItemType(row["type"]),
+            "value": row["value"],
+            "on_moderating": _bool(row["on_moderating"]),
+            "depend_on": _int_or_none(row["depend_on"]),
+        },
+        ["type", "value", "depend_on"],
+    ),
+]
+
+
+def read_batches(path: Path, convert: Callable[[dict], dict], size: int) -> Iterator[list[dict]]:
+    with path.open(newline="", encoding="utf-8") as file:
+        batch = []
+        for row in csv.DictReader(file):
+            batch.append(convert(row))
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+async def load_table(
+        path: Path, model: type, convert: Callable[[dict], dict],
+        update_columns: list[str], batch_size: int
+) -> int:
+    started = time.perf_counter()
+    rows = 0
+    async with async_session() as session:
+        repository = CommonRepository(session)
+        for batch in read_batches(path, convert, batch_size):
+            await repository.upsert_reference(model, batch, update_columns)
+            rows += len(batch)
+        await session.commit()
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"{model.__tablename__}: {rows} строк за {elapsed:.2f} с "
+        f"({rows / elapsed if elapsed else 0:.0f} строк/с)"
+    )
+    return rows
+
+
+async def main(directory: Path, batch_size: int):
+    started = time.perf_counter()
+    total = 0
+    for file_name, model, convert, update_columns in TABLES:
+        path = directory / file_name
+        if not path.exists():
+            logger.warning(f"Файл {path} не найден, пропуск")
+            continue
+        total += await load_table(path, model, convert, update_columns, batch_size)
+
+    async with async_session() as session:
+        closure = await CommonRepository(session).rebuild_category_closure()
+        await session.commit()
+    await engine.dispose()
+
+    await init_redis()
+    await category_indexes.invalidate()
+    await city_index.invalidate()
+    await close_redis()
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Загружено строк: {total} за {elapsed:.2f} с "
+        f"({total / elapsed if elapsed else 0:.0f} строк/с), "
+        f"строк в categories_closure: {closure}"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Загрузка справочников из CSV")
+    parser.add_argument("--dir", type=Path, default=Path("private"), help="Каталог с CSV")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Строк в одном запросе")
+    args = parser.parse_args()
+    asyncio.run(main(args.dir, args.batch_size))
@@ -0,0 +1,26 @@
+"""
+Перестроение таблицы замыкания categories_closure по categories.depend_on.
+Нужно после ручного изменения родителей категорий или массовой загрузки.
+
+Запуск: python -m app.commands.rebuild_category_closure
+"""
+import asyncio
+import logging
+
+from app.repository.common.repository import CommonRepository
+from app.repository.session import async_session, engine
+
+logger = logging.getLogger("RebuildCategoryClosure")
+
+
+async def main():
+    async with async_session() as session:
+        rows = await CommonRepository(session).rebuild_category_closure()
+        await session.commit()
+    await engine.dispose()
+    logger.info(f"Строк в categories_closure: {rows}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
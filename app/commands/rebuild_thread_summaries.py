@@ -0,0 +1,34 @@
+"""
+Пересборка сводок диалогов thread_summaries по коллекции messages.
+Нужна один раз после появления сводок и после ручных правок сообщений.
+Заодно создаются индексы MongoDB.
+
+Запуск: python -m app.commands.rebuild_thread_summaries
+"""
+import asyncio
+import logging
+
+from app.repository.mongo.client import init_mongo, close_mongo, mongo_database
+from app.repository.mongo.indexes import ensure_indexes
+from app.repository.mongo.repository import MongoRepository
+
+logger = logging.getLogger("RebuildThreadSummaries")
+
+
+async def main():
+    await init_mongo()
+    db = mongo_database()
+    repository = MongoRepository(db)
+    await ensure_indexes(db)
+    threads = await db.messages.distinct("thread_id")
+    for thread_id in threads:
+        await repository.refresh_thread_summary(thread_id)
+    # Сводки диалогов, в которых не осталось сообщений
+    removed = await db.thread_summaries.delete_many({"_id": {"$nin": threads}})
+    close_mongo()
+    logger.info(f"Пересобрано сводок: {len(threads)}, удалено: {removed.deleted_count}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
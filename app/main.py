@@ -1,7 +1,9 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, APIRouter, Request
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, JSONResponse, PlainTextResponse
 
 from app.api.auth.router import router as auth_router
 from app.api.exceptions import BaseApiException
@@ -13,7 +15,19 @@ from app.api.v1.messages.router import router as messages_router
 from app.api.common.router import router as common_router
 from app.api.admin.router import router as admin_router
 from app.repository.models import create_tables
+from app.repository.common.repository import CommonRepository
+from app.repository.mongo.client import init_mongo, close_mongo, ping_mongo, mongo_database
+from app.repository.mongo.indexes import prepare_indexes
+from app.repository.query_stats import count_queries
+from app.repository.redis.client import init_redis, close_redis
+from app.repository.session import async_session
+from app.services.clicks.buffer import click_buffer
+from app.services.cloud_service import cloud_service
+from app.services.common.city_index import city_index
+from app.services.image_service import image_service
 from app.settings import settings
+from app.utils.dates import DATE_LOCALE
+from app.utils.metrics import render_metrics
 
 
 @asynccontextmanager
@@ -21,7 +35,28 @@ async def lifespan(_: FastAPI):
     settings.setup_architecture()
     settings.setup_logging()
     # await create_tables()
+    await init_redis()
+    await init_mongo()
+    indexes_task = asyncio.create_task(
+        prepare_indexes(mongo_database(), settings.MONGO_ENSURE_INDEXES)
+    )
+    try:
+        async with async_session() as session:
+            await city_index.load(CommonRepository(session).get_active_cities)
+    except Exception as e:
+        # Индекс будет загружен при первом запросе /common/cities
+        logging.getLogger("Lifespan").error(f"Индекс городов не загружен: {e}")
+    await cloud_service.start()
+    image_service.start()
+    click_buffer.start()
     yield
+    indexes_task.cancel()
+    await asyncio.gather(indexes_task, return_exceptions=True)
+    await click_buffer.close()
+    image_service.close()
+    await cloud_service.close()
+    close_mongo()
+    await close_redis()
 
 
 app = FastAPI(
@@ -45,6 +80,36 @@ app.include_router(admin_router, tags=["Админка"])
 app.include_router(root_router)
 
 
+if settings.DATES_ISO:
+    @app.middleware("http")
+    async def date_locale_middleware(request: Request, call_next):
+        """Язык, в котором клиент должен отображать даты в ISO-формате"""
+        response = await call_next(request)
+        response.headers.setdefault("Content-Language", DATE_LOCALE)
+        return response
+
+
+if settings.SQL_STATS:
+    sql_stats_logger = logging.getLogger("SqlStats")
+
+    @app.middleware("http")
+    async def sql_stats_middleware(request: Request, call_next):
+        """
+        Подсчет SQL-запросов и полученных строк на каждый HTTP-запрос.
+        Значения возвращаются в заголовках X-Sql-Queries и X-Sql-Rows,
+        что позволяет ловить N+1 и избыточную выборку на конкретных эндпоинтах.
+        """
+        with count_queries() as stats:
+            response = await call_next(request)
+        response.headers["X-Sql-Queries"] = str(stats.statements)
+        response.headers["X-Sql-Rows"] = str(stats.rows)
+        sql_stats_logger.info(
+            "%s %s: queries=%s rows=%s",
+            request.method, request.url.path, stats.statements, stats.rows
+        )
+        return response
+
+
 @app.exception_handler(BaseApiException)
 async def api_exception_handler(
         request: Request, exc: BaseApiException
@@ -75,4 +140,16 @@ async def root():
 
 @app.get("/health", tags=["Проверка состояния"])
 async def health():
-    return JSONResponse({"status": "ok"}, status_code=200)
+    mongo_ok = await ping_mongo()
+    return JSONResponse(
+        {
+            "status": "ok" if mongo_ok else "degraded",
+            "mongo": "ok" if mongo_ok else "unavailable",
+        },
+        status_code=200 if mongo_ok else 503
+    )
+
+
+@app.get("/metrics", tags=["Проверка состояния"])
+async def metrics():
+    return PlainTextResponse(render_metrics())
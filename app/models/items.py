@@ -1,3 +1,5 @@
+import datetime
+
 from pydantic import BaseModel
 
 from app.models.common import CategoryDTO, CategoryShortDTO
@@ -30,6 +32,7 @@ class ItemProductionDTO(BaseModel):
 class PhotosDTO(BaseModel):
     id: int
     link: str
+    thumb: str | None = None
     index: int
 
 
@@ -46,6 +49,7 @@ class ItemShortDTO(BaseModel):
     city: str | None = None
     address: str | None = None
     date_created: str | None = None
+    created_at: datetime.datetime | None = None
     rating: float
     reviews_quantity: int
 
@@ -1,3 +1,5 @@
+import datetime
+
 from pydantic import BaseModel
 
 from app.models.items import ItemShortDTO
@@ -29,3 +31,4 @@ class OfferDTO(BaseModel):
     production: int | None = None
     comment: str | None = None
     created_at: str
+    created: datetime.datetime | None = None
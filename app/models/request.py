@@ -11,6 +11,7 @@ class RequestCategory(BaseModel):
 class RequestPhotos(BaseModel):
     id: int
     link: str
+    thumb: str | None = None
     index: int
 
 
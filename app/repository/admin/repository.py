@@ -1,7 +1,6 @@
 from sqlalchemy import select, update, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
-
+from app.repository.loaders import item_full
 from app.repository.models import Categories, TechnicalSupports, Regions, FAQs, Users, Items
 from app.repository.repository import BaseRepository
 
@@ -145,21 +144,7 @@ class AdminRepository(BaseRepository):
         ).filter(
             Items.status.in_(["pending", "moderate"])
         ).offset(offset).limit(limit).options(
-            joinedload(Items.price)
-        ).options(
-            joinedload(Items.photos)
-        ).options(
-            joinedload(Items.location)
-        ).options(
-            joinedload(Items.category)
-        ).options(
-            joinedload(Items.reviews)
-        ).options(
-            joinedload(Items.production)
-        ).options(
-            joinedload(Items.clicks_quantity)
-        ).options(
-            joinedload(Items.user)
+            *item_full()
         )
         result = await self.session.execute(statement)
         result = result.scalars().unique().all()
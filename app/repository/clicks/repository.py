@@ -0,0 +1,65 @@
+from sqlalchemy import insert, update, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repository.models import ItemsClicks, RequestsClicks, Items, Requests
+from app.repository.repository import BaseRepository
+
+
+class ClicksRepository(BaseRepository):
+    def __init__(self, session: AsyncSession):
+        super().__init__(session)
+
+    async def add_item_clicks(self, clicks: list[tuple[int, int]]) -> None:
+        """
+        Пакетная запись просмотров товаров (item_id, user_id).
+        Повторы отсекаются click_uniq_index, после чего clicks_count
+        пересчитывается только для затронутых товаров.
+        """
+        statement = insert(
+            ItemsClicks
+        ).prefix_with(
+            "IGNORE"
+        ).values([
+            {"item_id": item_id, "user_id": user_id}
+            for item_id, user_id in clicks
+        ])
+        await self.session.execute(statement)
+        statement = update(
+            Items
+        ).where(
+            Items.id.in_({item_id for item_id, _ in clicks})
+        ).values(
+            clicks_count=select(
+                func.count(ItemsClicks.id)
+            ).where(
+                ItemsClicks.item_id == Items.id
+            ).scalar_subquery()
+        )
+        await self.session.execute(statement)
+
+    async def add_request_clicks(self, clicks: list[tuple[int, int]]) -> None:
+        """
+        Пакетная запись просмотров запросов (request_id, user_id),
+        clicks_count пересчитывается так же, как у товаров.
+        """
+        statement = insert(
+            RequestsClicks
+        ).prefix_with(
+            "IGNORE"
+        ).values([
+            {"request_id": request_id, "user_id": user_id}
+            for request_id, user_id in clicks
+        ])
+        await self.session.execute(statement)
+        statement = update(
+            Requests
+        ).where(
+            Requests.id.in_({request_id for request_id, _ in clicks})
+        ).values(
+            clicks_count=select(
+                func.count(RequestsClicks.id)
+            ).where(
+                RequestsClicks.request_id == Requests.id
+            ).scalar_subquery()
+        )
+        await self.session.execute(statement)
@@ -1,12 +1,14 @@
 from abc import ABC
 
-from sqlalchemy import select, update, delete, or_
+from sqlalchemy import select, update, delete, insert, literal, union_all
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from app.api.common.requests import CreateCategory, TechnicalRequest
 from app.models.common import CitiesDTO, CityExtendedDTO, CategoryDTO, FAQsDTO
-from app.repository.models import Cities, Regions, Categories, FAQs, Users, UsersCredentials, TechnicalSupports
+from app.repository.models import Cities, Regions, Categories, FAQs, Users, UsersCredentials, TechnicalSupports, \
+    CategoriesClosure
 from app.repository.repository import BaseRepository
 from app.utils.types import ItemType
 
@@ -15,31 +17,17 @@ class CommonRepository(BaseRepository):
     def __init__(self, session: AsyncSession):
         super().__init__(session)
 
-    async def get_all_cities(
-            self, q: str | None = None,
-            offset: int | None = None,
-            limit: int | None = None
-    ) -> list[CitiesDTO]:
+    async def get_active_cities(self) -> list[CitiesDTO]:
+        """Все города активных регионов для индекса автодополнения"""
         statement = select(
-            Cities
-        ).join(Regions).filter_by(
-            is_active=True
+            Cities.id, Cities.name
+        ).join(Regions).filter(
+            Regions.is_active.is_(True)
         )
-        if offset is not None:
-            statement = statement.offset(offset)
-        if limit is not None:
-            statement = statement.limit(limit)
-        if q is not None:
-            statement = statement.where(
-                Cities.name.ilike(f"{q}%")
-            )
-
         result = await self.session.execute(statement)
-        result = result.scalars().all()
-
         return [
-            CitiesDTO.model_validate(city, from_attributes=True)
-            for city in result
+            CitiesDTO(id=row.id, name=row.name)
+            for row in result.all()
         ]
 
     async def check_city_active(self, city_id: int) -> CityExtendedDTO | None:
@@ -84,9 +72,87 @@ class CommonRepository(BaseRepository):
         self.session.add(new_category)
         await self.session.flush()
         new_category_id = new_category.id
+        await self.add_category_closure(new_category_id, body.depend_on)
         await self.session.commit()
         return new_category_id
 
+    async def add_category_closure(self, category_id: int, parent_id: int | None):
+        """Строки замыкания новой категории: пути от всех предков родителя и к себе"""
+        paths = select(
+            literal(category_id), literal(category_id), literal(0)
+        )
+        if parent_id is not None:
+            paths = union_all(
+                paths,
+                select(
+                    CategoriesClosure.ancestor_id,
+                    literal(category_id),
+                    CategoriesClosure.depth + 1
+                ).filter_by(
+                    descendant_id=parent_id
+                )
+            )
+        statement = insert(
+            CategoriesClosure
+        ).from_select(
+            ["ancestor_id", "descendant_id", "depth"], paths
+        )
+        await self.session.execute(statement)
+
+    async def upsert_reference(
+            self, model: type, rows: list[dict], update_columns: list[str]
+    ) -> None:
+        """
+        Пакетная загрузка справочника (executemany одним запросом
+        INSERT ... ON DUPLICATE KEY UPDATE). Для существующих id обновляются
+        только перечисленные колонки.
+        """
+        statement = mysql_insert(model)
+        statement = statement.on_duplicate_key_update({
+            column: statement.inserted[column]
+            for column in update_columns
+        })
+        await self.session.execute(statement, rows)
+
+    async def rebuild_category_closure(self) -> int:
+        """
+        Полное перестроение таблицы замыкания по categories.depend_on.
+        Уровни добавляются по одному, пока появляются новые пути.
+        Возвращает количество строк.
+        """
+        await self.session.execute(delete(CategoriesClosure))
+        result = await self.session.execute(
+            insert(CategoriesClosure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(Categories.id, Categories.id, literal(0))
+            )
+        )
+        total = result.rowcount
+        level = 0
+        while True:
+            statement = insert(
+                CategoriesClosure
+            ).prefix_with(
+                "IGNORE"
+            ).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    CategoriesClosure.ancestor_id,
+                    Categories.id,
+                    CategoriesClosure.depth + 1
+                ).join(
+                    Categories, Categories.depend_on == CategoriesClosure.descendant_id
+                ).filter(
+                    CategoriesClosure.depth == level
+                )
+            )
+            result = await self.session.execute(statement)
+            if not result.rowcount:
+                break
+            total += result.rowcount
+            level += 1
+        return total
+
     async def get_category_status_by_id(self, category_id: int):
         statement = select(
             Categories.on_moderating
@@ -141,22 +207,3 @@ class CommonRepository(BaseRepository):
         )
         self.session.add(request)
         await self.session.commit()
-
-    async def get_category_depends(self, category_ids: list[int]):
-        statement = select(
-            Categories
-        ).where(
-            or_(
-                Categories.id.in_(category_ids),
-                Categories.depend_on.in_(category_ids)
-            )
-        )
-        result = await self.session.execute(statement)
-        result = result.scalars().all()
-        if not result:
-            return None
-        return [
-            rs.id
-            for rs in result
-        ]
-
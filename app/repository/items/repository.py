@@ -1,5 +1,8 @@
-from babel.dates import format_date
-from sqlalchemy import select, delete, func, or_, and_, union_all, literal, update
+import datetime
+from collections import defaultdict
+
+from sqlalchemy import select, delete, func, or_, and_, union_all, literal, update, Select
+from sqlalchemy.dialects.mysql import match
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, with_loader_criteria, selectinload, contains_eager
 
@@ -10,9 +13,12 @@ from app.models.items import ItemCreateDTO, ItemPriceDTO, ItemProductionDTO, Ite
     Seller, OffersDTO, OfferSenderDTO
 from app.models.common import ReviewsByStarsDTO
 from app.models.users import ReviewDTO, UserShortDTO
+from app.repository.loaders import item_full, user_short
 from app.repository.models import Items, ItemsPrice, ProductionTime, ItemsCategory, ItemsPhoto, ItemsLocations, Users, \
-    Offers, ItemsClicks, ItemsReviews
+    Offers, ItemsClicks, ItemsReviews, CategoriesClosure, Cities
 from app.repository.repository import BaseRepository
+from app.utils.search import build_fulltext_query
+from app.utils.dates import format_date
 
 
 class ItemsRepository(BaseRepository):
@@ -57,6 +63,37 @@ class ItemsRepository(BaseRepository):
         result = await self.session.execute(statement)
         return result.scalar_one_or_none()
 
+    async def get_item_tags(self, item_id: int) -> tuple[int | None, list[int]] | None:
+        """Город товара и его категория вместе с предками для сброса кэша каталога"""
+        statement = select(
+            ItemsLocations.city_id, CategoriesClosure.ancestor_id
+        ).select_from(
+            Items
+        ).outerjoin(
+            ItemsLocations, ItemsLocations.item_id == Items.id
+        ).outerjoin(
+            ItemsCategory, ItemsCategory.item_id == Items.id
+        ).outerjoin(
+            CategoriesClosure, CategoriesClosure.descendant_id == ItemsCategory.category_id
+        ).filter(
+            Items.id == item_id
+        )
+        result = await self.session.execute(statement)
+        result = result.all()
+        if not result:
+            return None
+        return result[0][0], [row[1] for row in result if row[1] is not None]
+
+    async def get_category_ancestors(self, category_id: int) -> list[int]:
+        """Категория и все ее предки"""
+        statement = select(
+            CategoriesClosure.ancestor_id
+        ).filter_by(
+            descendant_id=category_id
+        )
+        result = await self.session.execute(statement)
+        return list(result.scalars().all())
+
     async def delete_item(self, item_id: int):
         statement = delete(
             Items
@@ -91,10 +128,13 @@ class ItemsRepository(BaseRepository):
             return False
         return result
 
-    async def add_photo(self, link: str, index: int, item_id: int):
+    async def add_photo(self, link: str, index: int, item_id: int, variants: dict[str, str]):
         photo = ItemsPhoto(
             item_id=item_id,
             link=link,
+            thumb_link=variants.get("thumb"),
+            card_link=variants.get("card"),
+            full_link=variants.get("full"),
             index=index,
         )
         self.session.add(photo)
@@ -137,79 +177,114 @@ class ItemsRepository(BaseRepository):
     async def get_user_items(
             self, user_id: int, offset: int,
             limit: int, query: str = None
-    ):
-        statement = select(
-            Items
-        ).order_by(
+    ) -> list[ItemShortDTO]:
+        statement = self.card_statement().order_by(
             Items.created_at.desc()
-        ).options(
-            joinedload(Items.price)
-        ).options(
-            joinedload(Items.photos)
-        ).options(
-            joinedload(Items.location)
-        ).filter_by(
-            creator_id=user_id
+        ).filter(
+            Items.creator_id == user_id
         )
         if query:
             statement = statement.where(
                 Items.title.ilike(f"{query}%")
             )
-
-        result = await self.session.execute(
+        return await self.get_cards(
             statement.offset(offset).limit(limit)
         )
-        result = result.scalars().unique().all()
-        if not result:
-            return None
+
+    @staticmethod
+    def card_statement() -> Select:
+        """
+        Колонки карточки товара для списков без загрузки ORM-объектов.
+        Цена и адрес присоединяются внешним соединением,
+        фото догружаются одним запросом в get_cards.
+        """
+        return select(
+            Items.id,
+            Items.title,
+            Items.format,
+            Items.status,
+            Items.created_at,
+            Items.rating_sum,
+            Items.rating_count,
+            ItemsPrice.fix_price,
+            ItemsPrice.from_price,
+            ItemsPrice.to_price,
+            ItemsPrice.currency,
+            Cities.name.label("city"),
+            ItemsLocations.address,
+        ).select_from(
+            Items
+        ).outerjoin(
+            ItemsPrice, ItemsPrice.item_id == Items.id
+        ).outerjoin(
+            ItemsLocations, ItemsLocations.item_id == Items.id
+        ).outerjoin(
+            Cities, Cities.id == ItemsLocations.city_id
+        )
+
+    async def get_card_photos(self, item_ids: list[int]) -> dict[int, list[PhotosDTO]]:
+        """Фото карточек (вариант card) для страницы товаров одним запросом"""
+        statement = select(
+            ItemsPhoto.item_id,
+            ItemsPhoto.id,
+            ItemsPhoto.link,
+            ItemsPhoto.card_link,
+            ItemsPhoto.thumb_link,
+            ItemsPhoto.index,
+        ).where(
+            ItemsPhoto.item_id.in_(item_ids)
+        ).order_by(
+            ItemsPhoto.item_id, ItemsPhoto.index
+        )
+        result = await self.session.execute(statement)
+        photos = defaultdict(list)
+        for row in result:
+            photos[row.item_id].append(
+                PhotosDTO.model_construct(
+                    id=row.id,
+                    link=row.card_link or row.link,
+                    thumb=row.thumb_link,
+                    index=row.index
+                )
+            )
+        return photos
+
+    async def get_cards(self, statement: Select) -> list[ItemShortDTO]:
+        """
+        Выполнение запроса card_statement. Значения приходят из БД с уже
+        известными типами, поэтому DTO собираются без валидации.
+        """
+        result = await self.session.execute(statement)
+        rows = result.all()
+        if not rows:
+            return []
+        photos = await self.get_card_photos([row.id for row in rows])
         return [
-            ItemShortDTO(
-                id=item.id,
-                title=item.title,
-                type=item.format,
-                price=item.price.fix_price,
-                from_price=item.price.from_price,
-                to_price=item.price.to_price,
-                currency=item.price.currency,
-                photos=[
-                    PhotosDTO(
-                        id=photo.id,
-                        link=photo.link,
-                        index=photo.index
-                    )
-                    for photo in item.photos
-                ] if item.photos else [],
-                status=item.status.value,
-                city=item.location.city.name,
-                address=item.location.address,
-                date_created=format_date(
-                    item.created_at, format="d MMMM y", locale="ru"
-                ),
-                rating=item.rating,
-                reviews_quantity=item.reviews_quantity
+            ItemShortDTO.model_construct(
+                id=row.id,
+                title=row.title,
+                type=row.format.value,
+                fix_price=row.fix_price,
+                from_price=row.from_price,
+                to_price=row.to_price,
+                currency=row.currency or "RUB",
+                photos=photos.get(row.id, []),
+                status=row.status.value,
+                city=row.city,
+                address=row.address,
+                date_created=format_date(row.created_at),
+                created_at=row.created_at,
+                rating=row.rating_sum / row.rating_count if row.rating_count else 0.0,
+                reviews_quantity=row.rating_count
             )
-            for item in result
+            for row in rows
         ]
 
     async def get_item(self, item_id: int) -> ItemFullDTO | None:
         statement = select(Items).filter_by(
             id=item_id
         ).options(
-            joinedload(Items.price)
-        ).options(
-            joinedload(Items.photos)
-        ).options(
-            joinedload(Items.location)
-        ).options(
-            joinedload(Items.category)
-        ).options(
-            joinedload(Items.reviews)
-        ).options(
-            joinedload(Items.production)
-        ).options(
-            joinedload(Items.clicks_quantity)
-        ).options(
-            joinedload(Items.user)
+            *item_full()
         )
 
         result = await self.session.execute(statement)
@@ -227,17 +302,13 @@ class ItemsRepository(BaseRepository):
             to_price=item.price.to_price,
             currency=item.price.currency,
             photos=[
-                PhotosDTO(
-                    id=photo.id,
-                    link=photo.link,
-                    index=photo.index
-                )
+                photo.to_dto()
                 for photo in item.photos
             ] if item.photos else [],
             status=item.status.value,
             city=item.location.city.name,
             address=item.location.address,
-            date_created=format_date(item.created_at, format="d MMMM y", locale="ru"),
+            date_created=format_date(item.created_at),
             rating=item.rating,
             reviews_quantity=item.reviews_quantity,
             from_time=item.production.from_time if item.production else None,
@@ -254,7 +325,7 @@ class ItemsRepository(BaseRepository):
                 rating=item.user.rating,
                 avatar=item.user.avatar.link if item.user.avatar is not None else None,
             ),
-            clicks=len(item.clicks_quantity)
+            clicks=item.clicks_count
         )
 
     async def get_seller_offers_for_item(self, user_id: int, item_id: int) -> list[OffersDTO | None]:
@@ -268,7 +339,7 @@ class ItemsRepository(BaseRepository):
         ).order_by(
             Offers.created_at.desc()
         ).options(
-            joinedload(Offers.from_user)
+            joinedload(Offers.from_user).options(*user_short())
         )
 
         result = await self.session.execute(statement)
@@ -292,14 +363,6 @@ class ItemsRepository(BaseRepository):
             for offer in result
         ]
 
-    async def add_click(self, item_id: int, user_id: int):
-        click = ItemsClicks(
-            item_id=item_id,
-            user_id=user_id
-        )
-        self.session.add(click)
-        await self.session.commit()
-
     async def get_reviews_quantity_for_user(
             self, _format: str, user_id: int | None = None, item_id: int | None = None
     ) -> int:
@@ -384,7 +447,7 @@ class ItemsRepository(BaseRepository):
         ).filter_by(
             **criteria
         ).options(
-            joinedload(ItemsReviews.from_user)
+            joinedload(ItemsReviews.from_user).options(*user_short())
         )
         if _format is not None:
             statement = statement.join(
@@ -407,117 +470,137 @@ class ItemsRepository(BaseRepository):
                 ),
                 stars=review.stars,
                 text=review.text,
-                created_at=format_date(
-                    review.created_at, format="d MMMM y", locale="ru"
-                )
+                created_at=format_date(review.created_at)
             )
             for review in result
         ]
 
     @staticmethod
-    def statement_filter_constructor(
-            body: GetCards
-    ):
+    def catalog_statement(statement: Select, body: GetCards, joined: tuple = ()) -> Select:
+        """
+        Построение запроса каталога по фильтру.
+        Каждая связанная таблица присоединяется не более одного раза
+        и только если по ней есть условие, вместо коррелированных EXISTS.
+        joined - таблицы, уже присоединенные в statement.
+        """
         filters = [
             Items.format == body.type.value,
             Items.status == "approved"
         ]
         if body.category_id is not None:
-            filters.append(
-                Items.category.has(ItemsCategory.category_id == body.category_id)
+            # Категория фильтра совпадает с категорией товара или с любым ее предком
+            statement = statement.join(
+                ItemsCategory, ItemsCategory.item_id == Items.id
+            ).join(
+                CategoriesClosure, CategoriesClosure.descendant_id == ItemsCategory.category_id
             )
-        if body.from_days is not None:
             filters.append(
-                Items.production.has(ProductionTime.from_time == body.from_days)
+                CategoriesClosure.ancestor_id == body.category_id
             )
-        if body.to_days is not None:
-            filters.append(
-                Items.production.has(ProductionTime.to_time == body.to_days)
+        if body.from_days is not None or body.to_days is not None:
+            statement = statement.join(
+                ProductionTime, ProductionTime.item_id == Items.id
             )
-        if body.from_price is not None:
-            filters.append(
-                or_(
-                    Items.price.has(ItemsPrice.from_price >= body.from_price),
-                    Items.price.has(ItemsPrice.fix_price >= body.from_price),
+            if body.from_days is not None:
+                filters.append(
+                    ProductionTime.from_time == body.from_days
                 )
-            )
-        if body.to_price is not None:
-            filters.append(
-                or_(
-                    Items.price.has(ItemsPrice.to_price <= body.to_price),
-                    Items.price.has(ItemsPrice.fix_price <= body.to_price),
+            if body.to_days is not None:
+                filters.append(
+                    ProductionTime.to_time == body.to_days
+                )
+        if body.from_price is not None or body.to_price is not None:
+            if ItemsPrice not in joined:
+                statement = statement.join(
+                    ItemsPrice, ItemsPrice.item_id == Items.id
+                )
+            if body.from_price is not None:
+                filters.append(
+                    or_(
+                        ItemsPrice.from_price >= body.from_price,
+                        ItemsPrice.fix_price >= body.from_price,
+                    )
+                )
+            if body.to_price is not None:
+                filters.append(
+                    or_(
+                        ItemsPrice.to_price <= body.to_price,
+                        ItemsPrice.fix_price <= body.to_price,
+                    )
                 )
-            )
         if body.city_id is not None:
-            filters.append(
-                Items.location.has(
-                    ItemsLocations.city_id == body.city_id
+            if ItemsLocations not in joined:
+                statement = statement.join(
+                    ItemsLocations, ItemsLocations.item_id == Items.id
                 )
-            )
-        if body.q is not None:
             filters.append(
-                Items.title.ilike(f"%{body.q}%")
+                ItemsLocations.city_id == body.city_id
             )
+        if body.q is not None:
+            relevance = ItemsRepository.search_relevance(body.q)
+            if relevance is not None:
+                filters.append(relevance > 0)
+            else:
+                filters.append(
+                    Items.title.ilike(f"%{body.q}%")
+                )
 
-        return filters
-
-    async def get_total_items_by_criteria(self, body: GetCards, offset: int, page_limit: int):
-        statement = select(
-            func.count(Items.id)
+        return statement.filter(
+            and_(*filters)
         )
-        filters = self.statement_filter_constructor(body)
 
-        statement = statement.filter(
-            and_(*filters)
+    @staticmethod
+    def search_relevance(q: str):
+        """
+        Релевантность товара поисковой строке по FULLTEXT-индексу
+        (title, description). None, если строка не пригодна для поиска.
+        """
+        query = build_fulltext_query(q)
+        if query is None:
+            return None
+        return match(
+            Items.title, Items.description, against=query
+        ).in_boolean_mode()
+
+    async def get_total_items_by_criteria(self, body: GetCards, offset: int, page_limit: int):
+        statement = self.catalog_statement(
+            select(func.count(Items.id)).select_from(Items), body
         )
 
         result = await self.session.execute(statement)
         result = result.scalar_one_or_none()
         return result
 
-    async def get_items_by_criteria(self, body: GetCards, offset: int, page_limit: int):
-        statement = select(
-            Items
-        ).order_by(
-            Items.created_at.desc()
+    async def get_items_by_criteria(
+            self, body: GetCards, offset: int, page_limit: int,
+            after: tuple[datetime.datetime, int] | None = None
+    ) -> list[ItemShortDTO]:
+        statement = self.catalog_statement(
+            self.card_statement(), body, joined=(ItemsPrice, ItemsLocations)
+        )
+        relevance = None
+        if body.q is not None and after is None:
+            relevance = self.search_relevance(body.q)
+        if relevance is not None:
+            statement = statement.order_by(relevance.desc())
+        statement = statement.order_by(
+            Items.created_at.desc(), Items.id.desc()
         )
-        filters = self.statement_filter_constructor(body)
-        statement = statement.filter(
-            and_(*filters)
-        ).offset(offset).limit(page_limit)
-
-        result = await self.session.execute(statement)
-        result = result.scalars().unique().all()
-        if not result:
-            return []
-        return [
-            ItemShortDTO(
-                id=item.id,
-                title=item.title,
-                type=item.format,
-                price=item.price.fix_price,
-                from_price=item.price.from_price,
-                to_price=item.price.to_price,
-                currency=item.price.currency,
-                photos=[
-                    PhotosDTO(
-                        id=photo.id,
-                        link=photo.link,
-                        index=photo.index
+        if after is not None:
+            created_at, item_id = after
+            statement = statement.filter(
+                or_(
+                    Items.created_at < created_at,
+                    and_(
+                        Items.created_at == created_at,
+                        Items.id < item_id
                     )
-                    for photo in item.photos
-                ] if item.photos else [],
-                status=item.status.value,
-                city=item.location.city.name,
-                address=item.location.address,
-                date_created=format_date(
-                    item.created_at, format="d MMMM y", locale="ru"
-                ),
-                rating=item.rating,
-                reviews_quantity=item.reviews_quantity
-            )
-            for item in result
-        ]
+                )
+            ).limit(page_limit)
+        else:
+            statement = statement.offset(offset).limit(page_limit)
+
+        return await self.get_cards(statement)
 
     async def update_item_info(self, item_id: int, new_data: dict):
         statement = update(
@@ -582,25 +665,78 @@ class ItemsRepository(BaseRepository):
         )
         self.session.add(review)
         await self.session.flush()
-        revies_id = review.id
+        review_id = review.id
+        statement = update(
+            Items
+        ).filter_by(
+            id=item_id
+        ).values(
+            rating_sum=Items.rating_sum + review.stars,
+            rating_count=Items.rating_count + 1
+        )
+        await self.session.execute(statement)
         await self.session.commit()
+        return review_id
 
     async def delete_review(self, item_id: int, user_id: int, review_id: int):
-        statement = delete(
-            ItemsReviews
+        statement = select(
+            ItemsReviews.stars
         ).filter_by(
             item_id=item_id,
             from_user_id=user_id,
             id=review_id
+        ).with_for_update()
+        stars = await self.session.execute(statement)
+        stars = stars.scalar_one_or_none()
+        if stars is None:
+            return False
+
+        statement = delete(
+            ItemsReviews
+        ).filter_by(
+            id=review_id
+        )
+        await self.session.execute(statement)
+        statement = update(
+            Items
+        ).filter_by(
+            id=item_id
+        ).values(
+            rating_sum=Items.rating_sum - stars,
+            rating_count=Items.rating_count - 1
         )
         await self.session.execute(statement)
         await self.session.commit()
+        return True
+
+    async def recalculate_stats(self) -> int:
+        statement = update(
+            Items
+        ).values(
+            rating_sum=select(
+                func.coalesce(func.sum(ItemsReviews.stars), 0)
+            ).where(
+                ItemsReviews.item_id == Items.id
+            ).scalar_subquery(),
+            rating_count=select(
+                func.count(ItemsReviews.id)
+            ).where(
+                ItemsReviews.item_id == Items.id
+            ).scalar_subquery(),
+            clicks_count=select(
+                func.count(ItemsClicks.id)
+            ).where(
+                ItemsClicks.item_id == Items.id
+            ).scalar_subquery(),
+        )
+        result = await self.session.execute(statement)
+        return result.rowcount
 
     async def get_reviews(self, item_id: int, offset: int, page_limit: int, stars: int = None):
         statement = select(
             ItemsReviews
         ).options(
-            joinedload(ItemsReviews.from_user)
+            joinedload(ItemsReviews.from_user).options(*user_short())
         ).filter_by(
             item_id=item_id,
         )
@@ -620,9 +756,7 @@ class ItemsRepository(BaseRepository):
                 user=rw.from_user.to_short_dto(),
                 stars=rw.stars,
                 text=rw.text,
-                created_at=format_date(
-                    rw.created_at, format="d MMMM y", locale="ru"
-                )
+                created_at=format_date(rw.created_at)
             )
             for rw in reviews
         ]
@@ -0,0 +1,56 @@
+"""
+Профили загрузки связей для запросов.
+
+Связи Users и Items по умолчанию объявлены как lazy="raise", поэтому
+каждый запрос явно подключает нужный профиль через options():
+
+    select(Items).options(*item_card())
+    joinedload(Requests.user).options(*user_short())
+"""
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.repository.models import Users, UsersCities, Items, ItemsLocations, ItemsCategory
+
+
+def user_token():
+    """Данные для токена: только типы пользователя"""
+    return (
+        selectinload(Users.type),
+    )
+
+
+def user_short():
+    """Карточка пользователя: город и аватар (UserShortDTO, Seller)"""
+    return (
+        joinedload(Users.user_city).joinedload(UsersCities.city),
+        joinedload(Users.avatar),
+    )
+
+
+def user_full():
+    """Профиль пользователя целиком"""
+    return (
+        *user_short(),
+        *user_token(),
+        selectinload(Users.contacts),
+        joinedload(Users.legal_info),
+    )
+
+
+def item_card():
+    """Карточка товара в списках: цена, город и фото"""
+    return (
+        joinedload(Items.price),
+        joinedload(Items.location).joinedload(ItemsLocations.city),
+        selectinload(Items.photos),
+    )
+
+
+def item_full():
+    """Полная карточка товара с категорией, сроками и продавцом"""
+    return (
+        *item_card(),
+        joinedload(Items.category).joinedload(ItemsCategory.category),
+        joinedload(Items.production),
+        joinedload(Items.user).options(*user_short()),
+    )
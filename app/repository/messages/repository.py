@@ -4,6 +4,7 @@ from sqlalchemy.orm import joinedload
 from sqlalchemy.sql.functions import user
 
 from app.models.users import UserShortDTO
+from app.repository.loaders import user_short
 from app.repository.models import OffersThreads, ThreadsParticipants
 from app.repository.repository import BaseRepository
 
@@ -33,16 +34,6 @@ class MessagesRepository(BaseRepository):
         await self.session.commit()
         return thread_id
 
-    async def get_user_threads(self, user_id: int):
-        statement = select(
-            ThreadsParticipants.thread_id
-        ).filter_by(
-            user_id=user_id
-        )
-        threads = await self.session.execute(statement)
-        threads = threads.scalars().all()
-        return threads
-
     async def delete_thread(self, thread_id: int):
         statement = delete(OffersThreads).filter_by(id=thread_id)
         await self.session.execute(statement)
@@ -80,7 +71,7 @@ class MessagesRepository(BaseRepository):
         statement = select(
             ThreadsParticipants
         ).options(
-            joinedload(ThreadsParticipants.user)
+            joinedload(ThreadsParticipants.user).options(*user_short())
         ).filter_by(
             thread_id=thread_id
         )
@@ -1,9 +1,8 @@
 import datetime
 from typing import Annotated
 
-from babel.dates import format_date
 from pydantic import create_model, Field, BaseModel
-from sqlalchemy import BigInteger, TIMESTAMP, ForeignKey, String, UniqueConstraint
+from sqlalchemy import BigInteger, TIMESTAMP, ForeignKey, String, UniqueConstraint, Index
 from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped, relationship
 
 from app.models.common import CategoryDTO, CategoryShortDTO
@@ -12,6 +11,7 @@ from app.models.request import RequestDTO, RequestPhotos, RequestCategory
 from app.models.users import UserShortDTO
 from app.repository.session import engine
 from app.utils.types import TypesOfUser, ContactType, LegalFormat, ItemType, OrdersStatus, ItemPublishStatus
+from app.utils.dates import format_date
 
 INT_PK = Annotated[
     int, mapped_column(BigInteger, autoincrement=True, primary_key=True)
@@ -103,23 +103,25 @@ class Users(Base):
     middle_name: Mapped[str] = mapped_column(String(255), nullable=True)
     full_filled: Mapped[bool] = mapped_column(default=False)
     is_blocked: Mapped[bool] = mapped_column(default=False)
+    seller_rating_sum: Mapped[float] = mapped_column(default=0, server_default="0")
+    seller_rating_count: Mapped[int] = mapped_column(default=0, server_default="0")
     created_at: Mapped[CREATED_AT]
     updated_at: Mapped[UPDATED_AT]
 
     type: Mapped[list["UsersType"]] = relationship(
         back_populates="user",
-        lazy="joined",
+        lazy="raise",
     )
 
     user_city: Mapped["UsersCities"] = relationship(
         back_populates="user",
-        lazy="joined"
+        lazy="raise"
     )
 
     avatar: Mapped["UserAvatar"] = relationship(
         back_populates="user",
         order_by="UserAvatar.id.desc()",
-        lazy="joined"
+        lazy="raise"
     )
 
     credentials: Mapped["UsersCredentials"] = relationship(
@@ -158,7 +160,7 @@ class Users(Base):
 
     reviews: Mapped[list["SellersReviews"]] = relationship(
         back_populates="seller",
-        lazy="joined",
+        lazy="raise",
         foreign_keys="SellersReviews.seller_id",
     )
 
@@ -192,9 +194,9 @@ class Users(Base):
 
     @property
     def rating(self):
-        if len(self.reviews) == 0:
+        if not self.seller_rating_count:
             return 0
-        return sum([rw.stars for rw in self.reviews]) // len(self.reviews)
+        return self.seller_rating_sum // self.seller_rating_count
 
     @property
     def types(self):
@@ -337,6 +339,25 @@ class Categories(Base):
         )
 
 
+class CategoriesClosure(Base):
+    """
+    Таблица замыкания дерева категорий: по строке на каждую пару
+    (предок, потомок), включая пару категории с самой собой (depth = 0).
+    """
+    __tablename__ = 'categories_closure'
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    depth: Mapped[int] = mapped_column(default=0)
+
+    __table_args__ = (
+        Index(
+            "ix_categories_closure_descendant_ancestor",
+            "descendant_id", "ancestor_id",
+        ),
+    )
+
+
 class SellersCategories(Base):
     __tablename__ = 'sellers_categories'
 
@@ -363,6 +384,9 @@ class Items(Base):
     format: Mapped[ItemType]
     is_delivered: Mapped[bool]
     status: Mapped[ItemPublishStatus] = mapped_column(default=ItemPublishStatus.pending.value)
+    rating_sum: Mapped[float] = mapped_column(default=0, server_default="0")
+    rating_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    clicks_count: Mapped[int] = mapped_column(default=0, server_default="0")
     created_at: Mapped[CREATED_AT]
     updated_at: Mapped[UPDATED_AT]
 
@@ -372,32 +396,32 @@ class Items(Base):
 
     category: Mapped["ItemsCategory"] = relationship(
         back_populates="item",
-        lazy="joined"
+        lazy="raise"
     )
 
     price: Mapped["ItemsPrice"] = relationship(
         back_populates="item",
-        lazy="joined"
+        lazy="raise"
     )
 
     photos: Mapped[list["ItemsPhoto"]] = relationship(
         back_populates="item",
-        lazy="joined"
+        lazy="raise"
     )
 
     production: Mapped["ProductionTime"] = relationship(
         back_populates="item",
-        lazy="joined"
+        lazy="raise"
     )
 
     location: Mapped["ItemsLocations"] = relationship(
         back_populates="item",
-        lazy="joined"
+        lazy="raise"
     )
 
     reviews: Mapped[list["ItemsReviews"]] = relationship(
         back_populates="item",
-        lazy="joined"
+        lazy="raise"
     )
 
     clicks_quantity: Mapped[list["ItemsClicks"]] = relationship(
@@ -412,15 +436,28 @@ class Items(Base):
         back_populates="item",
     )
 
+    __table_args__ = (
+        Index(
+            "ix_items_format_status_created_at",
+            "format", "status", "created_at",
+        ),
+        Index(
+            "ft_items_title_description",
+            "title", "description",
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram",
+        ),
+    )
+
     @property
     def rating(self):
-        if len(self.reviews) == 0:
+        if not self.rating_count:
             return 0
-        return sum([r.stars for r in self.reviews]) / len(self.reviews)
+        return self.rating_sum / self.rating_count
 
     @property
     def reviews_quantity(self):
-        return len(self.reviews)
+        return self.rating_count
 
     @property
     def dto_full(self):
@@ -433,19 +470,15 @@ class Items(Base):
             to_price=self.price.to_price,
             currency=self.price.currency,
             photos=[
-                PhotosDTO(
-                    id=photo.id,
-                    link=photo.link,
-                    index=photo.index
-                )
+                photo.to_dto()
                 for photo in self.photos
             ] if self.photos else [],
             status=self.status.value,
             city=self.location.city.name,
             address=self.location.address,
-            date_created=format_date(self.created_at, format="d MMMM y", locale="ru"),
+            date_created=format_date(self.created_at),
             rating=self.rating,
-            self=self.reviews_quantity,
+            reviews_quantity=self.reviews_quantity,
             from_time=self.production.from_time if self.production else None,
             to_time=self.production.to_time if self.production else None,
             description=self.description,
@@ -460,7 +493,7 @@ class Items(Base):
                 rating=self.user.rating,
                 avatar=self.user.avatar.link if self.user.avatar is not None else None,
             ),
-            clicks=len(self.clicks_quantity)
+            clicks=self.clicks_count
         )
 
 
@@ -501,12 +534,24 @@ class ItemsPhoto(Base):
     id: Mapped[INT_PK]
     item_id: Mapped[int] = mapped_column(ForeignKey("items.id", ondelete="CASCADE"))
     link: Mapped[str] = mapped_column(String(255), nullable=True)
+    thumb_link: Mapped[str] = mapped_column(String(255), nullable=True)
+    card_link: Mapped[str] = mapped_column(String(255), nullable=True)
+    full_link: Mapped[str] = mapped_column(String(255), nullable=True)
     index: Mapped[int]
 
     item: Mapped[Items] = relationship(
         back_populates="photos"
     )
 
+    def to_dto(self, variant: str = "full"):
+        """variant - card для списков, full для карточки товара"""
+        return PhotosDTO(
+            id=self.id,
+            link=getattr(self, f"{variant}_link") or self.link,
+            thumb=self.thumb_link,
+            index=self.index
+        )
+
 
 class ProductionTime(Base):
     __tablename__ = 'production_time'
@@ -537,6 +582,13 @@ class ItemsLocations(Base):
         lazy="joined"
     )
 
+    __table_args__ = (
+        Index(
+            "ix_items_locations_city_item",
+            "city_id", "item_id",
+        ),
+    )
+
 
 class Requests(Base):
     __tablename__ = 'requests'
@@ -545,6 +597,7 @@ class Requests(Base):
     creator_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     title: Mapped[str] = mapped_column(String(255))
     description: Mapped[str] = mapped_column(String(255), nullable=True)
+    clicks_count: Mapped[int] = mapped_column(default=0, server_default="0")
     created_at: Mapped[CREATED_AT]
     updated_at: Mapped[UPDATED_AT]
 
@@ -578,7 +631,7 @@ class Requests(Base):
 
     clicks_quantity: Mapped[list["RequestsClicks"]] = relationship(
         back_populates="request",
-        lazy="joined"
+        lazy="raise"
     )
 
     def to_dto(self, extended: bool = False):
@@ -593,9 +646,7 @@ class Requests(Base):
                     ph.to_dto()
                     for ph in self.photos
                 ] if self.photos is not None else [],
-                created_at=format_date(
-                    self.created_at, format="d MMMM y", locale="ru"
-                )
+                created_at=format_date(self.created_at)
             )
         else:
             response = RequestDTO(
@@ -606,17 +657,13 @@ class Requests(Base):
                 max_price=self.price.max_price,
                 max_days=self.production_time.max_days,
                 photos=[
-                    ph.to_dto()
+                    ph.to_dto("full")
                     for ph in self.photos
                 ] if self.photos is not None else [],
                 category=self.category.to_dto(),
-                created_at=format_date(
-                    self.created_at, format="d MMMM y", locale="ru"
-                ),
-                updated_at=format_date(
-                    self.updated_at, format="d MMMM y", locale="ru"
-                ),
-                clicks=len(self.clicks_quantity)
+                created_at=format_date(self.created_at),
+                updated_at=format_date(self.updated_at),
+                clicks=self.clicks_count
             )
         return response
 
@@ -627,16 +674,20 @@ class RequestsPhotos(Base):
     id: Mapped[INT_PK]
     request_id: Mapped[int] = mapped_column(ForeignKey("requests.id", ondelete="CASCADE"))
     link: Mapped[str] = mapped_column(String(255), nullable=True)
+    thumb_link: Mapped[str] = mapped_column(String(255), nullable=True)
+    card_link: Mapped[str] = mapped_column(String(255), nullable=True)
+    full_link: Mapped[str] = mapped_column(String(255), nullable=True)
     index: Mapped[int]
 
     request: Mapped[Requests] = relationship(
         back_populates="photos"
     )
 
-    def to_dto(self):
+    def to_dto(self, variant: str = "card"):
         return RequestPhotos(
             id=self.id,
-            link=self.link,
+            link=getattr(self, f"{variant}_link") or self.link,
+            thumb=self.thumb_link,
             index=self.index
         )
 
@@ -727,6 +778,25 @@ class Offers(Base):
         foreign_keys=[to_user_id]
     )
 
+    __table_args__ = (
+        Index(
+            "ix_offers_to_user_status_created_at",
+            "to_user_id", "status", "created_at",
+        ),
+        Index(
+            "ix_offers_from_user_status_created_at",
+            "from_user_id", "status", "created_at",
+        ),
+        Index(
+            "ix_offers_to_user_created_at",
+            "to_user_id", "created_at",
+        ),
+        Index(
+            "ix_offers_from_user_created_at",
+            "from_user_id", "created_at",
+        ),
+    )
+
 
 class OffersDetails(Base):
     __tablename__ = 'offers_details'
@@ -830,6 +900,29 @@ class RequestsClicks(Base):
     )
 
 
+class SellerRequestFeed(Base):
+    """
+    Лента запросов продавца: запросы из поддерева его основных категорий,
+    заполняется при создании запроса и обрезается до SELLER_FEED_SIZE записей.
+    """
+    __tablename__ = "seller_request_feed"
+
+    seller_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    request_id: Mapped[int] = mapped_column(
+        ForeignKey("requests.id", ondelete="CASCADE"), primary_key=True
+    )
+    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP)
+
+    __table_args__ = (
+        Index(
+            "ix_seller_request_feed_seller_created",
+            "seller_id", "created_at", "request_id",
+        ),
+    )
+
+
 class SellersReviews(Base):
     __tablename__ = 'sellers_reviews'
 
@@ -1,13 +1,47 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
 from app.settings import settings
 
+_client: AsyncIOMotorClient | None = None
 
-async def get_mongo():
-    dsn = settings.mongo_dsn
-    client = AsyncIOMotorClient(dsn)
-    db = client.get_database()
+
+async def init_mongo() -> AsyncIOMotorClient:
+    """Создание общего клиента MongoDB на процесс"""
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            settings.mongo_dsn,
+            maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+            connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        )
+    return _client
+
+
+def close_mongo() -> None:
+    """Закрытие клиента при остановке приложения"""
+    global _client
+    if _client is not None:
+        _client.close()
+    _client = None
+
+
+def mongo_database() -> AsyncIOMotorDatabase:
+    """База мессенджера из общего клиента, созданного в lifespan"""
+    if _client is None:
+        raise RuntimeError("Клиент MongoDB не инициализирован")
+    return _client.get_database()
+
+
+async def ping_mongo() -> bool:
+    """Проверка доступности MongoDB для /health"""
     try:
-        yield db
-    finally:
-        client.close()
+        await mongo_database().command("ping")
+    except Exception:
+        return False
+    return True
+
+
+async def get_mongo():
+    yield mongo_database()
@@ -0,0 +1,98 @@
+import logging
+
+import pymongo
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.errors import PyMongoError, ConnectionFailure
+
+logger = logging.getLogger("MongoIndexes")
+
+# Индексы под запросы MongoRepository. Поиск по _id (set_read,
+# update/delete сообщения) обслуживается стандартным индексом _id.
+INDEXES: dict[str, list[IndexModel]] = {
+    "messages": [
+        # Лента диалога: get_messages_by_thread, get_total_messages
+        IndexModel(
+            [("thread_id", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING)],
+            name="thread_created_at",
+        ),
+        # Последнее сообщение диалога: refresh_thread_summary, delete_thread
+        IndexModel(
+            [("thread_id", pymongo.ASCENDING), ("_id", pymongo.DESCENDING)],
+            name="thread_id_desc",
+        ),
+        # Непрочитанные получателей в диалоге: refresh_thread_summary.
+        # Частичный индекс хранит только непрочитанные сообщения
+        IndexModel(
+            [("thread_id", pymongo.ASCENDING), ("to_user.id", pymongo.ASCENDING)],
+            name="thread_to_user_unread",
+            partialFilterExpression={"read": False},
+        ),
+        # Смена аватара: update_user_avatat
+        IndexModel([("from_user.id", pymongo.ASCENDING)], name="from_user"),
+        IndexModel([("to_user.id", pymongo.ASCENDING)], name="to_user"),
+    ],
+    "thread_summaries": [
+        # Список диалогов: get_thread_summaries, get_total_threads, get_unread_messages
+        IndexModel(
+            [("participants", pymongo.ASCENDING), ("last_activity", pymongo.DESCENDING)],
+            name="participants_last_activity",
+        ),
+        # Правка последнего сообщения: update_message
+        IndexModel([("last_message.id", pymongo.ASCENDING)], name="last_message"),
+    ],
+}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """
+    Создание объявленных индексов. Повторный вызов ничего не меняет;
+    индекс с тем же именем, но другими параметрами, не пересоздается,
+    а попадает в журнал с ошибкой. Если сервер недоступен, ConnectionFailure
+    пробрасывается сразу, без ожидания таймаута на каждом индексе.
+    """
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                await db[collection].create_indexes([index])
+            except ConnectionFailure:
+                raise
+            except PyMongoError as e:
+                logger.error(f"Индекс {collection}.{name} не создан: {e}")
+
+
+async def missing_indexes(db: AsyncIOMotorDatabase) -> list[str]:
+    """Объявленные индексы, которых нет в базе, в виде collection.name"""
+    missing = []
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        missing.extend(
+            f"{collection}.{index.document['name']}"
+            for index in indexes
+            if index.document["name"] not in existing
+        )
+    return missing
+
+
+async def check_indexes(db: AsyncIOMotorDatabase) -> None:
+    """Предупреждение об отсутствующих индексах при старте приложения"""
+    missing = await missing_indexes(db)
+    if missing:
+        logger.warning(
+            f"В MongoDB нет индексов: {', '.join(missing)}. "
+            f"Создание: python -m app.commands.ensure_mongo_indexes"
+        )
+
+
+async def prepare_indexes(db: AsyncIOMotorDatabase, create: bool) -> None:
+    """
+    Создание (при create) и проверка индексов при старте приложения.
+    Запускается фоновой задачей, поэтому недоступная MongoDB не задерживает старт.
+    """
+    try:
+        if create:
+            await ensure_indexes(db)
+        await check_indexes(db)
+    except PyMongoError as e:
+        logger.error(f"Индексы MongoDB не проверены: {e}")
@@ -7,6 +7,8 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.models.messages import NewMessage, Message
 
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC)
+
 
 class MongoRepository:
     def __init__(self, db:  AsyncIOMotorDatabase):
@@ -17,7 +19,93 @@ class MongoRepository:
         message_data = message.model_dump()
         message_data["read"] = False
         result = await self.db.messages.insert_one(message_data)
-        return str(result.inserted_id)
+        message_id = str(result.inserted_id)
+        await self.touch_thread_summary(message_data, message_id)
+        return message_id
+
+    @staticmethod
+    def _last_message(message: dict, message_id: str) -> dict:
+        return {
+            "id": message_id,
+            "from_user": message["from_user"],
+            "to_user": message["to_user"],
+            "content": message["content"],
+            "created_at": message["created_at"],
+            "read": message["read"],
+        }
+
+    async def touch_thread_summary(self, message: dict, message_id: str):
+        """
+        Обновление сводки диалога новым сообщением одним атомарным
+        update с upsert: последнее сообщение, время активности и
+        счетчик непрочитанных у получателя. Время активности берется
+        из ObjectId сообщения, как и в refresh_thread_summary.
+        """
+        now = ObjectId(message_id).generation_time
+        from_id = message["from_user"]["id"]
+        to_id = message["to_user"]["id"]
+        await self.db.thread_summaries.update_one(
+            {"_id": message["thread_id"]},
+            [{
+                "$set": {
+                    "participants": {
+                        "$setUnion": [{"$ifNull": ["$participants", []]}, [from_id, to_id]]
+                    },
+                    "last_message": {
+                        "$cond": [
+                            {"$gte": [now, {"$ifNull": ["$last_activity", _EPOCH]}]},
+                            {"$literal": self._last_message(message, message_id)},
+                            "$last_message",
+                        ]
+                    },
+                    "last_activity": {"$max": [now, "$last_activity"]},
+                    f"unread.{to_id}": {
+                        "$add": [{"$ifNull": [f"$unread.{to_id}", 0]}, 1]
+                    },
+                }
+            }],
+            upsert=True,
+        )
+
+    async def refresh_thread_summary(self, thread_id: int):
+        """
+        Пересборка сводки диалога по его сообщениям: после удаления
+        сообщения и в команде rebuild_thread_summaries.
+        """
+        last = await self.db.messages.find_one(
+            {"thread_id": thread_id}, sort=[("_id", pymongo.DESCENDING)]
+        )
+        if last is None:
+            await self.db.thread_summaries.delete_one({"_id": thread_id})
+            return
+        unread = await self.db.messages.aggregate([
+            {"$match": {"thread_id": thread_id, "read": False}},
+            {"$group": {"_id": "$to_user.id", "count": {"$sum": 1}}},
+        ]).to_list(length=None)
+        participants = {last["from_user"]["id"], last["to_user"]["id"]}
+        await self.db.thread_summaries.replace_one(
+            {"_id": thread_id},
+            {
+                "participants": sorted(participants | {row["_id"] for row in unread}),
+                "last_message": self._last_message(last, str(last["_id"])),
+                "last_activity": last["_id"].generation_time,
+                "unread": {str(row["_id"]): row["count"] for row in unread},
+            },
+            upsert=True,
+        )
+
+    async def get_thread_summaries(self, user_id: int, offset: int, limit: int):
+        """Диалоги пользователя по убыванию последней активности"""
+        return await self.db.thread_summaries.find(
+            {"participants": user_id}
+        ).sort(
+            "last_activity", pymongo.DESCENDING
+        ).skip(offset).limit(limit).to_list(length=limit)
+
+    async def get_total_threads(self, user_id: int):
+        return await self.db.thread_summaries.count_documents(
+            {"participants": user_id}
+        )
 
     async def get_messages_by_thread(self, thread_id: int, limit: int, offset: int):
         messages = await self.db.messages.find({
@@ -41,15 +129,42 @@ class MongoRepository:
         })
         return count
 
-    async def set_read(self, messages_ids: list[str], receiver_id: int):
+    async def set_read(self, thread_id: int, messages_ids: list[str], receiver_id: int):
         result = await self.db.messages.update_many({
             "$and": [
                 {"_id": {"$in": list(map(lambda x: ObjectId(x), messages_ids))}},
+                {"thread_id": thread_id},
                 {"to_user.id": receiver_id}
             ]
         }, {
             "$set": {"read": True}
         })
+        if result.modified_count:
+            # Счетчик уменьшается относительно текущего значения в том же
+            # атомарном update, что и touch_thread_summary его увеличивает,
+            # поэтому параллельно добавленное сообщение не теряется
+            await self.db.thread_summaries.update_one(
+                {"_id": thread_id},
+                [{
+                    "$set": {
+                        f"unread.{receiver_id}": {
+                            "$max": [0, {"$subtract": [
+                                {"$ifNull": [f"$unread.{receiver_id}", 0]},
+                                result.modified_count,
+                            ]}]
+                        },
+                        "last_message.read": {
+                            "$or": [
+                                "$last_message.read",
+                                {"$and": [
+                                    {"$eq": ["$last_message.to_user.id", receiver_id]},
+                                    {"$in": ["$last_message.id", messages_ids]},
+                                ]},
+                            ]
+                        },
+                    }
+                }]
+            )
         if result.modified_count == len(messages_ids):
             return True
         elif result.modified_count > 1:
@@ -69,13 +184,18 @@ class MongoRepository:
             }
         })
         if result.modified_count == 1:
+            await self.db.thread_summaries.update_one(
+                {"last_message.id": str(message_id)},
+                {"$set": {"last_message.content": content}}
+            )
             return True
 
     async def delete_message(self, message_id: str):
-        result = await self.db.messages.delete_one({
+        message = await self.db.messages.find_one_and_delete({
             "_id": ObjectId(message_id),
         })
-        if result.deleted_count == 1:
+        if message is not None:
+            await self.refresh_thread_summary(message["thread_id"])
             return True
 
     async def get_message_by_id(self, message_id: str, user_id: int):
@@ -90,107 +210,21 @@ class MongoRepository:
 
     async def get_unread_messages(self, user_id: int):
         pipeline = [
-            {"$match": {"to_user.id": user_id, "read": False}},
-            {
-                "$group": {
-                    "_id": "$thread_id",
-                    "unread": {"$sum": 1},
-                }
-            },
+            {"$match": {"participants": user_id}},
             {
                 "$project": {
                     "_id": 0,
-                    "unread": 1,
+                    "unread": {"$ifNull": [f"$unread.{user_id}", 0]},
                     "thread_id": "$_id",
                 }
             }
         ]
-        unread_messages = self.db.messages.aggregate(pipeline)
-        unread_messages = await unread_messages.to_list(length=1)
+        unread_messages = self.db.thread_summaries.aggregate(pipeline)
+        unread_messages = await unread_messages.to_list(length=None)
         return unread_messages
 
-    async def get_latest_message(self, user_id: int, threads_ids: list[int] = None):
-        pipeline = [
-            {"$match": {"thread_id": {"$in": [10]}}},
-            {"$sort": {"created_at": -1}},
-            {
-                "$group": {
-                    "_id": "$thread_id",
-                    "latest_message": {"$first": "$$ROOT"},
-                }
-            },
-            {"$replaceRoot": {"newRoot": "$latest_message"}},
-            {
-                "$project": {
-                    "_id": 1,
-                    "from_user": 1,
-                    "to_user": 1,
-                    "thread_id": 1,
-                    "content": 1,
-                    "created_at": 1,
-                    "read": 1,
-                }
-            }
-        ]
-        latest_message = self.db.messages.aggregate(pipeline)
-        latest_message = await latest_message.to_list(length=None)
-        return latest_message
-
-    async def get_latest_messages_with_unread_count(
-            self, user_id: int, threads_ids: list[int]
-    ):
-        pipeline = [
-            {"$match": {"thread_id": {"$in": threads_ids}}},
-            {"$sort": {"created_at": -1}},
-            {
-                "$group": {
-                    "_id": "$thread_id",
-                    "latest_message": {"$first": "$$ROOT"},
-                    "unread_count": {
-                        "$sum": {
-                            "$cond": [
-                                {
-                                    "$and": [
-                                        {"$eq": ["$read", False]},
-                                        {"$eq": ["$to_user.id", user_id]},
-                                    ]
-                                },
-                                1, 0
-                            ]
-                        }
-                    }
-                }
-            },
-            {"$replaceRoot": {"newRoot": {
-                "_id": "$latest_message._id",
-                "from_user": "$latest_message.from_user",
-                "to_user": "$latest_message.to_user",
-                "thread_id": "$latest_message.thread_id",
-                "content": "$latest_message.content",
-                "created_at": "$latest_message.created_at",
-                "read": "$latest_message.read",
-                "unread_count": "$unread_count"
-            }}},
-            {"$sort": {"created_at": -1}},
-            {
-                "$project": {
-                    "_id": 1,
-                    "from_user": 1,
-                    "to_user": 1,
-                    "thread_id": 1,
-                    "content": 1,
-                    "created_at": 1,
-                    "read": 1,
-                    "unread_count": 1,
-                }
-            }
-        ]
-
-        latest_message = self.db.messages.aggregate(pipeline)
-        latest_message = await latest_message.to_list(length=None)
-        return latest_message
-
     async def delete_thread(self, thread_id: int):
+        await self.db.thread_summaries.delete_one({"_id": thread_id})
         result = await self.db.messages.delete_many({"thread_id": thread_id})
         if result.deleted_count > 0:
             return True
@@ -213,6 +247,12 @@ class MongoRepository:
             }
         )
 
+        for role in ("from_user", "to_user"):
+            await self.db.thread_summaries.update_many(
+                {f"last_message.{role}.id": user_id},
+                {"$set": {f"last_message.{role}.avatar": new_avatar}}
+            )
+
         if attempt_from_user_update.modified_count > 0 and attempt_to_user_update.modified_count == 0:
             return True
 
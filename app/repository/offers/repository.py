@@ -1,13 +1,19 @@
-from babel.dates import format_date
-from sqlalchemy import select, Result, Sequence, func, delete, update
+import datetime
+from typing import Any
+
+from sqlalchemy import select, Result, Sequence, func, delete, update, Select, or_, and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, raiseload
 
-from app.models.items import ItemShortDTO, PhotosDTO, UpdateStatusDTO
+from app.models.items import ItemShortDTO, UpdateStatusDTO
 from app.models.offers import CreateOfferDTO, OfferDTO
+from app.models.request import RequestDTO
 from app.models.users import UserShortDTO
-from app.repository.models import Offers, OffersDetails
+from app.repository.items.repository import ItemsRepository
+from app.repository.loaders import user_short
+from app.repository.models import Offers, OffersDetails, Requests, Users, Items
 from app.repository.repository import BaseRepository
+from app.utils.dates import format_date
 
 
 class OffersRepository(BaseRepository):
@@ -35,72 +41,126 @@ class OffersRepository(BaseRepository):
         await self.session.commit()
         return offer_id
 
-    async def get_offers_by_criteria(self, criteria: dict[str, int], offset: int, limit: int):
+    async def get_offers_by_criteria(
+            self, criteria: dict[str, Any], offset: int, limit: int,
+            after: tuple[datetime.datetime, int] | None = None
+    ) -> list[OfferDTO]:
+        """
+        Страница заказов, новые первыми.
+        При переданном after (created_at, id) последнего заказа предыдущей
+        страницы выборка продолжается по индексу (пользователь, статус,
+        created_at) без OFFSET.
+        """
         statement = select(
             Offers
         ).filter_by(
             **criteria,
         ).order_by(
-            Offers.created_at.desc()
-        ).options(
-            joinedload(Offers.item)
-        ).options(
-            joinedload(Offers.to_user)
-        ).options(
-            joinedload(Offers.details)
-        ).order_by(
-            Offers.created_at.desc()
-        ).offset(offset).limit(limit)
+            Offers.created_at.desc(), Offers.id.desc()
+        )
+        if after is not None:
+            created_at, offer_id = after
+            statement = statement.filter(
+                or_(
+                    Offers.created_at < created_at,
+                    and_(
+                        Offers.created_at == created_at,
+                        Offers.id < offer_id
+                    )
+                )
+            ).limit(limit)
+        else:
+            statement = statement.offset(offset).limit(limit)
+        return await self.get_offers(statement)
+
+    async def get_offers(self, statement: Select) -> list[OfferDTO]:
+        """
+        Заказы с деталями одним запросом; пользователи, товары и запросы
+        всей страницы догружаются по одному запросу на группу вместо
+        соединений и ленивых загрузок на каждую строку.
+        """
+        statement = statement.options(
+            joinedload(Offers.details),
+            # Связанные объекты собираются ниже пакетными запросами,
+            # обращение к ним у строк заказа - ошибка, а не ленивая загрузка
+            raiseload(Offers.from_user),
+            raiseload(Offers.to_user),
+            raiseload(Offers.item),
+            raiseload(Offers.request),
+        )
         result = await self.session.execute(statement)
-        result = result.scalars().unique().all()
-        if not result:
-            return None
+        offers = result.scalars().unique().all()
+        if not offers:
+            return []
+
+        users = await self.get_users(
+            {offer.from_user_id for offer in offers} | {offer.to_user_id for offer in offers}
+        )
+        items = await self.get_items(
+            {offer.item_id for offer in offers if offer.item_id is not None}
+        )
+        requests = await self.get_requests(
+            {offer.request_id for offer in offers if offer.request_id is not None}
+        )
         return [
             OfferDTO(
                 id=offer.id,
-                from_user=UserShortDTO(
-                    id=offer.from_user.id,
-                    full_name=offer.from_user.full_name,
-                    city=offer.from_user.city,
-                    avatar=offer.from_user.avatar.link if offer.from_user.avatar is not None else None,
-                ),
-                to_user=UserShortDTO(
-                    id=offer.to_user.id,
-                    full_name=offer.to_user.full_name,
-                    city=offer.to_user.city,
-                    avatar=offer.to_user.avatar.link if offer.to_user.avatar is not None else None,
-                ),
+                from_user=users[offer.from_user_id],
+                to_user=users[offer.to_user_id],
                 status=offer.status.value,
                 status_comment=offer.reject_comment,
-                item=ItemShortDTO(
-                    id=offer.item.id,
-                    title=offer.item.title,
-                    type=offer.item.format,
-                    price=offer.item.price.fix_price,
-                    from_price=offer.item.price.from_price,
-                    to_price=offer.item.price.to_price,
-                    currency=offer.item.price.currency,
-                    photos=[
-                        PhotosDTO(
-                            id=photo.id,
-                            link=photo.link,
-                            index=photo.index
-                        )
-                        for photo in offer.item.photos
-                    ] if offer.item.photos else [],
-                ) if offer.item else None,
-                request=offer.request.to_dto() if offer.request else None,
+                item=items.get(offer.item_id),
+                request=requests.get(offer.request_id),
                 price=offer.details.price,
                 currency=offer.details.currency,
                 production=offer.details.production,
                 comment=offer.details.comment,
-                created_at=format_date(
-                    offer.created_at, format="d MMMM y", locale="ru"
-                ),
+                created_at=format_date(offer.created_at),
+                created=offer.created_at,
             )
-            for offer in result
+            for offer in offers
         ]
 
+    async def get_users(self, user_ids: set[int]) -> dict[int, UserShortDTO]:
+        statement = select(
+            Users
+        ).where(
+            Users.id.in_(user_ids)
+        ).options(
+            *user_short()
+        )
+        result = await self.session.execute(statement)
+        return {
+            user.id: user.to_short_dto()
+            for user in result.scalars().unique().all()
+        }
+
+    async def get_items(self, item_ids: set[int]) -> dict[int, ItemShortDTO]:
+        if not item_ids:
+            return {}
+        items = await ItemsRepository(self.session).get_cards(
+            ItemsRepository.card_statement().where(
+                Items.id.in_(item_ids)
+            )
+        )
+        return {item.id: item for item in items}
+
+    async def get_requests(self, request_ids: set[int]) -> dict[int, RequestDTO]:
+        if not request_ids:
+            return {}
+        statement = select(
+            Requests
+        ).where(
+            Requests.id.in_(request_ids)
+        ).options(
+            joinedload(Requests.user).options(*user_short()),
+        )
+        result = await self.session.execute(statement)
+        return {
+            request.id: request.to_dto()
+            for request in result.scalars().unique().all()
+        }
+
     async def get_user_offers_quantity(self, criteria: dict[str, int]):
         statement = select(
             func.count(Offers.id)
@@ -130,80 +190,62 @@ class OffersRepository(BaseRepository):
         await self.session.execute(statement)
         await self.session.commit()
 
-    async def get(self, offer_id: int):
-        statement = select(
-            Offers
-        ).filter_by(
-            id=offer_id,
-        ).options(
-            joinedload(Offers.item)
-        ).options(
-            joinedload(Offers.request)
-        ).options(
-            joinedload(Offers.to_user)
-        ).options(
-            joinedload(Offers.details)
-        )
-        result = await self.session.execute(statement)
-        result = result.scalars().unique().all()
-        if not result:
-            return None
-        offer = result[0]
-        return OfferDTO(
-            id=offer.id,
-            from_user=UserShortDTO(
-                id=offer.from_user.id,
-                full_name=offer.from_user.full_name,
-                city=offer.from_user.city,
-                avatar=offer.from_user.avatar.link if offer.from_user.avatar is not None else None,
-            ),
-            to_user=UserShortDTO(
-                id=offer.to_user.id,
-                full_name=offer.to_user.full_name,
-                city=offer.to_user.city,
-                avatar=offer.to_user.avatar.link if offer.to_user.avatar is not None else None,
-            ),
-            status=offer.status.value,
-            status_comment=offer.reject_comment,
-            item=ItemShortDTO(
-                id=offer.item.id,
-                title=offer.item.title,
-                type=offer.item.format,
-                price=offer.item.price.fix_price,
-                from_price=offer.item.price.from_price,
-                to_price=offer.item.price.to_price,
-                currency=offer.item.price.currency,
-                photos=[
-                    PhotosDTO(
-                        id=photo.id,
-                        link=photo.link,
-                        index=photo.index
-                    )
-                    for photo in offer.item.photos
-                ] if offer.item.photos else [],
-                city=offer.item.location.city.name,
-                address=offer.item.location.address
-            ) if offer.item else None,
-            request=offer.request.to_dto() if offer.request else None,
-            price=offer.details.price,
-            currency=offer.details.currency,
-            production=offer.details.production,
-            comment=offer.details.comment,
-            created_at=format_date(
-                offer.created_at, format="d MMMM y", locale="ru"
-            )
+    async def get(self, offer_id: int) -> OfferDTO | None:
+        result = await self.get_offers(
+            select(Offers).filter_by(id=offer_id)
         )
+        return result[0] if result else None
 
-    async def update(self, offer_id: int, update_data: dict[str, str]):
+    async def update_status_if(
+            self, offer_id: int, user_id: int, status: str, comment: str | None,
+            allowed_from: list[str], item_actor: str | None, request_actor: str | None
+    ) -> bool:
+        """
+        Смена статуса одним условным UPDATE: заказ должен быть в одном из
+        allowed_from, а пользователь - участником, которому разрешен переход
+        (item_actor для заказа на товар, request_actor для заказа по запросу).
+        False, если условие не выполнено, в том числе из-за параллельной смены.
+        """
+        participant = or_(
+            Offers.from_user_id == user_id,
+            Offers.to_user_id == user_id,
+        )
+        conditions = [
+            Offers.id == offer_id,
+            Offers.status.in_(allowed_from),
+            participant,
+        ]
+        if item_actor is not None:
+            conditions.append(
+                or_(
+                    and_(
+                        Offers.item_id.is_not(None),
+                        getattr(Offers, item_actor) == user_id
+                    ),
+                    and_(
+                        Offers.item_id.is_(None),
+                        Offers.request_id.is_not(None),
+                        getattr(Offers, request_actor) == user_id
+                    ),
+                    and_(
+                        Offers.item_id.is_(None),
+                        Offers.request_id.is_(None)
+                    ),
+                )
+            )
         statement = update(
             Offers
-        ).filter_by(
-            id=offer_id,
+        ).where(
+            *conditions
         ).values(
-            **update_data
+            status=status,
+            reject_comment=comment,
+        ).execution_options(
+            synchronize_session=False
         )
-        await self.session.execute(statement)
+        result = await self.session.execute(statement)
         await self.session.commit()
+        return result.rowcount > 0
 
     async def update_details(self, offer_id: int, update_data: dict[str, str]):
         statement = update(
@@ -0,0 +1,51 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+from sqlalchemy import event
+
+from app.repository.session import engine
+
+
+@dataclass
+class QueryStats:
+    """
+    Счетчик SQL-запросов в рамках одного контекста
+
+    Атрибуты:
+        statements(int) - Количество выполненных запросов
+        rows(int) - Количество строк, полученных из курсора
+    """
+    statements: int = 0
+    rows: int = 0
+
+
+_current_stats: ContextVar[tuple[QueryStats, ...]] = ContextVar("query_stats", default=())
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Подсчет запросов, выполненных внутри блока
+
+        with count_queries() as stats:
+            await service.get_filtered_items(...)
+        assert stats.statements <= 3
+
+    Вложенные блоки считаются вместе с внешними.
+    """
+    stats = QueryStats()
+    token = _current_stats.set(_current_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    rows = cursor.rowcount if cursor.description is not None and cursor.rowcount > 0 else 0
+    for stats in _current_stats.get():
+        stats.statements += 1
+        stats.rows += rows
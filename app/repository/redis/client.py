@@ -0,0 +1,41 @@
+from redis.asyncio import Redis, ConnectionPool
+
+from app.settings import settings
+
+_pool: ConnectionPool | None = None
+_client: Redis | None = None
+
+
+async def init_redis() -> Redis:
+    """Создание общего пула подключений к Redis на процесс"""
+    global _pool, _client
+    if _client is None:
+        _pool = ConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        )
+        _client = Redis(connection_pool=_pool)
+    return _client
+
+
+async def close_redis() -> None:
+    """Закрытие пула подключений при остановке приложения"""
+    global _pool, _client
+    if _client is not None:
+        await _client.aclose()
+    if _pool is not None:
+        await _pool.disconnect()
+    _pool = None
+    _client = None
+
+
+def redis_client() -> Redis:
+    """Общий клиент Redis, созданный в lifespan"""
+    if _client is None:
+        raise RuntimeError("Пул Redis не инициализирован")
+    return _client
+
+
+async def get_redis():
+    yield redis_client()
@@ -1,17 +1,23 @@
-from sqlalchemy import select, delete, func
+import datetime
+
+from sqlalchemy import select, delete, func, insert, literal, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from app.api.v1.requests.requests import NewRequest
-from app.repository.models import Requests, RequestsPrice, RequestsProductionTime, RequestsCategory, RequestsPhotos
+from app.repository.loaders import user_short
+from app.repository.models import Requests, RequestsPrice, RequestsProductionTime, RequestsCategory, RequestsPhotos, \
+    CategoriesClosure, SellersCategories, SellerRequestFeed
 from app.repository.repository import BaseRepository
+from app.settings import settings
+from app.utils.images import variant_key
 
 
 class RequestsRepository(BaseRepository):
     def __init__(self, session: AsyncSession):
         super().__init__(session)
 
-    async def add(self, user_id: int, body: NewRequest):
+    async def add(self, user_id: int, body: NewRequest, with_variants: frozenset[str] | set[str] = frozenset()):
         request = Requests(
             creator_id=user_id,
             title=body.title,
@@ -35,21 +41,108 @@ class RequestsRepository(BaseRepository):
         )
         details = [request_price, request_production_time, request_category]
         for i, photo in enumerate(body.photos):
+            # Ссылки на производные сохраняются только для фото, у которых
+            # они есть (with_variants); для остальных при чтении отдается link
+            has_variants = str(photo) in with_variants
             details.append(
                 RequestsPhotos(
                     request_id=request_id,
                     link=photo,
+                    thumb_link=variant_key(str(photo), "thumb") if has_variants else None,
+                    card_link=variant_key(str(photo), "card") if has_variants else None,
+                    full_link=variant_key(str(photo), "full") if has_variants else None,
                     index=i
                 )
             )
 
         self.session.add_all(details)
+        await self.fan_out(request_id, body.category_id, request.created_at)
         await self.session.commit()
         return request_id
 
+    async def fan_out(self, request_id: int, category_id: int, created_at: datetime.datetime) -> None:
+        """
+        Добавление запроса в ленты продавцов, у которых основная категория
+        совпадает с категорией запроса или является ее предком.
+        """
+        sellers = select(
+            SellersCategories.user_id
+        ).join(
+            CategoriesClosure, CategoriesClosure.ancestor_id == SellersCategories.category_id
+        ).filter(
+            CategoriesClosure.descendant_id == category_id
+        )
+        statement = insert(
+            SellerRequestFeed
+        ).prefix_with(
+            "IGNORE"
+        ).from_select(
+            ["seller_id", "request_id", "created_at"],
+            sellers.add_columns(
+                literal(request_id), literal(created_at)
+            )
+        )
+        await self.session.execute(statement)
+        await self.trim_feeds(sellers)
+
+    async def trim_feeds(self, sellers) -> None:
+        """Удаление из лент указанных продавцов записей старше SELLER_FEED_SIZE"""
+        ranked = select(
+            SellerRequestFeed.seller_id,
+            SellerRequestFeed.request_id,
+            func.row_number().over(
+                partition_by=SellerRequestFeed.seller_id,
+                order_by=(
+                    SellerRequestFeed.created_at.desc(),
+                    SellerRequestFeed.request_id.desc()
+                )
+            ).label("position")
+        ).filter(
+            SellerRequestFeed.seller_id.in_(sellers)
+        ).subquery()
+        statement = delete(
+            SellerRequestFeed
+        ).where(
+            tuple_(
+                SellerRequestFeed.seller_id, SellerRequestFeed.request_id
+            ).in_(
+                select(
+                    ranked.c.seller_id, ranked.c.request_id
+                ).filter(
+                    ranked.c.position > settings.SELLER_FEED_SIZE
+                )
+            )
+        )
+        await self.session.execute(statement)
+
+    async def fill_seller_feed(self, seller_id: int, categories: list[int]) -> None:
+        """Начальное заполнение ленты продавца последними запросами его категорий"""
+        recent = self.subtree_filter(
+            select(
+                literal(seller_id),
+                Requests.id,
+                Requests.created_at,
+            ),
+            categories
+        ).order_by(
+            Requests.created_at.desc()
+        ).limit(
+            settings.SELLER_FEED_SIZE
+        )
+        statement = insert(
+            SellerRequestFeed
+        ).prefix_with(
+            "IGNORE"
+        ).from_select(
+            ["seller_id", "request_id", "created_at"], recent
+        )
+        await self.session.execute(statement)
+
     async def get(self, request_id: int,):
         statement = select(Requests).where(Requests.id == request_id).options(
             joinedload(Requests.category)
+        ).options(
+            joinedload(Requests.user).options(*user_short())
         )
         result = await self.session.execute(statement)
         result = result.scalars().unique().all()
@@ -64,18 +157,31 @@ class RequestsRepository(BaseRepository):
         await self.session.execute(statement)
         await self.session.commit()
 
+    @staticmethod
+    def subtree_filter(statement, categories: list[int]):
+        """Запросы из указанных категорий и всех вложенных в них"""
+        return statement.join(
+            RequestsCategory, Requests.id == RequestsCategory.request_id
+        ).filter(
+            RequestsCategory.category_id.in_(
+                select(
+                    CategoriesClosure.descendant_id
+                ).filter(
+                    CategoriesClosure.ancestor_id.in_(categories)
+                )
+            )
+        )
+
     async def get_for_seller(self, offset: int, limit: int, categories: list[int] = None):
         statement = select(
             Requests
         ).order_by(
             Requests.created_at.desc()
+        ).options(
+            joinedload(Requests.user).options(*user_short())
         )
         if categories:
-            statement = statement.join(
-                RequestsCategory, Requests.id == RequestsCategory.request_id
-            ).filter(
-                RequestsCategory.category_id.in_(categories)
-            )
+            statement = self.subtree_filter(statement, categories)
         result = await self.session.execute(statement.offset(offset).limit(limit))
         result = result.scalars().unique().all()
         if not result:
@@ -85,6 +191,38 @@ class RequestsRepository(BaseRepository):
             for rs in result
         ]
 
+    async def get_feed(self, seller_id: int, offset: int, limit: int):
+        """Страница ленты продавца: диапазон по (seller_id, created_at)"""
+        statement = select(
+            Requests
+        ).join(
+            SellerRequestFeed, SellerRequestFeed.request_id == Requests.id
+        ).filter(
+            SellerRequestFeed.seller_id == seller_id
+        ).order_by(
+            SellerRequestFeed.created_at.desc(),
+            SellerRequestFeed.request_id.desc()
+        ).options(
+            joinedload(Requests.user).options(*user_short())
+        )
+        result = await self.session.execute(statement.offset(offset).limit(limit))
+        result = result.scalars().unique().all()
+        return [
+            rs.to_dto()
+            for rs in result
+        ]
+
+    async def total_feed(self, seller_id: int) -> int:
+        statement = select(
+            func.count()
+        ).select_from(
+            SellerRequestFeed
+        ).filter(
+            SellerRequestFeed.seller_id == seller_id
+        )
+        result = await self.session.execute(statement)
+        return result.scalar_one()
+
     async def get_my_requests(self, user_id: int, offset: int, limit: int):
         statement = select(
             Requests
@@ -92,6 +230,8 @@ class RequestsRepository(BaseRepository):
             creator_id=user_id
         ).order_by(
             Requests.created_at.desc()
+        ).options(
+            joinedload(Requests.user).options(*user_short())
         )
         result = await self.session.execute(statement.offset(offset).limit(limit))
         result = result.scalars().unique().all()
@@ -107,11 +247,7 @@ class RequestsRepository(BaseRepository):
             func.count(Requests.id),
         )
         if categories:
-            statement = statement.join(
-                RequestsCategory, Requests.id == RequestsCategory.request_id
-            ).filter(
-                RequestsCategory.category_id.in_(categories)
-            )
+            statement = self.subtree_filter(statement, categories)
 
         if creator_id:
             statement = statement.filter_by(
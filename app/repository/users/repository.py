@@ -2,7 +2,6 @@ from abc import ABC, abstractmethod
 from typing import Union
 
 import sqlalchemy
-from babel.dates import format_date
 from sqlalchemy import select, delete, update, func, literal, Float, text, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
@@ -12,11 +11,14 @@ from app.models.auth import TokenPayload
 from app.models.common import ReviewsByStarsDTO
 from app.models.users import UserCreateDTO, UserFillingDTO, ContactDTO, CompanyDataDTO, UserDTO, ContactsDTO, ReviewDTO, \
     UserShortDTO
+from app.repository.loaders import user_token, user_full, user_short
 from app.repository.models import Users, UsersCredentials, UsersContacts, UsersCities, Cities, UserAvatar, UsersType, \
     SellersReviews, UserReports, LegalInfo, SellersCategories
 from app.repository.repository import BaseRepository
+from app.repository.requests.repository import RequestsRepository
 from app.repository.users.exceptions import UserAlreadyExistsException, UserNotFoundException
 from app.utils.types import TypesOfUser
+from app.utils.dates import format_date
 
 
 class UsersRepository(BaseRepository):
@@ -61,6 +63,8 @@ class UsersRepository(BaseRepository):
             Users
         ).join(UsersCredentials).filter_by(
             email=login
+        ).options(
+            *user_token()
         )
         result = await self.session.execute(statement)
         result = result.scalar()
@@ -82,6 +86,8 @@ class UsersRepository(BaseRepository):
             Users
         ).filter_by(
             id=user_id
+        ).options(
+            *user_token()
         )
         result = await self.session.execute(statement)
         result = result.scalar()
@@ -131,6 +137,11 @@ class UsersRepository(BaseRepository):
             details.extend(user_categories)
         self.session.add_all(details)
         await self.session.execute(statement)
+        if data.main_category:
+            await self.session.flush()
+            await RequestsRepository(self.session).fill_seller_feed(
+                user_id, data.main_category
+            )
 
     async def add_type(self, user_id: int, _type: TypesOfUser) -> None:
         __type = UsersType(
@@ -162,7 +173,7 @@ class UsersRepository(BaseRepository):
 
     async def is_exist(self, user_id: int):
         statement = select(
-            Users
+            Users.id
         ).filter_by(
             id=user_id
         )
@@ -233,15 +244,9 @@ class UsersRepository(BaseRepository):
             Users
         ).filter_by(
             id=user_id
-        ).options(joinedload(
-            Users.user_city,
-        )).options(joinedload(
-            Users.avatar
-        )).options(joinedload(
-            Users.contacts
-        )).options(joinedload(
-            Users.legal_info
-        ))
+        ).options(
+            *user_full()
+        )
         result = await self.session.execute(statement)
         result = result.scalars().unique().all()
         if not result:
@@ -274,6 +279,8 @@ class UsersRepository(BaseRepository):
             Users
         ).filter(
             Users.id.in_(users)
+        ).options(
+            *user_token()
         )
         result = await self.session.execute(statement)
         result = result.scalars().unique().all()
@@ -295,16 +302,65 @@ class UsersRepository(BaseRepository):
             text=body.text,
         )
         self.session.add(review)
+        await self.session.flush()
+        statement = update(
+            Users
+        ).filter_by(
+            id=to_user_id
+        ).values(
+            seller_rating_sum=Users.seller_rating_sum + body.stars,
+            seller_rating_count=Users.seller_rating_count + 1
+        )
+        await self.session.execute(statement)
         await self.session.commit()
 
     async def delete_review(self, review_id: int):
+        statement = select(
+            SellersReviews.seller_id, SellersReviews.stars
+        ).filter_by(
+            id=review_id
+        ).with_for_update()
+        review = await self.session.execute(statement)
+        review = review.one_or_none()
+        if review is None:
+            return False
+        seller_id, stars = review
+
         statement = delete(
             SellersReviews
         ).filter_by(
             id=review_id
         )
         await self.session.execute(statement)
+        statement = update(
+            Users
+        ).filter_by(
+            id=seller_id
+        ).values(
+            seller_rating_sum=Users.seller_rating_sum - stars,
+            seller_rating_count=Users.seller_rating_count - 1
+        )
+        await self.session.execute(statement)
         await self.session.commit()
+        return True
+
+    async def recalculate_seller_ratings(self) -> int:
+        statement = update(
+            Users
+        ).values(
+            seller_rating_sum=select(
+                func.coalesce(func.sum(SellersReviews.stars), 0)
+            ).where(
+                SellersReviews.seller_id == Users.id
+            ).scalar_subquery(),
+            seller_rating_count=select(
+                func.count(SellersReviews.id)
+            ).where(
+                SellersReviews.seller_id == Users.id
+            ).scalar_subquery(),
+        )
+        result = await self.session.execute(statement)
+        return result.rowcount
 
     async def get_review_owner(self, review_id: int):
         statement = select(
@@ -322,7 +378,7 @@ class UsersRepository(BaseRepository):
         ).filter_by(
             **criteria
         ).options(
-            joinedload(SellersReviews.from_user)
+            joinedload(SellersReviews.from_user).options(*user_short())
         ).offset(offset).limit(limit)
         result = await self.session.execute(statement)
         result = result.scalars().unique().all()
@@ -338,9 +394,7 @@ class UsersRepository(BaseRepository):
                 ),
                 stars=review.stars,
                 text=review.text,
-                created_at=format_date(
-                    review.created_at, format="d MMMM y", locale="ru"
-                )
+                created_at=format_date(review.created_at)
             )
             for review in result
         ]
@@ -1,6 +1,10 @@
 from app.api.admin.requests import AddFAQ
 from app.api.common.responses import Category
 from app.repository.admin.repository import AdminRepository
+from app.repository.items.repository import ItemsRepository
+from app.services.common.category_index import category_indexes
+from app.services.common.city_index import city_index
+from app.services.items.cache import invalidate_catalog_pages
 from app.services.service import BaseService
 from app.utils.types import Meta
 
@@ -59,6 +63,7 @@ class AdminService(BaseService):
             await self._repository.delete_category(
                 category_id
             )
+        await category_indexes.invalidate()
 
         return {
             "success": True,
@@ -79,6 +84,7 @@ class AdminService(BaseService):
             }
 
         await self._repository.update_category(category_id, value)
+        await category_indexes.invalidate()
         return {
             "success": True,
         }
@@ -102,6 +108,7 @@ class AdminService(BaseService):
             }
 
         await self._repository.update_region(region_id, value)
+        await city_index.invalidate()
         return {
             "success": True,
         }
@@ -149,7 +156,10 @@ class AdminService(BaseService):
 
     async def set_item_status(self, item_id: int, approve: bool):
         status = "approved" if approve else "rejected"
+        tags = await ItemsRepository(self._repository.session).get_item_tags(item_id)
         await self._repository.set_publish_item_status(item_id, status)
+        if tags is not None:
+            await invalidate_catalog_pages(tags)
         return {
             "success": True
         }
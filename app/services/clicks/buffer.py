@@ -0,0 +1,114 @@
+import asyncio
+import logging
+
+from app.repository.clicks.repository import ClicksRepository
+from app.repository.session import async_session
+from app.settings import settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import Gauge, Counter
+
+clicks_buffer_depth = Gauge(
+    "clicks_buffer_depth", "Просмотры, ожидающие записи в БД"
+)
+clicks_flushed_total = Counter(
+    "clicks_flushed_total", "Просмотры, записанные в БД"
+)
+clicks_flush_errors_total = Counter(
+    "clicks_flush_errors_total", "Неудачные попытки записи просмотров"
+)
+
+
+class ClickBuffer:
+    """
+    Буфер просмотров товаров и запросов с отложенной записью.
+
+    Повторные просмотры отсекаются в памяти (CLICKS_DEDUP_TTL), остальные
+    копятся и пишутся пачкой INSERT IGNORE раз в CLICKS_FLUSH_INTERVAL секунд
+    или сразу по достижении CLICKS_FLUSH_SIZE записей. При остановке
+    приложения буфер сбрасывается в БД.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._items: set[tuple[int, int]] = set()
+        self._requests: set[tuple[int, int]] = set()
+        self._seen = TTLCache(
+            ttl=settings.CLICKS_DEDUP_TTL, maxsize=settings.CLICKS_DEDUP_SIZE
+        )
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items) + len(self._requests)
+
+    def add_item_click(self, item_id: int, user_id: int) -> None:
+        self._add(self._items, "item", item_id, user_id)
+
+    def add_request_click(self, request_id: int, user_id: int) -> None:
+        self._add(self._requests, "request", request_id, user_id)
+
+    def _add(self, pending: set, kind: str, target_id: int, user_id: int) -> None:
+        key = (kind, target_id, user_id)
+        if self._seen.get(key):
+            return
+        self._seen.set(key, True)
+        pending.add((target_id, user_id))
+        clicks_buffer_depth.set(len(self))
+        if len(self) >= settings.CLICKS_FLUSH_SIZE:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=settings.CLICKS_FLUSH_INTERVAL
+                )
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            items, self._items = self._items, set()
+            requests, self._requests = self._requests, set()
+            if not items and not requests:
+                return
+            try:
+                async with async_session() as session:
+                    repository = ClicksRepository(session)
+                    if items:
+                        await repository.add_item_clicks(list(items))
+                    if requests:
+                        await repository.add_request_clicks(list(requests))
+                    await session.commit()
+            except Exception as e:
+                clicks_flush_errors_total.inc()
+                self.logger.error(f"Не удалось записать просмотры: {e}")
+                # Возвращаем пачку в буфер до следующей попытки,
+                # сверх лимита просмотры отбрасываются
+                if len(self) + len(items) + len(requests) <= settings.CLICKS_BUFFER_LIMIT:
+                    self._items |= items
+                    self._requests |= requests
+            else:
+                clicks_flushed_total.inc(len(items) + len(requests))
+            finally:
+                clicks_buffer_depth.set(len(self))
+
+
+click_buffer = ClickBuffer()
@@ -1,54 +1,200 @@
 import asyncio
 import logging
+from contextlib import AsyncExitStack
+from typing import AsyncIterator
 
+from aiobotocore.config import AioConfig
 from aiobotocore.session import get_session
 import botocore.exceptions as exc
+from fastapi import UploadFile
 
+from app.services.exceptions import FileTooLargeException, UnsupportedFileTypeException, FileUploadException
 from app.settings import settings
+from app.utils.images import detect_image_type
 
 
 class CloudService:
+    """
+    Клиент S3, общий для всего процесса.
+
+    Клиент открывается один раз в lifespan (start) и закрывается при остановке
+    (close). Пул HTTP-подключений ограничен S3_MAX_POOL_CONNECTIONS, количество
+    одновременных загрузок - S3_UPLOAD_CONCURRENCY. Файлы больше
+    S3_MULTIPART_THRESHOLD загружаются по частям, части отправляются параллельно.
+    """
 
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.bucket = settings.S3_BUCKET
-        self.ctx = None
-        self.queue = asyncio.Queue()
-
-    async def session(self):
-        session = get_session()
-        client = session.create_client(
-            "s3", region_name=settings.S3_REGION_NAME,
-            endpoint_url=settings.S3_URL,
-            aws_access_key_id=settings.S3_KEY_ID,
-            aws_secret_access_key=settings.S3_ACCESS_KEY,
+        self.client = None
+        self._stack: AsyncExitStack | None = None
+        self._uploads = asyncio.Semaphore(settings.S3_UPLOAD_CONCURRENCY)
+
+    async def start(self):
+        if self.client is not None:
+            return
+        self._stack = AsyncExitStack()
+        self.client = await self._stack.enter_async_context(
+            get_session().create_client(
+                "s3", region_name=settings.S3_REGION_NAME,
+                endpoint_url=settings.S3_URL,
+                aws_access_key_id=settings.S3_KEY_ID,
+                aws_secret_access_key=settings.S3_ACCESS_KEY,
+                config=AioConfig(
+                    max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS
+                ),
+            )
         )
-        self.ctx = await client.__aenter__()
+
+    async def close(self):
+        if self._stack is not None:
+            await self._stack.aclose()
+        self._stack = None
+        self.client = None
 
     @staticmethod
     def get_link(key):
         return f"{settings.S3_PUBLIC_URL}/{key}"
 
-    async def save_file(self, binary_file: bytes, key: str):
+    async def save_file(self, binary_file: bytes, key: str, content_type: str | None = None):
+        extra = {"ContentType": content_type} if content_type else {}
+        try:
+            async with self._uploads:
+                if len(binary_file) <= settings.S3_MULTIPART_THRESHOLD:
+                    await self.client.put_object(
+                        Body=binary_file,
+                        Bucket=self.bucket,
+                        Key=key,
+                        **extra
+                    )
+                    return
+                await self._multipart_upload(
+                    self._iter_bytes(binary_file), key, extra
+                )
+        except (exc.BotoCoreError, exc.ClientError) as e:
+            self.logger.error(e)
+            raise FileUploadException(key)
+
+    async def save_upload(self, file: UploadFile, key: str) -> int:
+        """
+        Потоковая загрузка изображения из UploadFile без чтения файла целиком.
+
+        Формат проверяется по первым байтам, размер - по мере чтения
+        (не больше UPLOAD_MAX_SIZE). В памяти одновременно находится не более
+        S3_PART_CONCURRENCY + 1 частей. Возвращает размер загруженного файла.
+
+        Вызывает UnsupportedFileTypeException, FileTooLargeException
+        и FileUploadException.
+        """
+        chunk_size = settings.S3_MULTIPART_CHUNK_SIZE
+        first = await file.read(chunk_size)
+        content_type = detect_image_type(first)
+        if content_type is None:
+            raise UnsupportedFileTypeException()
+        extra = {"ContentType": content_type}
+        uploaded = 0
+
+        async def chunks():
+            nonlocal uploaded
+            chunk = first
+            while chunk:
+                uploaded += len(chunk)
+                if uploaded > settings.UPLOAD_MAX_SIZE:
+                    raise FileTooLargeException(settings.UPLOAD_MAX_SIZE)
+                yield chunk
+                chunk = await file.read(chunk_size)
+
+        try:
+            async with self._uploads:
+                if len(first) < chunk_size:
+                    if len(first) > settings.UPLOAD_MAX_SIZE:
+                        raise FileTooLargeException(settings.UPLOAD_MAX_SIZE)
+                    await self.client.put_object(
+                        Body=first, Bucket=self.bucket, Key=key, **extra
+                    )
+                    uploaded = len(first)
+                else:
+                    await self._multipart_upload(chunks(), key, extra)
+        except (exc.BotoCoreError, exc.ClientError) as e:
+            self.logger.error(f"Загрузка {key} прервана на {uploaded} байт: {e}")
+            raise FileUploadException(key)
+        self.logger.info(f"Файл {key} загружен, {uploaded} байт")
+        return uploaded
+
+    @staticmethod
+    async def _iter_bytes(binary_file: bytes) -> AsyncIterator[bytes]:
+        chunk_size = settings.S3_MULTIPART_CHUNK_SIZE
+        view = memoryview(binary_file)
+        for offset in range(0, len(binary_file), chunk_size):
+            yield bytes(view[offset:offset + chunk_size])
+
+    async def _multipart_upload(self, chunks: AsyncIterator[bytes], key: str, extra: dict):
+        upload = await self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=key, **extra
+        )
+        upload_id = upload["UploadId"]
+        parts_limit = asyncio.Semaphore(settings.S3_PART_CONCURRENCY)
+        tasks: list[asyncio.Task] = []
+
+        async def upload_part(number: int, body: bytes):
+            try:
+                part = await self.client.upload_part(
+                    Bucket=self.bucket, Key=key,
+                    UploadId=upload_id, PartNumber=number, Body=body,
+                )
+                self.logger.debug(f"{key}: часть {number} загружена ({len(body)} байт)")
+                return {"PartNumber": number, "ETag": part["ETag"]}
+            finally:
+                parts_limit.release()
+
         try:
-            await self.ctx.put_object(
-                Body=binary_file,
-                Bucket=self.bucket,
-                Key=key,
+            number = 0
+            while True:
+                # Следующая часть читается только при свободном слоте,
+                # поэтому объем буферизованных данных ограничен
+                await parts_limit.acquire()
+                try:
+                    body = await anext(chunks)
+                except StopAsyncIteration:
+                    parts_limit.release()
+                    break
+                number += 1
+                tasks.append(asyncio.create_task(upload_part(number, body)))
+            parts = await asyncio.gather(*tasks)
+            await self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id,
+                MultipartUpload={"Parts": list(parts)},
             )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id
+            )
+            raise
+
+    async def exists(self, key: str) -> bool:
+        """Проверка наличия объекта; при ошибке S3 считается, что его нет"""
+        try:
+            await self.client.head_object(Bucket=self.bucket, Key=key)
+        except exc.ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                self.logger.error(e)
+            return False
         except exc.BotoCoreError as e:
             self.logger.error(e)
-            raise Exception(f"Ошибка загрузки файла с ключом {key}")
-        finally:
-            await self.ctx.__aexit__(None, None, None)
+            return False
+        return True
 
     async def delete_file(self, key: str):
         try:
-            await self.ctx.delete_object(
+            await self.client.delete_object(
                 Bucket=self.bucket, Key=key
             )
-        except exc.BotoCoreError as e:
+        except (exc.BotoCoreError, exc.ClientError) as e:
             self.logger.error(e)
             raise Exception(f"Ошибка удаления файла с ключом {key}")
-        finally:
-            await self.ctx.__aexit__(None, None, None)
+
+
+cloud_service = CloudService()
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable
+
+from redis.exceptions import RedisError
+
+from app.api.common.responses import Category, GetCategoryTree
+from app.models.common import CategoryDTO
+from app.repository.redis.client import redis_client
+
+logger = logging.getLogger("CategoryIndex")
+
+_VERSION_KEY = "categories:version"
+
+
+class CategoryIndex:
+    """
+    Снимок дерева категорий одного типа.
+
+    Строится за один проход по списку: смежность parent -> children,
+    глубина (корень = 1) и путь предков для каждой категории.
+    """
+
+    def __init__(self, categories: list[CategoryDTO]):
+        self.by_id: dict[int, CategoryDTO] = {c.id: c for c in categories}
+        self.children: dict[int | None, list[int]] = defaultdict(list)
+        for category in categories:
+            self.children[category.depend_on].append(category.id)
+        self.ancestors: dict[int, tuple[int, ...]] = {}
+        for category_id in self.by_id:
+            self._resolve(category_id)
+        self._trees: dict[bool, bytes] = {}
+
+    def _resolve(self, category_id: int) -> None:
+        """Путь предков от корня; неизвестный родитель считается корнем"""
+        chain = []
+        current = category_id
+        while current in self.by_id and current not in self.ancestors and current not in chain:
+            chain.append(current)
+            current = self.by_id[current].depend_on
+        path = self.ancestors[current] + (current,) if current in self.ancestors else ()
+        for node in reversed(chain):
+            self.ancestors[node] = path
+            path = path + (node,)
+
+    def depth(self, category_id: int | None) -> int:
+        if category_id not in self.by_id:
+            return 1
+        return len(self.ancestors[category_id]) + 1
+
+    def descendants(self, category_id: int) -> list[int]:
+        """Категория и все вложенные в нее"""
+        result = [category_id]
+        seen = {category_id}
+        for node in result:
+            for child in self.children.get(node, ()):
+                if child not in seen:
+                    seen.add(child)
+                    result.append(child)
+        return result
+
+    def tree(self, on_moderating: bool = False, parent_id: int | None = None) -> list[Category]:
+        return [
+            Category(
+                id=category.id,
+                name=category.value,
+                children=self.tree(on_moderating, category.id),
+                parent_id=parent_id,
+                on_moderating=category.on_moderating,
+                disabled=category.disabled
+            )
+            for category in (self.by_id[i] for i in self.children.get(parent_id, ()))
+            if category.on_moderating == on_moderating
+        ]
+
+    def tree_json(self, on_moderating: bool = False) -> bytes:
+        """Сериализованный ответ /common/category/tree, собирается один раз"""
+        if on_moderating not in self._trees:
+            self._trees[on_moderating] = GetCategoryTree(
+                result=self.tree(on_moderating)
+            ).model_dump_json().encode()
+        return self._trees[on_moderating]
+
+
+class CategoryIndexRegistry:
+    """
+    Индексы категорий по типам, общие для процесса.
+
+    Индекс перестраивается только после изменения категорий. Номер версии
+    хранится в Redis, чтобы изменение в одном процессе сбрасывало индексы
+    во всех; без Redis используется локальный счетчик.
+    """
+
+    def __init__(self):
+        self._indexes: dict[str, tuple[int, CategoryIndex]] = {}
+        self._local_version = 0
+        self._lock = asyncio.Lock()
+
+    async def _version(self) -> int:
+        try:
+            version = await redis_client().get(_VERSION_KEY)
+        except (RedisError, RuntimeError) as e:
+            logger.warning(f"Версия категорий недоступна: {e}")
+            return self._local_version
+        return self._local_version + int(version or 0)
+
+    async def get(
+            self, category_type: str,
+            loader: Callable[[str], Awaitable[list[CategoryDTO]]]
+    ) -> CategoryIndex:
+        version = await self._version()
+        cached = self._indexes.get(category_type)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        async with self._lock:
+            cached = self._indexes.get(category_type)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            index = CategoryIndex(await loader(category_type))
+            self._indexes[category_type] = (version, index)
+            return index
+
+    async def invalidate(self) -> None:
+        self._local_version += 1
+        self._indexes.clear()
+        try:
+            await redis_client().incr(_VERSION_KEY)
+        except (RedisError, RuntimeError) as e:
+            logger.warning(f"Не удалось обновить версию категорий: {e}")
+
+
+category_indexes = CategoryIndexRegistry()
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Awaitable, Callable
+
+from redis.exceptions import RedisError
+
+from app.models.common import CitiesDTO
+from app.repository.redis.client import redis_client
+from app.settings import settings
+from app.utils.search import normalize_text
+
+logger = logging.getLogger("CityIndex")
+
+_VERSION_KEY = "cities:version"
+
+
+class CityIndex:
+    """
+    Поиск активных городов по началу названия.
+
+    Названия приводятся к нижнему регистру с заменой ё на е и хранятся
+    в отсортированном массиве, поэтому префикс ищется двумя bisect.
+    Совпадения упорядочиваются: точное совпадение, затем порядок
+    справочника (id), в котором города загружаются по убыванию значимости.
+    """
+
+    def __init__(self, cities: list[CitiesDTO]):
+        ranked = sorted(cities, key=lambda c: c.id)
+        self._all = ranked
+        self._entries = sorted(
+            (normalize_text(city.name), rank, city)
+            for rank, city in enumerate(ranked)
+        )
+        self._keys = [entry[0] for entry in self._entries]
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def search(
+            self, q: str | None = None,
+            offset: int | None = None, limit: int | None = None
+    ) -> list[CitiesDTO]:
+        if q is None or not q.strip():
+            result = self._all
+        else:
+            prefix = normalize_text(" ".join(q.split()))
+            lo = bisect_left(self._keys, prefix)
+            hi = bisect_left(self._keys, prefix + "\uffff", lo)
+            result = [
+                city
+                for _, _, city in sorted(
+                    self._entries[lo:hi],
+                    key=lambda entry: (entry[0] != prefix, entry[1])
+                )
+            ]
+        start = offset or 0
+        end = start + limit if limit is not None else None
+        return result[start:end]
+
+
+class CityIndexHolder:
+    """
+    Индекс городов процесса. Загружается при старте приложения и
+    перестраивается после включения/отключения региона. Версия хранится
+    в Redis и проверяется не чаще раза в CITY_INDEX_VERSION_CHECK секунд.
+    """
+
+    def __init__(self):
+        self._index: CityIndex | None = None
+        self._version: int | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _remote_version(self) -> int | None:
+        try:
+            return int(await redis_client().get(_VERSION_KEY) or 0)
+        except (RedisError, RuntimeError) as e:
+            logger.warning(f"Версия справочника городов недоступна: {e}")
+            return None
+
+    async def load(self, loader: Callable[[], Awaitable[list[CitiesDTO]]]) -> CityIndex:
+        async with self._lock:
+            version = await self._remote_version()
+            self._index = CityIndex(await loader())
+            self._version = version
+            self._checked_at = time.monotonic()
+            logger.info(f"Индекс городов загружен: {len(self._index)}")
+            return self._index
+
+    async def get(self, loader: Callable[[], Awaitable[list[CitiesDTO]]]) -> CityIndex:
+        if self._index is None:
+            return await self.load(loader)
+        now = time.monotonic()
+        if now - self._checked_at >= settings.CITY_INDEX_VERSION_CHECK:
+            self._checked_at = now
+            version = await self._remote_version()
+            if version is not None and version != self._version:
+                return await self.load(loader)
+        return self._index
+
+    async def invalidate(self) -> None:
+        self._index = None
+        try:
+            await redis_client().incr(_VERSION_KEY)
+        except (RedisError, RuntimeError) as e:
+            logger.warning(f"Не удалось обновить версию справочника городов: {e}")
+
+
+city_index = CityIndexHolder()
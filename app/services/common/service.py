@@ -1,9 +1,9 @@
-import copy
-
 from app.api.common.requests import CreateCategory, TechnicalRequest
-from app.api.common.responses import Category, FAQSResponse
+from app.api.common.responses import FAQSResponse
 from app.models.common import CitiesDTO
 from app.repository.common.repository import CommonRepository
+from app.services.common.category_index import CategoryIndex, category_indexes
+from app.services.common.city_index import city_index
 from app.services.common.exceptions import CityNotFoundException, CityNotActiveException, ExceedingMaxDepth, \
     CategoryNotFoundException
 from app.services.service import BaseService
@@ -21,7 +21,8 @@ class CommonService(BaseService):
             self, query: str | None = None,
             offset: int | None = None, limit: int | None = None
     ) -> list[CitiesDTO]:
-        return await self._repository.get_all_cities(query, offset, limit)
+        index = await city_index.get(self._repository.get_active_cities)
+        return index.search(query, offset, limit)
 
     async def check_city(self, city_id: int) -> bool:
         result = await self._repository.check_city_active(city_id)
@@ -31,47 +32,26 @@ class CommonService(BaseService):
             raise CityNotActiveException(result.name)
         return True
 
+    async def category_index(self, category_type: ItemType) -> CategoryIndex:
+        return await category_indexes.get(
+            category_type.value, self._repository.get_category_tree
+        )
+
     async def get_category_tree(
             self, category_type: ItemType,
             on_moderating: bool = False
-    ):
-        categories = await self._repository.get_category_tree(
-            category_type.value
-        )
-
-        def build_tree(parent_id=None):
-            children = [
-                Category(
-                    id=category.id,
-                    name=category.value,
-                    children=build_tree(category.id) if category.id else [],
-                    parent_id=parent_id,
-                    on_moderating=category.on_moderating,
-                    disabled=category.disabled
-                )
-                for category in categories
-                if category.depend_on == parent_id and category.on_moderating == on_moderating
-            ]
-            return children
-
-        result = build_tree()
-        return result
+    ) -> bytes:
+        index = await self.category_index(category_type)
+        return index.tree_json(on_moderating)
 
     async def create_new_category(self, body: CreateCategory):
-
-        categories = await self._repository.get_category_tree(body.type.value)
-
-        def get_depth(category_id, depth=1):
-            parent_category = next((cat for cat in categories if cat.id == category_id), None)
-            if parent_category and parent_category.depend_on:
-                return get_depth(parent_category.depend_on, depth + 1)
-            return depth
-
-        parent_depth = get_depth(body.depend_on)
+        index = await self.category_index(body.type)
+        parent_depth = index.depth(body.depend_on)
         if parent_depth >= 5:
             raise ExceedingMaxDepth()
 
         new_category = await self._repository.add_category(body)
+        await category_indexes.invalidate()
         return {
             "id": new_category,
             "status": "moderating"
@@ -102,8 +82,3 @@ class CommonService(BaseService):
 
     async def create_tech_support(self, body: TechnicalRequest):
         await self._repository.register_tech_request(body)
-
-    async def get_categories_what_depend_on(self, category_ids: list[int]):
-        return await self._repository.get_category_depends(category_ids)
-
-
@@ -0,0 +1,19 @@
+class FileTooLargeException(Exception):
+    def __init__(self, max_size: int):
+        super().__init__(
+            f"Размер файла превышает {max_size // (1024 * 1024)} МБ"
+        )
+
+
+class UnsupportedFileTypeException(Exception):
+    def __init__(self):
+        super().__init__(
+            "Допускаются только изображения PNG, JPEG или WEBP"
+        )
+
+
+class FileUploadException(Exception):
+    def __init__(self, key: str):
+        super().__init__(
+            f"Ошибка загрузки файла с ключом {key}"
+        )
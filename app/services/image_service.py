@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import UploadFile
+
+from app.services.cloud_service import CloudService
+from app.services.exceptions import UnsupportedFileTypeException
+from app.settings import settings
+from app.utils.images import VARIANTS, make_variants, variant_key
+
+
+class ImageService:
+    """
+    Построение производных изображений (thumb, card, full в WebP).
+
+    Декодирование и сжатие выполняются в ProcessPoolExecutor из IMAGE_WORKERS
+    процессов, который создается в lifespan. Процессы запускаются через spawn:
+    к этому моменту уже работают потоки Motor, и fork скопировал бы их
+    блокировки. Количество изображений, ожидающих обработки в памяти,
+    ограничено IMAGE_MAX_PENDING.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.executor: ProcessPoolExecutor | None = None
+        self._pending = asyncio.Semaphore(settings.IMAGE_MAX_PENDING)
+
+    def start(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        self.executor = None
+
+    async def upload_variants(
+            self, file: UploadFile, key: str, cloud: CloudService
+    ) -> dict[str, str]:
+        """
+        Построение и загрузка производных изображений уже загруженного файла.
+        Возвращает ссылки по названию варианта.
+
+        Если файл не удалось обработать или загрузить хотя бы один вариант,
+        оригинал и загруженные варианты удаляются, исключение пробрасывается.
+
+        Файл читается в память целиком: воркеру пула он передается байтами.
+        Поэтому память ограничена только IMAGE_MAX_PENDING: одновременно
+        читается не больше IMAGE_MAX_PENDING файлов по UPLOAD_MAX_SIZE.
+        """
+        try:
+            async with self._pending:
+                await file.seek(0)
+                data = await file.read()
+                loop = asyncio.get_running_loop()
+                try:
+                    variants = await loop.run_in_executor(
+                        self.executor, make_variants, data
+                    )
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"Не удалось обработать {key}: {e}")
+                    raise UnsupportedFileTypeException()
+                del data
+            results = await asyncio.gather(*[
+                cloud.save_file(body, variant_key(key, name), "image/webp")
+                for name, body in variants.items()
+            ], return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        except BaseException:
+            await self._discard(key, cloud)
+            raise
+        return {
+            name: cloud.get_link(variant_key(key, name))
+            for name in variants
+        }
+
+    async def _discard(self, key: str, cloud: CloudService):
+        keys = [key, *(variant_key(key, name) for name in VARIANTS)]
+        results = await asyncio.gather(*[
+            cloud.delete_file(name) for name in keys
+        ], return_exceptions=True)
+        for name, result in zip(keys, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Не удалось удалить {name}: {result}")
+
+
+image_service = ImageService()
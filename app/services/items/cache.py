@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+
+from redis.exceptions import RedisError
+
+from app.api.v1.items.requests import GetCards
+from app.repository.redis.client import redis_client
+from app.settings import settings
+from app.utils.metrics import Counter, Gauge
+
+logger = logging.getLogger("CatalogCache")
+
+catalog_page_hits = Counter(
+    "catalog_page_cache_hits_total", "Страницы каталога, отданные из кэша"
+)
+catalog_page_misses = Counter(
+    "catalog_page_cache_misses_total", "Страницы каталога, собранные из БД"
+)
+catalog_page_hit_ratio = Gauge(
+    "catalog_page_cache_hit_ratio", "Доля попаданий в кэш страниц каталога"
+)
+
+_PAGE_PREFIX = "catalog:page:"
+_COUNT_PREFIX = "catalog:count:"
+_TAG_PREFIX = "catalog:tag:"
+ANY = "any"
+
+
+def catalog_filter_key(body: GetCards) -> tuple:
+    """
+    Нормализованный ключ фильтра каталога.
+    Курсор не влияет на количество записей, поэтому в ключ не входит.
+    """
+    data = body.model_dump(mode="json", exclude={"cursor"})
+    if data.get("q") is not None:
+        data["q"] = " ".join(data["q"].lower().split())
+    return tuple(sorted(data.items()))
+
+
+def is_page_cacheable(body: GetCards, page: int) -> bool:
+    """В кэш попадают только первые страницы без курсора"""
+    return body.cursor is None and page <= settings.CATALOG_PAGE_CACHE_PAGES
+
+
+def catalog_page_key(body: GetCards, page: int, page_limit: int, has_more: bool) -> str:
+    raw = json.dumps(
+        [catalog_filter_key(body), page, page_limit, has_more],
+        ensure_ascii=False,
+    )
+    return _PAGE_PREFIX + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def catalog_count_key(body: GetCards) -> str:
+    raw = json.dumps(catalog_filter_key(body), ensure_ascii=False)
+    return _COUNT_PREFIX + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _tag(kind: str, value) -> str:
+    return f"{_TAG_PREFIX}{kind}:{ANY if value is None else value}"
+
+
+def _record(hit: bool) -> None:
+    (catalog_page_hits if hit else catalog_page_misses).inc()
+    total = catalog_page_hits.value + catalog_page_misses.value
+    catalog_page_hit_ratio.set(round(catalog_page_hits.value / total, 4))
+
+
+async def get_catalog_page(key: str) -> bytes | None:
+    try:
+        page = await redis_client().get(key)
+    except RedisError as e:
+        logger.warning(f"Кэш каталога недоступен: {e}")
+        page = None
+    _record(page is not None)
+    return page
+
+
+async def _set_tagged(key: str, body: GetCards, value: bytes | int, ttl: int) -> None:
+    """
+    Сохранение значения с пометкой тегами города и категории фильтра.
+    Фильтр без города/категории помечается тегом any. Теги общие для
+    страниц и количеств, поэтому живут дольше самого долгого из них.
+    """
+    tag_ttl = 2 * max(settings.CATALOG_PAGE_CACHE_TTL, settings.CATALOG_COUNT_TTL)
+    try:
+        async with redis_client().pipeline(transaction=False) as pipe:
+            pipe.set(key, value, ex=ttl)
+            for tag in (_tag("city", body.city_id), _tag("category", body.category_id)):
+                pipe.sadd(tag, key)
+                pipe.expire(tag, tag_ttl)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Кэш каталога недоступен: {e}")
+
+
+async def set_catalog_page(key: str, body: GetCards, page: bytes) -> None:
+    await _set_tagged(key, body, page, settings.CATALOG_PAGE_CACHE_TTL)
+
+
+async def get_catalog_count(body: GetCards) -> int | None:
+    """Закэшированное количество товаров по фильтру, общее для всех процессов"""
+    try:
+        total = await redis_client().get(catalog_count_key(body))
+    except RedisError as e:
+        logger.warning(f"Кэш каталога недоступен: {e}")
+        return None
+    return int(total) if total is not None else None
+
+
+async def set_catalog_count(body: GetCards, total: int) -> None:
+    await _set_tagged(catalog_count_key(body), body, total, settings.CATALOG_COUNT_TTL)
+
+
+async def invalidate_catalog_pages(*tags: tuple[int | None, list[int]]) -> None:
+    """
+    Сброс страниц и количеств, в которые мог попасть товар с указанными
+    (city_id, [категория товара и ее предки]).
+    Запись сбрасывается, если ее город совпадает с городом товара,
+    а категория - с одной из категорий пути, либо они не заданы в фильтре.
+    """
+    if not tags:
+        return
+    try:
+        redis = redis_client()
+        keys = set()
+        for city_id, categories in tags:
+            by_city = await redis.sunion(
+                _tag("city", city_id), _tag("city", None)
+            )
+            by_category = await redis.sunion(
+                _tag("category", None),
+                *(_tag("category", category_id) for category_id in categories)
+            )
+            keys |= by_city & by_category
+        if keys:
+            await redis.delete(*keys)
+    except RedisError as e:
+        logger.warning(f"Не удалось сбросить кэш каталога: {e}")
@@ -38,4 +38,10 @@ class PhotoNotFoundException(Exception):
 class ItemException(BaseException):
     def __init__(self, message: str):
         super().__init__(message)
-        
\ No newline at end of file
+        
+
+class InvalidCursorException(Exception):
+    def __init__(self):
+        super().__init__(
+            "Некорректный курсор страницы"
+        )
@@ -1,18 +1,24 @@
 import asyncio
-from typing import Callable
 
 import sqlalchemy
+from fastapi import UploadFile
 
 from app.api.v1.items.requests import CreateItem, UpdateItem, Location, GetCards, PostItemReview
 from app.api.v1.items.responses import Meta, ItemShortResponse, PriceResponse, LocationResponse, ItemPhotosResponse, \
     GetItemsResponse
-from app.models.items import ItemCreateDTO, ItemPriceDTO, ItemProductionDTO, ItemUpdateInfoDTO
+from app.models.items import ItemCreateDTO, ItemPriceDTO, ItemProductionDTO, ItemUpdateInfoDTO, ItemShortDTO
 from app.repository.items.repository import ItemsRepository
+from app.services.items.cache import get_catalog_count, set_catalog_count, invalidate_catalog_pages, \
+    is_page_cacheable, catalog_page_key, get_catalog_page, set_catalog_page
+from app.services.cloud_service import CloudService
 from app.services.common.service import CommonService
+from app.services.image_service import ImageService
 from app.services.items.exceptions import MinPriceOverMaxPriceException, CategoryOnModeratingException, \
-    CategoryDisabledException, ItemNotFoundException, PhotoNotFoundException, ItemException
+    CategoryDisabledException, ItemNotFoundException, PhotoNotFoundException, ItemException, InvalidCursorException
 from app.services.service import BaseService
 from app.settings import settings
+from app.utils.images import VARIANTS, variant_key
+from app.utils.pagination import encode_cursor, decode_cursor
 
 
 class ItemsService(BaseService):
@@ -99,6 +105,12 @@ class ItemsService(BaseService):
         try:
             await asyncio.gather(*coroutines)
             await self.commit()
+            await invalidate_catalog_pages(
+                (
+                    data.location.city_id,
+                    await self._repository.get_category_ancestors(data.category_id)
+                )
+            )
             return {
                 "id": item_id,
                 "status": status,
@@ -116,6 +128,16 @@ class ItemsService(BaseService):
             raise ItemNotFoundException(item_id)
         if owner_id != user_id:
             raise ItemException("Товар/услуга вам не принадлежит")
+        current = await self._repository.get_item_tags(item_id)
+        if current is None:
+            raise ItemNotFoundException(item_id)
+        city_id, categories = current
+        tags = [current]
+        if data.location is not None and data.location.city_id is not None:
+            city_id = data.location.city_id
+        if data.category_id is not None:
+            categories = await self._repository.get_category_ancestors(data.category_id)
+        tags.append((city_id, categories))
         tasks = []
         if data.info is not None:
             tasks.append(
@@ -156,6 +178,7 @@ class ItemsService(BaseService):
             )
 
         await asyncio.gather(*tasks)
+        await invalidate_catalog_pages(*tags)
 
     async def delete_item(self, user_id: int, item_id: int):
         author_id = await self._repository.get_item_creator(
@@ -164,12 +187,16 @@ class ItemsService(BaseService):
         if author_id is None:
             raise ItemNotFoundException(item_id)
         assert author_id == user_id
+        tags = await self._repository.get_item_tags(item_id)
         await self._repository.delete_item(item_id)
+        if tags is not None:
+            await invalidate_catalog_pages(tags)
 
     async def add_photo(
             self, user_id: int,
             item_id: int, index: int,
-            linker: Callable[[str], str]
+            file: UploadFile, cloud: CloudService,
+            images: ImageService
     ):
         author_id = await self._repository.get_item_creator(
             item_id
@@ -185,9 +212,11 @@ class ItemsService(BaseService):
             return None
 
         key = f"{item_id}-{index}.png"
-        link = linker(key)
+        await cloud.save_upload(file, key)
+        variants = await images.upload_variants(file, key, cloud)
+        link = cloud.get_link(key)
         await self._repository.add_photo(
-            link, index, item_id
+            link, index, item_id, variants
         )
         return link
 
@@ -203,9 +232,10 @@ class ItemsService(BaseService):
         assert author_id == user_id
 
         await self._repository.delete_photo(photo_id)
-        return link.replace(
+        key = link.replace(
             f"{settings.S3_PUBLIC_URL}/", ""
         )
+        return [key, *(variant_key(key, variant) for variant in VARIANTS)]
 
     async def get_my_items(
             self, user_id: int, page: int,
@@ -224,43 +254,50 @@ class ItemsService(BaseService):
             result, total
         )
 
-        meta = Meta(
-            page=page,
-            total_items=total,
-            total_pages=(total + page_limit - 1) // page_limit,
-            items_per_page=page_limit,
-        )
-        if result is not None:
-            result = [
-                ItemShortResponse(
-                    id=item.id,
-                    title=item.title,
-                    type=item.type,
-                    status=item.status,
-                    price=PriceResponse(
-                        fix_price=item.fix_price,
-                        from_price=item.from_price,
-                        to_price=item.to_price,
-                        currency=item.currency
-                    ),
-                    location=LocationResponse(
-                        city=item.city,
-                        address=item.address
-                    ),
-                    photos=[
-                        ItemPhotosResponse.model_validate(photo, from_attributes=True)
-                        for photo in item.photos
-                    ] if item.photos else [],
-                    date_create=item.date_created,
-                    rating=item.rating,
-                    reviews_quantity=item.reviews_quantity,
+        return GetItemsResponse.model_construct(
+            items=[self.card_response(item) for item in result],
+            meta=Meta(
+                page=page,
+                total_items=total,
+                total_pages=(total + page_limit - 1) // page_limit,
+                items_per_page=page_limit,
+            )
+        ).model_dump_json().encode()
+
+    @staticmethod
+    def card_response(item: ItemShortDTO) -> ItemShortResponse:
+        """
+        Карточка товара для списков. DTO собраны из строк БД без валидации,
+        поэтому модели ответа тоже создаются через model_construct.
+        """
+        return ItemShortResponse.model_construct(
+            id=item.id,
+            title=item.title,
+            type=item.type,
+            status=item.status,
+            price=PriceResponse.model_construct(
+                fix_price=item.fix_price,
+                from_price=item.from_price,
+                to_price=item.to_price,
+                currency=item.currency
+            ),
+            location=LocationResponse.model_construct(
+                city=item.city,
+                address=item.address or ""
+            ) if item.city is not None else None,
+            photos=[
+                ItemPhotosResponse.model_construct(
+                    id=photo.id,
+                    link=photo.link,
+                    thumb=photo.thumb,
+                    index=photo.index
                 )
-                for item in result
-            ]
-        else:
-            result = []
-
-        return result, meta
+                for photo in item.photos
+            ],
+            date_create=item.date_created,
+            rating=item.rating,
+            reviews_quantity=item.reviews_quantity,
+        )
 
     async def get_item_by_id(self, item_id: int, user_id: int = None):
         if user_id is not None:
@@ -278,18 +315,6 @@ class ItemsService(BaseService):
             raise ItemNotFoundException(item_id)
         return item
 
-    async def add_click(self, item_id: int, user_id: int):
-        author_id = await self._repository.get_item_creator(item_id)
-        if author_id is None:
-            return
-        elif author_id == user_id:
-            return
-        try:
-            await self._repository.add_click(item_id, user_id)
-            return True
-        except sqlalchemy.exc.IntegrityError:
-            return True
-
     async def check_seller_item(self, item_id: int):
         return await self._repository.get_item_creator(item_id)
 
@@ -313,7 +338,8 @@ class ItemsService(BaseService):
 
     async def get_filtered_items(
             self, body: GetCards, page: int, page_limit: int,
-            user_id: int, user_service: "UserService"
+            user_id: int, user_service: "UserService",
+            has_more: bool = False
     ):
         if body.city_id is None:
             user_city = await user_service.get_user_city_id(
@@ -321,52 +347,72 @@ class ItemsService(BaseService):
             )
             body.city_id = user_city
 
-        offset = (page - 1) * page_limit
-        total = self._repository.get_total_items_by_criteria(
-            body, offset, page_limit
-        )
-        items = self._repository.get_items_by_criteria(
-            body, offset, page_limit
-        )
+        cache_key = None
+        if is_page_cacheable(body, page):
+            cache_key = catalog_page_key(body, page, page_limit, has_more)
+            cached = await get_catalog_page(cache_key)
+            if cached is not None:
+                return cached
 
-        total, items = await asyncio.gather(
-            total, items
-        )
+        after = None
+        if body.cursor is not None:
+            try:
+                after = decode_cursor(body.cursor)
+            except ValueError:
+                raise InvalidCursorException()
 
-        return GetItemsResponse(
-            items=[
-                ItemShortResponse(
-                    id=item.id,
-                    title=item.title,
-                    type=item.type,
-                    status=item.status,
-                    price=PriceResponse(
-                        fix_price=item.fix_price,
-                        from_price=item.from_price,
-                        to_price=item.to_price,
-                        currency=item.currency
-                    ),
-                    location=LocationResponse(
-                        city=item.city,
-                        address=item.address
-                    ),
-                    photos=[
-                        ItemPhotosResponse.model_validate(photo, from_attributes=True)
-                        for photo in item.photos
-                    ] if item.photos else [],
-                    date_create=item.date_created,
-                    rating=item.rating,
-                    reviews_quantity=item.reviews_quantity,
+        offset = (page - 1) * page_limit
+        total = None
+        if has_more:
+            items = await self._repository.get_items_by_criteria(
+                body, offset, page_limit + 1, after
+            )
+            more = len(items) > page_limit
+            items = items[:page_limit]
+        else:
+            total, items = await asyncio.gather(
+                self.get_total_items(body, offset, page_limit),
+                self._repository.get_items_by_criteria(
+                    body, offset, page_limit, after
                 )
-                for item in items
-            ] if items else [],
+            )
+            more = None
+
+        # Выдача поиска без курсора упорядочена по релевантности,
+        # продолжать ее курсором по дате нельзя
+        ranked = body.q is not None and after is None
+        next_cursor = None
+        if not ranked and (more or (more is None and len(items) == page_limit)):
+            next_cursor = encode_cursor(
+                items[-1].created_at, items[-1].id
+            )
+
+        response = GetItemsResponse.model_construct(
+            items=[self.card_response(item) for item in items],
             meta=Meta(
                 page=page,
                 total_items=total,
-                total_pages=(total + page_limit - 1) // page_limit,
+                total_pages=(
+                    (total + page_limit - 1) // page_limit
+                    if total is not None else None
+                ),
                 items_per_page=page_limit,
+                next_cursor=next_cursor,
+                has_more=more,
             )
-        )
+        ).model_dump_json().encode()
+        if cache_key is not None:
+            await set_catalog_page(cache_key, body, response)
+        return response
+
+    async def get_total_items(self, body: GetCards, offset: int, page_limit: int) -> int:
+        total = await get_catalog_count(body)
+        if total is None:
+            total = await self._repository.get_total_items_by_criteria(
+                body, offset, page_limit
+            )
+            await set_catalog_count(body, total)
+        return total
 
     async def add_review(self, user_id: int, item_id: int, body: PostItemReview):
         owner_id = await self._repository.get_item_creator(item_id)
@@ -384,6 +430,7 @@ class ItemsService(BaseService):
             )
             return True
         except sqlalchemy.exc.IntegrityError:
+            await self.rollback()
             raise ItemException(
                 "Вы уже оставили отзыв о данном товаре/услуге"
             )
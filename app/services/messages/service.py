@@ -77,7 +77,8 @@ class MessagesService:
         for user in users:
             if user.id == user_id:
                 from_user = user
-            to_user = user
+            else:
+                to_user = user
             
         message_body = NewMessage(
             thread_id=thread_id,
@@ -172,7 +173,7 @@ class MessagesService:
         await self.__participants(
             thread_id, user_id, "Вы не являетесь участником данного диалога"
         )
-        result = await self.__mongo_repository.set_read(ids, user_id)
+        result = await self.__mongo_repository.set_read(thread_id, ids, user_id)
         return result
 
     async def unread_message_quantity(self, user_id: int):
@@ -181,31 +182,26 @@ class MessagesService:
         return result
 
     async def get_user_threads(
-            self, user_id: int, offset: int = None, limit: int = None
+            self, user_id: int, offset: int = 0, limit: int = 50
     ):
-        users_threads = await self.__postgres_repository.get_user_threads(user_id)
-        threads = await self.__mongo_repository.get_latest_messages_with_unread_count(
-            user_id, users_threads
+        threads, total = await asyncio.gather(
+            self.__mongo_repository.get_thread_summaries(user_id, offset, limit),
+            self.__mongo_repository.get_total_threads(user_id)
         )
-        threads = list(map(lambda x: {**x, "id": str(x["_id"])}, threads))
 
         result = []
         for thread in threads:
-            item = {
-                "thread_id": thread["thread_id"],
-                "unread_count": thread["unread_count"],
-            }
-            thread.pop("thread_id")
-            thread.pop("unread_count")
-            thread.pop("_id")
-            content = thread["content"]
-            thread["content"] = self.cifer.decrypt(
-                content.encode("utf-8")
+            last_message = dict(thread["last_message"])
+            last_message["content"] = self.cifer.decrypt(
+                last_message["content"].encode("utf-8")
             ).decode("utf-8")
-            item["last_message"] = thread
-            result.append(item)
+            result.append({
+                "thread_id": thread["_id"],
+                "unread_count": thread.get("unread", {}).get(str(user_id), 0),
+                "last_message": last_message,
+            })
 
-        return result
+        return result, total
 
     async def update_user_avatar(self, user_id: int, avatar_url: str ):
         await self.__mongo_repository.update_user_avatat(user_id, avatar_url)
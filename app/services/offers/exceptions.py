@@ -68,3 +68,10 @@ class UpdateOfferStatusException(Exception):
 class UpdateStatusException(Exception):
     def __init__(self, message):
         super().__init__(message)
+
+
+class InvalidCursorException(Exception):
+    def __init__(self):
+        super().__init__(
+            "Некорректный курсор страницы"
+        )
@@ -1,20 +1,22 @@
 import asyncio
 from typing import Any
 
-from babel.dates import format_date
-
 from app.api.v1.offers.requests import CreateOffer, UpdateOfferStatus, UpdateOfferDetails
 from app.api.v1.offers.responses import ShortOfferResponseModel, OfferStatus, Meta, UserShortResponse, \
     ItemShortResponse, PriceResponse, LocationResponse, ItemPhotosResponse, GetOfferResponse, OfferDetails
 from app.models.auth import TokenPayload
+from app.models.items import UpdateStatusDTO
 from app.models.offers import CreateOfferDTO
 from app.repository.offers.repository import OffersRepository
+from app.repository.query_stats import count_queries
 from app.services.items.service import ItemsService
 from app.services.offers.exceptions import WrongOfferReceiverException, WrongOfferSenderException, \
     ItemHasAnotherOwnerException, SelfOfferException, DeleteOfferException, OfferNotFoundException, \
-    OfferNotBelongYouException, WrongNewStatus, OfferAlreadyClosed, UpdateStatusException
+    OfferNotBelongYouException, WrongNewStatus, OfferAlreadyClosed, UpdateStatusException, InvalidCursorException
+from app.services.offers.transitions import TRANSITIONS, CLOSED_STATUSES, Transition
 from app.services.service import BaseService
 from app.services.users.service import UserService
+from app.utils.pagination import encode_cursor, decode_cursor
 from app.utils.types import OrdersStatus, STATUS_MAP
 
 
@@ -61,13 +63,18 @@ class OffersService(BaseService):
 
     async def get_offers(
             self, user_id: int, value: str,
-            page: int, limit: int
+            page: int, limit: int,
+            status: OrdersStatus | None = None, cursor: str | None = None
     ):
         key = "from_user_id" if value == "from_me" else "to_user_id"
         criteria = {
             key: user_id
         }
-        return await self.get_offers_by_criteria(criteria, page, limit)
+        if status is not None:
+            criteria["status"] = status.value
+        return await self.get_offers_by_criteria(
+            criteria, page, limit, cursor=cursor
+        )
 
     async def delete_offer(self, offer_id: int, user_id: int):
         offer_sender = await self._repository.get_offer_sender(offer_id)
@@ -126,63 +133,53 @@ class OffersService(BaseService):
         ).model_dump(exclude_none=True)
 
     async def update_offer_status(self, offer_id: int, user_id: int, value: UpdateOfferStatus):
+        # Проверка по прочитанному заказу дает понятную причину отказа,
+        # а от параллельной смены статуса защищает условный UPDATE:
+        # если он не изменил строку, заказ изменили после чтения
         offer = await self._repository.get_offer_to_update_status(offer_id)
-        return_val = None
-        error = ""
         if offer is None:
             raise OfferNotFoundException(offer_id)
-        if user_id not in [offer.from_user_id, offer.to_user_id]:
-            raise OfferNotBelongYouException(offer_id)
-
-        status_map: dict[str, int] = {
-            f"{status.value}": index
-            for index, status in enumerate(OrdersStatus)
-        }
+        transition = TRANSITIONS[value.status]
+        self._check_status_change(offer_id, user_id, offer, value.status, transition)
 
-        if offer.status in ["COMPLETED", "REJECTED"]:
-            raise OfferAlreadyClosed(offer_id)
-
-        if value.status.value == "COMPLETED":
-            if offer.item_id:
-                if user_id != offer.from_user_id:
-                    error = "Завершить заказ может только его создатель"
-            elif offer.request_id:
-                if user_id != offer.to_user_id:
-                    error = "Завершить заказ может только получатель"
-        elif value.status.value in ["PROCESSING", "REJECTED", "APPROVED"]:
-            if offer.item_id:
-                if user_id != offer.to_user_id:
-                    error = "Изменить статус может только исполнитель"
-            elif offer.request_id:
-                if user_id != offer.from_user_id:
-                    error = "Изменить статус может только исполнитель"
-
-        if error != "":
-            raise UpdateStatusException(error)
-
-        if status_map[
-            value.status.value
-        ] < status_map[
-            offer.status
-        ]:
-            raise WrongNewStatus(
-                offer_id,
-                value.status.value,
-                offer.status
+        updated = await self._repository.update_status_if(
+            offer_id, user_id, value.status.value, value.comment,
+            [status.value for status in transition.allowed_from],
+            transition.item_actor, transition.request_actor
+        )
+        if not updated:
+            raise UpdateStatusException(
+                f"Статус заказа {offer_id} был изменен одновременно с вашим запросом, повторите попытку"
             )
 
-        update_data = {
-            "status": value.status.value,
-            "reject_comment": value.comment,
-        }
-        await self._repository.update(offer_id, update_data)
-
         if offer.request_id:
-            return_val = offer.to_user_id
+            return offer.to_user_id
         elif offer.item_id:
-            return_val = offer.from_user_id
+            return offer.from_user_id
+        return None
+
+    @staticmethod
+    def _check_status_change(
+            offer_id: int, user_id: int, offer: UpdateStatusDTO,
+            status: OrdersStatus, transition: Transition
+    ):
+        """Проверка, что пользователь может перевести заказ в статус status"""
+        if user_id not in [offer.from_user_id, offer.to_user_id]:
+            raise OfferNotBelongYouException(offer_id)
+
+        current = OrdersStatus(offer.status)
+        if current in CLOSED_STATUSES:
+            raise OfferAlreadyClosed(offer_id)
+
+        if offer.item_id and transition.item_actor is not None:
+            if user_id != getattr(offer, transition.item_actor):
+                raise UpdateStatusException(transition.item_error)
+        elif offer.request_id and transition.request_actor is not None:
+            if user_id != getattr(offer, transition.request_actor):
+                raise UpdateStatusException(transition.request_error)
 
-        return return_val
+        if current not in transition.allowed_from:
+            raise WrongNewStatus(offer_id, status.value, current.value)
 
     async def update_offer_details(self, offer_id: int, user_id: int, value: UpdateOfferDetails):
         owner_id = await self._repository.get_offer_sender(offer_id)
@@ -199,25 +196,37 @@ class OffersService(BaseService):
 
     async def get_offers_by_criteria(
             self, criteria: dict[str, Any],
-            page: int, limit: int, exclude: list = None
+            page: int, limit: int, exclude: list = None,
+            cursor: str | None = None
     ):
+        after = None
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError:
+                raise InvalidCursorException()
         offset = (page - 1) * limit
 
-        total = await self._repository.get_user_offers_quantity(
-            criteria
-        )
-
-        offers = await self._repository.get_offers_by_criteria(
-            criteria, offset, limit
+        with count_queries() as stats:
+            total = await self._repository.get_user_offers_quantity(
+                criteria
+            )
+            offers = await self._repository.get_offers_by_criteria(
+                criteria, offset, limit, after
+            )
+        self.logger.debug(
+            f"Страница заказов {criteria}: запросов {stats.statements}, строк {stats.rows}"
         )
-        del offset
         meta = Meta(
             page=page,
             total_items=total,
             total_pages=(total + limit - 1) // limit,
             items_per_page=limit,
+            next_cursor=encode_cursor(
+                offers[-1].created, offers[-1].id
+            ) if len(offers) == limit else None,
         )
-        if offers is not None:
+        if offers:
             result = [
                 ShortOfferResponseModel(
                     id=offer.id,
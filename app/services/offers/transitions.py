@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+
+from app.utils.types import OrdersStatus
+
+# Порядок статусов: вернуть заказ в более ранний статус нельзя
+STATUS_ORDER: dict[OrdersStatus, int] = {
+    status: index for index, status in enumerate(OrdersStatus)
+}
+CLOSED_STATUSES = frozenset({OrdersStatus.COMPLETED, OrdersStatus.REJECTED})
+
+FROM_USER = "from_user_id"
+TO_USER = "to_user_id"
+
+
+@dataclass(frozen=True)
+class Transition:
+    """
+    Правило перехода в статус
+
+    Атрибуты:
+        allowed_from(tuple) - Статусы, из которых возможен переход
+        item_actor(str | None) - Участник заказа на товар, который может сменить статус
+        request_actor(str | None) - Участник заказа по запросу, который может сменить статус
+        item_error(str) - Сообщение, если статус заказа на товар меняет другой участник
+        request_error(str) - То же для заказа по запросу
+    """
+    allowed_from: tuple[OrdersStatus, ...]
+    item_actor: str | None = None
+    request_actor: str | None = None
+    item_error: str = ""
+    request_error: str = ""
+
+
+def _allowed_from(status: OrdersStatus) -> tuple[OrdersStatus, ...]:
+    return tuple(
+        current for current in OrdersStatus
+        if current not in CLOSED_STATUSES and STATUS_ORDER[current] <= STATUS_ORDER[status]
+    )
+
+
+def _compile() -> dict[OrdersStatus, Transition]:
+    table = {}
+    for status in OrdersStatus:
+        if status == OrdersStatus.COMPLETED:
+            table[status] = Transition(
+                _allowed_from(status), FROM_USER, TO_USER,
+                "Завершить заказ может только его создатель",
+                "Завершить заказ может только получатель",
+            )
+        elif status in (OrdersStatus.PROCESSING, OrdersStatus.REJECTED, OrdersStatus.APPROVED):
+            table[status] = Transition(
+                _allowed_from(status), TO_USER, FROM_USER,
+                "Изменить статус может только исполнитель",
+                "Изменить статус может только исполнитель",
+            )
+        else:
+            table[status] = Transition(_allowed_from(status))
+    return table
+
+
+TRANSITIONS: dict[OrdersStatus, Transition] = _compile()
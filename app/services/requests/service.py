@@ -5,11 +5,14 @@ from app.api.v1.requests.requests import NewRequest
 from app.api.v1.requests.responses import Meta, RequestsResponse, RequestResponse
 from app.models.auth import TokenPayload
 from app.repository.requests.repository import RequestsRepository
+from app.services.cloud_service import CloudService
 from app.services.common.service import CommonService
 from app.services.offers.service import OffersService
 from app.services.requests.exceptions import CreateRequestException, RequestException, RequestNotFound
 from app.services.service import BaseService
 from app.services.users.service import UserService
+from app.settings import settings
+from app.utils.images import variant_key
 
 
 class RequestsService(BaseService):
@@ -19,7 +22,10 @@ class RequestsService(BaseService):
     def __init__(self, repository: RequestsRepository):
         super().__init__(repository)
 
-    async def add_request(self, user: TokenPayload, body: NewRequest, common_service: CommonService):
+    async def add_request(
+            self, user: TokenPayload, body: NewRequest,
+            common_service: CommonService, cloud: CloudService
+    ):
         if not user.full_filled:
             raise CreateRequestException(
                 "Для создания запроса, профиль должен быть заполнен"
@@ -35,9 +41,24 @@ class RequestsService(BaseService):
                 f"Категория({category.value}) находиться на модерации"
             )
 
-        request_id = await self._repository.add(user.id, body)
+        with_variants = await self._photos_with_variants(body.photos, cloud)
+        request_id = await self._repository.add(user.id, body, with_variants)
         return request_id
 
+    @staticmethod
+    async def _photos_with_variants(photos: list | None, cloud: CloudService) -> set[str]:
+        """
+        Фото из нашего хранилища, для которых /requests/photo/upload загрузил
+        производные. У файлов, загруженных до появления производных, их нет.
+        """
+        prefix = f"{settings.S3_PUBLIC_URL}/"
+        own = [str(photo) for photo in photos or [] if str(photo).startswith(prefix)]
+        exists = await asyncio.gather(*[
+            cloud.exists(variant_key(link.replace(prefix, "", 1), "full"))
+            for link in own
+        ])
+        return {link for link, found in zip(own, exists) if found}
+
     async def get_requests_for_seller(
             self, user: TokenPayload, common_service: CommonService,
             users_service: UserService, by_category: bool,
@@ -51,19 +72,24 @@ class RequestsService(BaseService):
         if by_category:
             sellers_categories = await users_service.get_my_categories(user.id)
             if sellers_categories:
-                categories = await common_service.get_categories_what_depend_on(
-                    sellers_categories
-                )
+                categories = sellers_categories
             else:
                 warning = "У вас не выбрана основная категория"
 
         offset = (page - 1) * page_limit
 
-        total = self._repository.total_requests(categories=categories)
-        request = self._repository.get_for_seller(
-            offset, page_limit,
-            categories=categories
-        )
+        if categories:
+            # Лента продавца заполняется при создании запросов
+            total = self._repository.total_feed(user.id)
+            request = self._repository.get_feed(
+                user.id, offset, page_limit
+            )
+        else:
+            total = self._repository.total_requests(categories=categories)
+            request = self._repository.get_for_seller(
+                offset, page_limit,
+                categories=categories
+            )
 
         total, request = await asyncio.gather(
             total, request
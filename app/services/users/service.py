@@ -5,6 +5,7 @@ import pprint
 import random
 import uuid
 
+from fastapi import UploadFile
 from redis import Redis
 from sqlalchemy.exc import IntegrityError
 
@@ -142,18 +143,15 @@ class UserService(BaseService):
         await self._repository.delete_contact(contact_id)
 
     async def update_avatar(
-            self, user_id: int, photo: bytes, cloud: CloudService
+            self, user_id: int, photo: UploadFile, cloud: CloudService
     ):
         user_exist = await self._repository.is_exist(user_id=user_id)
         if user_exist is None:
             raise UserNotFoundException()
         key = f"avatar-{user_id}.png"
-        link = cloud.get_link(f"avatar-{user_id}.png")
-        await cloud.session()
-        await asyncio.gather(*[
-            self._repository.save_avatar_link(user_id, link),
-            cloud.save_file(photo, key)
-        ])
+        link = cloud.get_link(key)
+        await cloud.save_upload(photo, key)
+        await self._repository.save_avatar_link(user_id, link)
         return link
 
     async def get_user_profile(self, user_id: int, types: list[str]):
@@ -216,6 +214,7 @@ class UserService(BaseService):
             await self._repository.create_review(from_user_id, to_user_id, body)
             return True
         except IntegrityError:
+            await self.rollback()
             raise ReviewException("Вы уже оставляли отзыв об этом продавце")
 
     async def delete_review(self, review_id: int, user_id: int):
@@ -0,0 +1,34 @@
+import datetime
+from functools import lru_cache
+
+from babel import Locale
+from babel.dates import parse_pattern
+
+from app.settings import settings
+
+DATE_LOCALE = "ru"
+DATE_PATTERN = "d MMMM y"
+
+_locale = Locale.parse(DATE_LOCALE)
+_pattern = parse_pattern(DATE_PATTERN)
+
+
+@lru_cache(maxsize=settings.DATES_CACHE_SIZE)
+def _format_day(day: datetime.date) -> str:
+    return _pattern.apply(day, _locale)
+
+
+def format_date(value: datetime.date | datetime.datetime | None) -> str:
+    """
+    Дата для ответа API: "5 марта 2024" либо, при DATES_ISO, "2024-03-05"
+    для форматирования на клиенте (язык передается в Content-Language).
+    Локаль и шаблон разбираются один раз, результат кэшируется по дню.
+    Пустое значение, как и в babel, означает текущую дату.
+    """
+    if value is None:
+        value = datetime.date.today()
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if settings.DATES_ISO:
+        return value.isoformat()
+    return _format_day(value)
@@ -0,0 +1,59 @@
+# Сигнатуры поддерживаемых форматов изображений
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+)
+
+
+def detect_image_type(head: bytes) -> str | None:
+    """
+    Определение MIME-типа изображения по первым байтам файла.
+    Возвращает None для неподдерживаемых форматов.
+    """
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+# Размеры производных изображений: наибольшая сторона в пикселях
+VARIANTS = {
+    "thumb": 160,
+    "card": 480,
+    "full": 1600,
+}
+WEBP_QUALITY = 80
+
+
+def make_variants(data: bytes) -> dict[str, bytes]:
+    """
+    Построение производных изображений в формате WebP.
+
+    Исходник декодируется один раз, ориентация применяется из EXIF,
+    сами метаданные в результат не попадают. Изображения не увеличиваются.
+    Функция выполняется в пуле процессов, поэтому объявлена на уровне модуля.
+    """
+    from io import BytesIO
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(BytesIO(data)) as source:
+            image = ImageOps.exif_transpose(source)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+    except Image.DecompressionBombError as e:
+        raise ValueError(str(e)) from e
+
+    result = {}
+    for name, size in sorted(VARIANTS.items(), key=lambda v: v[1], reverse=True):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        image.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+        result[name] = buffer.getvalue()
+    return result
+
+
+def variant_key(key: str, variant: str) -> str:
+    """Ключ производного изображения: 12-0.png -> 12-0.card.webp"""
+    return f"{key.rsplit('.', 1)[0]}.{variant}.webp"
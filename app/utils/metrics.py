@@ -0,0 +1,44 @@
+class Metric:
+    """
+    Метрика процесса в текстовом формате Prometheus
+
+    Аргументы для инициализации:
+        name(str) - Название метрики
+        description(str) - Описание для строки HELP
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = 0
+        registry.append(self)
+
+    def render(self) -> str:
+        return (
+            f"# HELP {self.name} {self.description}\n"
+            f"# TYPE {self.name} {self.type}\n"
+            f"{self.name} {self.value}\n"
+        )
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+registry: list[Metric] = []
+
+
+def render_metrics() -> str:
+    """Все зарегистрированные метрики для эндпоинта /metrics"""
+    return "".join(metric.render() for metric in registry)
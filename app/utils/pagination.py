@@ -0,0 +1,29 @@
+import base64
+import datetime
+
+
+def encode_cursor(created_at: datetime.datetime, row_id: int) -> str:
+    """
+    Кодирование позиции ленты в непрозрачный курсор
+
+    Аргументы:
+        created_at(datetime) - Дата создания последней записи страницы
+        row_id(int) - ID последней записи страницы
+    """
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, int]:
+    """
+    Декодирование курсора в пару (created_at, id)
+
+    Вызывает ValueError, если курсор поврежден.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Некорректный курсор: {cursor}") from e
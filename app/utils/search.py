@@ -0,0 +1,46 @@
+import re
+
+# Окончания русских словоформ, от длинных к коротким.
+# Отсекаются, чтобы "столы", "стола" и "столик" находились по одной основе.
+_RU_ENDINGS = sorted(
+    {
+        "иями", "ями", "ами", "иях", "ях", "ах", "ией", "ей", "ой", "ий", "ый",
+        "ая", "яя", "ое", "ее", "ие", "ые", "ого", "его", "ому", "ему", "ым",
+        "им", "ом", "ем", "ую", "юю", "ов", "ев", "ам", "ям", "ия", "ья",
+        "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+    },
+    key=len, reverse=True,
+)
+_MIN_STEM = 3
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_text(value: str) -> str:
+    """Приведение строки к нижнему регистру с заменой ё на е"""
+    return value.lower().replace("ё", "е")
+
+
+def stem(word: str) -> str:
+    """Облегченный стемминг: отсечение типового окончания словоформы"""
+    if len(word) <= _MIN_STEM + 1:
+        return word
+    for ending in _RU_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def build_fulltext_query(q: str) -> str | None:
+    """
+    Построение запроса для MATCH ... AGAINST (IN BOOLEAN MODE).
+    Каждое слово обязательно и ищется по префиксу основы.
+    Возвращает None, если в строке нет слов длиннее одного символа.
+    """
+    terms = [
+        f"+{stem(word)}*"
+        for word in _WORD_RE.findall(normalize_text(q))
+        if len(word) > 1
+    ]
+    if not terms:
+        return None
+    return " ".join(terms)
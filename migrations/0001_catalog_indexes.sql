@@ -0,0 +1,10 @@
+-- Индексы под запрос каталога POST /api/v1/items/cards.
+-- Фильтр по формату и статусу с сортировкой по created_at (и id, который
+-- InnoDB хранит в каждом вторичном индексе) читается из одного индекса,
+-- фильтр по городу — через (city_id, item_id) без обращения к таблице.
+
+ALTER TABLE items
+    ADD INDEX ix_items_format_status_created_at (format, status, created_at);
+
+ALTER TABLE items_locations
+    ADD INDEX ix_items_locations_city_item (city_id, item_id);
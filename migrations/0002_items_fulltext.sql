@@ -0,0 +1,6 @@
+-- Полнотекстовый поиск по названию и описанию товара.
+-- Парсер ngram разбивает текст на n-граммы (ngram_token_size, по умолчанию 2),
+-- что подходит для русского языка и поиска по части слова.
+
+ALTER TABLE items
+    ADD FULLTEXT INDEX ft_items_title_description (title, description) WITH PARSER ngram;
@@ -0,0 +1,22 @@
+-- Денормализованные агрегаты товара: сумма и количество оценок, количество просмотров.
+-- Поддерживаются ItemsRepository.add_review / delete_review / add_click.
+
+ALTER TABLE items
+    ADD COLUMN rating_sum DOUBLE NOT NULL DEFAULT 0,
+    ADD COLUMN rating_count INT NOT NULL DEFAULT 0,
+    ADD COLUMN clicks_count INT NOT NULL DEFAULT 0;
+
+UPDATE items
+    LEFT JOIN (
+        SELECT item_id, SUM(stars) AS rating_sum, COUNT(*) AS rating_count
+        FROM items_reviews
+        GROUP BY item_id
+    ) AS reviews ON reviews.item_id = items.id
+    LEFT JOIN (
+        SELECT item_id, COUNT(*) AS clicks_count
+        FROM items_clicks
+        GROUP BY item_id
+    ) AS clicks ON clicks.item_id = items.id
+SET items.rating_sum = COALESCE(reviews.rating_sum, 0),
+    items.rating_count = COALESCE(reviews.rating_count, 0),
+    items.clicks_count = COALESCE(clicks.clicks_count, 0);
@@ -0,0 +1,7 @@
+-- Денормализованный рейтинг продавца.
+-- Поддерживается UsersRepository.create_review / delete_review,
+-- пересчитывается командой python -m app.commands.backfill_ratings.
+
+ALTER TABLE users
+    ADD COLUMN seller_rating_sum DOUBLE NOT NULL DEFAULT 0,
+    ADD COLUMN seller_rating_count INT NOT NULL DEFAULT 0;
@@ -0,0 +1,13 @@
+-- Ссылки на производные изображения (WebP): миниатюра, карточка, полный размер.
+-- Заполняются при загрузке фото; для старых записей остаются NULL,
+-- и API отдает оригинал из link.
+
+ALTER TABLE items_photo
+    ADD COLUMN thumb_link VARCHAR(255) NULL,
+    ADD COLUMN card_link VARCHAR(255) NULL,
+    ADD COLUMN full_link VARCHAR(255) NULL;
+
+ALTER TABLE requests_photos
+    ADD COLUMN thumb_link VARCHAR(255) NULL,
+    ADD COLUMN card_link VARCHAR(255) NULL,
+    ADD COLUMN full_link VARCHAR(255) NULL;
@@ -0,0 +1,29 @@
+-- Таблица замыкания дерева категорий для фильтрации по поддереву.
+-- Новые категории добавляются CommonRepository.add_category, при удалении
+-- строки удаляются каскадом. Полное перестроение:
+-- python -m app.commands.rebuild_category_closure
+
+CREATE TABLE categories_closure (
+    ancestor_id BIGINT NOT NULL,
+    descendant_id BIGINT NOT NULL,
+    depth INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (ancestor_id, descendant_id),
+    KEY ix_categories_closure_descendant_ancestor (descendant_id, ancestor_id),
+    CONSTRAINT fk_categories_closure_ancestor
+        FOREIGN KEY (ancestor_id) REFERENCES categories (id) ON DELETE CASCADE,
+    CONSTRAINT fk_categories_closure_descendant
+        FOREIGN KEY (descendant_id) REFERENCES categories (id) ON DELETE CASCADE
+);
+
+INSERT INTO categories_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE paths (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM categories
+    UNION ALL
+    SELECT p.ancestor_id, c.id, p.depth + 1
+    FROM paths p
+    JOIN categories c ON c.depend_on = p.descendant_id
+    WHERE p.depth < 16
+)
+SELECT ancestor_id, descendant_id, MIN(depth)
+FROM paths
+GROUP BY ancestor_id, descendant_id;
@@ -0,0 +1,9 @@
+-- Индексы под список заказов GET /api/v1/offers/.
+-- Фильтр по получателю/отправителю и статусу с сортировкой по created_at
+-- (и id, который InnoDB хранит в каждом вторичном индексе) читается из
+-- одного индекса без filesort. Список без фильтра по статусу эти индексы
+-- отсортировать не могут, для него индексы добавлены в 0010.
+
+ALTER TABLE offers
+    ADD INDEX ix_offers_to_user_status_created_at (to_user_id, status, created_at),
+    ADD INDEX ix_offers_from_user_status_created_at (from_user_id, status, created_at);
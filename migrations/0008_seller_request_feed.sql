@@ -0,0 +1,34 @@
+-- Лента запросов продавца для GET /api/v1/requests/ с фильтром по категориям.
+-- Пополняется в RequestsRepository.add для всех продавцов, чья основная
+-- категория включает категорию запроса, и обрезается до SELLER_FEED_SIZE
+-- (по умолчанию 1000) последних записей. Ниже - заполнение по существующим
+-- запросам с тем же ограничением.
+
+CREATE TABLE seller_request_feed (
+    seller_id BIGINT NOT NULL,
+    request_id BIGINT NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (seller_id, request_id),
+    KEY ix_seller_request_feed_seller_created (seller_id, created_at, request_id),
+    CONSTRAINT fk_seller_request_feed_seller
+        FOREIGN KEY (seller_id) REFERENCES users (id) ON DELETE CASCADE,
+    CONSTRAINT fk_seller_request_feed_request
+        FOREIGN KEY (request_id) REFERENCES requests (id) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO seller_request_feed (seller_id, request_id, created_at)
+SELECT seller_id, request_id, created_at
+FROM (
+    SELECT
+        sc.user_id AS seller_id,
+        r.id AS request_id,
+        r.created_at,
+        ROW_NUMBER() OVER (
+            PARTITION BY sc.user_id ORDER BY r.created_at DESC, r.id DESC
+        ) AS position
+    FROM sellers_categories sc
+    JOIN categories_closure cc ON cc.ancestor_id = sc.category_id
+    JOIN request_category rc ON rc.category_id = cc.descendant_id
+    JOIN requests r ON r.id = rc.request_id
+) ranked
+WHERE position <= 1000;
@@ -0,0 +1,14 @@
+-- Денормализованное количество просмотров запроса.
+-- Поддерживается ClicksRepository.add_request_clicks, вместо загрузки всех
+-- строк request_clicks через relationship Requests.clicks_quantity.
+
+ALTER TABLE requests
+    ADD COLUMN clicks_count INT NOT NULL DEFAULT 0;
+
+UPDATE requests
+    LEFT JOIN (
+        SELECT request_id, COUNT(*) AS clicks_count
+        FROM request_clicks
+        GROUP BY request_id
+    ) AS clicks ON clicks.request_id = requests.id
+SET requests.clicks_count = COALESCE(clicks.clicks_count, 0);
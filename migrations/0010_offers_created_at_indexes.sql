@@ -0,0 +1,8 @@
+-- Индексы под список заказов без фильтра по статусу (по умолчанию).
+-- ORDER BY created_at DESC, id DESC читается из индекса в обратном порядке
+-- (id InnoDB хранит в каждом вторичном индексе): курсорная пагинация
+-- обходится без OFFSET и filesort.
+
+ALTER TABLE offers
+    ADD INDEX ix_offers_to_user_created_at (to_user_id, created_at),
+    ADD INDEX ix_offers_from_user_created_at (from_user_id, created_at);
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+# Обязательные настройки без значений по умолчанию: app.settings
+# создает Settings() при импорте
+for name, value in {
+    "APP_NAME": "search-online",
+    "APP_VERSION": "test",
+    "APP_DESCRIPTION": "test",
+    "ALLOWED_ORIGINS": "*",
+    "SECRET_KEY": "test",
+    "DB_DSN": "user:password@localhost/test",
+    "DEBUG": "false",
+    "ALGORITHM": "HS256",
+    "TOKEN_ISS": "test",
+    "MONGO_USER": "test",
+    "MONGO_PWD": "test",
+    "ENCODE_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+# Тесты с маркером mysql работают с отдельной базой (user:password@host/db).
+# Engine создается по DB_DSN при импорте app, поэтому адрес подменяется здесь
+TEST_DB_DSN = os.environ.get("TEST_DB_DSN")
+if TEST_DB_DSN:
+    os.environ["DB_DSN"] = TEST_DB_DSN
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    """
+    Схема по моделям и тестовые данные из db.seed, один раз на сессию.
+    Без TEST_DB_DSN тест пропускается.
+    """
+    if not TEST_DB_DSN:
+        pytest.skip("TEST_DB_DSN не задан")
+    import db
+    return db.run(db.prepare())
@@ -0,0 +1,271 @@
+"""
+Тестовая база MySQL: схема по моделям и синтетический каталог.
+
+Каждый тест выполняет свои корутины через run(): engine приложения
+привязывает подключения к циклу событий, поэтому после каждого
+asyncio.run пул закрывается.
+"""
+import asyncio
+import datetime
+from dataclasses import dataclass, field
+from typing import Awaitable, TypeVar
+
+from sqlalchemy import insert, text, Select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repository.common.repository import CommonRepository
+from app.repository.models import Base, FederalDistricts, Regions, Cities, Categories, Users, UsersType, \
+    UsersCities, UserAvatar, UsersContacts, LegalInfo, SellersCategories, Items, ItemsPrice, ItemsLocations, \
+    ItemsCategory, ProductionTime, ItemsPhoto, Requests, RequestsPrice, RequestsProductionTime, \
+    RequestsCategory, RequestsPhotos, Offers, OffersDetails
+from app.repository.requests.repository import RequestsRepository
+from app.repository.session import engine, async_session
+from app.utils.types import ItemType, ItemPublishStatus, TypesOfUser, ContactType, LegalFormat, OrdersStatus
+
+T = TypeVar("T")
+
+ITEMS = 3000
+REQUESTS = 60
+ITEM_OFFERS = 30
+REQUEST_OFFERS = 10
+PHOTOS = 2
+
+SELLER = 1
+BUYER = 2
+CITIES = [1, 2, 3, 4, 5]
+
+# Дерево категорий: ROOT > CHILD > LEAF, отдельный корень для услуг
+ROOT = 1
+CHILD = 2
+LEAF = 3
+SERVICE = 4
+
+WORDS = ["кирпич", "доска", "бетон", "краска", "плитка", "песок"]
+BASE_TIME = datetime.datetime(2024, 1, 1)
+
+
+@dataclass
+class Dataset:
+    seller_id: int = SELLER
+    buyer_id: int = BUYER
+    item_ids: list[int] = field(default_factory=list)
+    request_ids: list[int] = field(default_factory=list)
+    offer_ids: list[int] = field(default_factory=list)
+
+
+def run(coro: Awaitable[T]) -> T:
+    async def main():
+        try:
+            return await coro
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+
+async def prepare() -> Dataset:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_session() as session:
+        dataset = await seed(session)
+        await session.commit()
+    async with engine.connect() as conn:
+        await conn.execute(text(
+            "ANALYZE TABLE items, items_price, items_locations, items_category, "
+            "categories_closure, production_time, offers"
+        ))
+    return dataset
+
+
+def item_format(i: int) -> ItemType:
+    return ItemType.service if i % 4 == 0 else ItemType.item
+
+
+def item_status(i: int) -> ItemPublishStatus:
+    return ItemPublishStatus.pending if i % 5 == 0 else ItemPublishStatus.approved
+
+
+def item_category(i: int) -> int:
+    if item_format(i) == ItemType.service:
+        return SERVICE
+    return LEAF if i % 2 else CHILD
+
+
+async def seed(session) -> Dataset:
+    dataset = Dataset()
+    await session.execute(insert(FederalDistricts), [{"id": 1, "name": "Центральный"}])
+    await session.execute(insert(Regions), [
+        {"id": 1, "name": "Московская область", "federal_district_id": 1, "is_active": True}
+    ])
+    await session.execute(insert(Cities), [
+        {"id": city_id, "name": f"Город {city_id}", "region_id": 1, "federal_district_id": 1}
+        for city_id in CITIES
+    ])
+    await session.execute(insert(Categories), [
+        {"id": ROOT, "type": ItemType.item, "value": "Стройматериалы", "on_moderating": False, "depend_on": None},
+        {"id": CHILD, "type": ItemType.item, "value": "Кладка", "on_moderating": False, "depend_on": ROOT},
+        {"id": LEAF, "type": ItemType.item, "value": "Кирпич", "on_moderating": False, "depend_on": CHILD},
+        {"id": SERVICE, "type": ItemType.service, "value": "Ремонт", "on_moderating": False, "depend_on": None},
+    ])
+    await CommonRepository(session).rebuild_category_closure()
+
+    await session.execute(insert(Users), [
+        {"id": SELLER, "first_name": "Иван", "last_name": "Петров", "full_filled": True},
+        {"id": BUYER, "first_name": "Анна", "last_name": "Смирнова", "full_filled": True},
+    ])
+    await session.execute(insert(UsersType), [
+        {"user_id": SELLER, "type": TypesOfUser.seller},
+        {"user_id": SELLER, "type": TypesOfUser.user},
+        {"user_id": BUYER, "type": TypesOfUser.user},
+    ])
+    await session.execute(insert(UsersCities), [
+        {"user_id": SELLER, "city_id": CITIES[0]},
+        {"user_id": BUYER, "city_id": CITIES[1]},
+    ])
+    await session.execute(insert(UserAvatar), [
+        {"user_id": SELLER, "link": "https://test.s3.ru/seller.png"},
+        {"user_id": BUYER, "link": "https://test.s3.ru/buyer.png"},
+    ])
+    await session.execute(insert(UsersContacts), [
+        {"user_id": SELLER, "type": ContactType.phone, "value": "+70000000000"},
+        {"user_id": SELLER, "type": ContactType.telegram, "value": "@seller"},
+    ])
+    await session.execute(insert(LegalInfo), [
+        {"user_id": SELLER, "type": LegalFormat.ooo, "company_name": "ООО Кирпич", "inn": "7700000000"},
+    ])
+    await session.execute(insert(SellersCategories), [
+        {"user_id": SELLER, "category_id": ROOT},
+    ])
+
+    dataset.item_ids = list(range(1, ITEMS + 1))
+    await session.execute(insert(Items), [
+        {
+            "id": i,
+            "creator_id": SELLER,
+            "title": f"{WORDS[i % len(WORDS)]} {i}",
+            "description": f"Описание товара {i}",
+            "format": item_format(i),
+            "is_delivered": False,
+            "status": item_status(i),
+            "created_at": BASE_TIME + datetime.timedelta(minutes=i),
+            "updated_at": BASE_TIME + datetime.timedelta(minutes=i),
+        }
+        for i in dataset.item_ids
+    ])
+    await session.execute(insert(ItemsPrice), [
+        {"item_id": i, "fix_price": 100 + (i % 50) * 10, "currency": "RUB"}
+        for i in dataset.item_ids
+    ])
+    await session.execute(insert(ItemsLocations), [
+        {"item_id": i, "city_id": CITIES[i % len(CITIES)], "address": f"ул. Тестовая, {i}"}
+        for i in dataset.item_ids
+    ])
+    await session.execute(insert(ItemsCategory), [
+        {"item_id": i, "category_id": item_category(i)}
+        for i in dataset.item_ids
+    ])
+    await session.execute(insert(ProductionTime), [
+        {"item_id": i, "from_time": 1 + i % 3, "to_time": 5 + i % 3}
+        for i in dataset.item_ids
+    ])
+    await session.execute(insert(ItemsPhoto), [
+        {
+            "item_id": i,
+            "link": f"https://test.s3.ru/{i}-{index}.png",
+            "card_link": f"https://test.s3.ru/{i}-{index}.card.webp",
+            "thumb_link": f"https://test.s3.ru/{i}-{index}.thumb.webp",
+            "full_link": f"https://test.s3.ru/{i}-{index}.full.webp",
+            "index": index,
+        }
+        for i in dataset.item_ids
+        for index in range(PHOTOS)
+    ])
+
+    dataset.request_ids = list(range(1, REQUESTS + 1))
+    await session.execute(insert(Requests), [
+        {
+            "id": i,
+            "creator_id": BUYER,
+            "title": f"Нужен {WORDS[i % len(WORDS)]}",
+            "description": f"Запрос {i}",
+            "created_at": BASE_TIME + datetime.timedelta(hours=i),
+            "updated_at": BASE_TIME + datetime.timedelta(hours=i),
+        }
+        for i in dataset.request_ids
+    ])
+    await session.execute(insert(RequestsPrice), [
+        {"request_id": i, "max_price": 1000 + i, "currency": "RUB"}
+        for i in dataset.request_ids
+    ])
+    await session.execute(insert(RequestsProductionTime), [
+        {"request_id": i, "max_days": 10}
+        for i in dataset.request_ids
+    ])
+    await session.execute(insert(RequestsCategory), [
+        {"request_id": i, "category_id": LEAF if i % 2 else CHILD}
+        for i in dataset.request_ids
+    ])
+    await session.execute(insert(RequestsPhotos), [
+        {"request_id": i, "link": f"https://test.s3.ru/request-{i}-{index}.png", "index": index}
+        for i in dataset.request_ids
+        for index in range(PHOTOS)
+    ])
+    await RequestsRepository(session).fill_seller_feed(SELLER, [ROOT])
+
+    approved = [i for i in dataset.item_ids if item_status(i) == ItemPublishStatus.approved]
+    offers = [
+        {"item_id": item_id, "request_id": None, "from_user_id": BUYER, "to_user_id": SELLER}
+        for item_id in approved[:ITEM_OFFERS]
+    ] + [
+        {"item_id": None, "request_id": request_id, "from_user_id": SELLER, "to_user_id": BUYER}
+        for request_id in dataset.request_ids[:REQUEST_OFFERS]
+    ]
+    dataset.offer_ids = list(range(1, len(offers) + 1))
+    await session.execute(insert(Offers), [
+        {
+            "id": offer_id,
+            **offer,
+            "status": OrdersStatus.PENDING,
+            "created_at": BASE_TIME + datetime.timedelta(minutes=offer_id),
+        }
+        for offer_id, offer in zip(dataset.offer_ids, offers)
+    ])
+    await session.execute(insert(OffersDetails), [
+        {"offer_id": offer_id, "price": 500, "currency": "RUB", "production": 3}
+        for offer_id in dataset.offer_ids
+    ])
+    return dataset
+
+
+async def explain(session: AsyncSession, statement: Select) -> list[dict]:
+    """Строки EXPLAIN для запроса с подставленными значениями фильтров"""
+    sql = statement.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True})
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN {sql}")
+    return [dict(row) for row in result.mappings()]
+
+
+async def handler_reads(session: AsyncSession) -> int:
+    """Строки, прочитанные MySQL в сессии: сумма счетчиков Handler_read_*"""
+    result = await session.execute(text("SHOW SESSION STATUS LIKE 'Handler_read%'"))
+    return sum(int(value) for _, value in result)
+
+
+async def new_item_offer(from_user_id: int = BUYER, to_user_id: int = SELLER) -> int:
+    """Отдельный заказ на товар в статусе PENDING для тестов, которые меняют заказ"""
+    async with async_session() as session:
+        result = await session.execute(
+            insert(Offers).values(
+                item_id=1,
+                from_user_id=from_user_id,
+                to_user_id=to_user_id,
+                status=OrdersStatus.PENDING,
+            )
+        )
+        offer_id = result.inserted_primary_key[0]
+        await session.execute(
+            insert(OffersDetails).values(offer_id=offer_id, price=500, currency="RUB")
+        )
+        await session.commit()
+    return offer_id
@@ -0,0 +1,69 @@
+"""
+Страница каталога по курсору читает одинаковое число строк на любой
+глубине, страница по OFFSET - пропорционально смещению.
+Прочитанные строки считаются по счетчикам Handler_read_* сессии MySQL.
+"""
+import pytest
+from sqlalchemy import select
+
+import db
+from app.api.v1.items.requests import GetCards
+from app.repository.items.repository import ItemsRepository
+from app.repository.models import Items
+from app.repository.session import async_session
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.types import ItemType
+
+pytestmark = pytest.mark.mysql
+
+PAGE = 20
+DEEP_OFFSET = 1200
+BODY = GetCards(type=ItemType.item)
+
+
+async def measure_page(session, offset: int, after) -> tuple[list, int]:
+    """Страница каталога и число строк, прочитанных MySQL для нее"""
+    repository = ItemsRepository(session)
+    before = await db.handler_reads(session)
+    # Чтение самих счетчиков тоже может их менять, оно вычитается
+    overhead = await db.handler_reads(session) - before
+    before = await db.handler_reads(session)
+    items = await repository.get_items_by_criteria(BODY, offset, PAGE, after)
+    return items, await db.handler_reads(session) - before - overhead
+
+
+async def position(session, offset: int) -> tuple:
+    """(created_at, id) товара каталога на позиции offset"""
+    statement = ItemsRepository.catalog_statement(
+        select(Items.created_at, Items.id), BODY
+    ).order_by(
+        Items.created_at.desc(), Items.id.desc()
+    ).offset(offset).limit(1)
+    result = await session.execute(statement)
+    return tuple(result.one())
+
+
+def test_cursor_round_trip():
+    created_at, item_id = db.BASE_TIME, 42
+    assert decode_cursor(encode_cursor(created_at, item_id)) == (created_at, item_id)
+
+
+def test_keyset_pages_stay_flat(dataset):
+    async def main():
+        async with async_session() as session:
+            first, first_reads = await measure_page(session, 0, None)
+            deep_after = await position(session, DEEP_OFFSET - 1)
+            keyset, keyset_reads = await measure_page(session, 0, deep_after)
+            offset, offset_reads = await measure_page(session, DEEP_OFFSET, None)
+            return first, first_reads, keyset, keyset_reads, offset, offset_reads
+
+    first, first_reads, keyset, keyset_reads, offset, offset_reads = db.run(main())
+
+    # Курсор и OFFSET приводят к одной и той же странице
+    assert [item.id for item in keyset] == [item.id for item in offset]
+    assert len(keyset) == PAGE
+    # Глубокая страница по курсору не дороже первой (с запасом на
+    # соседние строки индекса), OFFSET читает все пропущенные строки
+    assert keyset_reads <= first_reads * 2 + PAGE
+    assert offset_reads >= DEEP_OFFSET
+    assert offset_reads > keyset_reads * 5
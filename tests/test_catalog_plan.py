@@ -0,0 +1,62 @@
+"""
+План запроса каталога: фильтры читаются по индексам из
+migrations/0001_catalog_indexes.sql, а не полным сканированием таблиц.
+"""
+import pytest
+
+import db
+from app.api.v1.items.requests import GetCards
+from app.repository.items.repository import ItemsRepository
+from app.repository.models import Items, ItemsPrice, ItemsLocations
+from app.repository.session import async_session
+from app.utils.types import ItemType
+
+pytestmark = pytest.mark.mysql
+
+FORMAT_STATUS_INDEX = "ix_items_format_status_created_at"
+CITY_INDEX = "ix_items_locations_city_item"
+CATALOG_TABLES = {"items", "items_price", "items_locations", "items_category", "categories_closure", "cities"}
+
+
+def catalog_plan(body: GetCards) -> dict[str, dict]:
+    """EXPLAIN страницы каталога по таблицам"""
+    statement = ItemsRepository.catalog_statement(
+        ItemsRepository.card_statement(), body, joined=(ItemsPrice, ItemsLocations)
+    ).order_by(
+        Items.created_at.desc(), Items.id.desc()
+    ).limit(20)
+
+    async def main():
+        async with async_session() as session:
+            return await db.explain(session, statement)
+    return {row["table"]: row for row in db.run(main())}
+
+
+def assert_no_full_scan(plan: dict[str, dict]):
+    for table, row in plan.items():
+        if table in CATALOG_TABLES:
+            assert row["type"] != "ALL", f"{table}: полное сканирование"
+
+
+def test_format_status_uses_index(dataset):
+    plan = catalog_plan(GetCards(type=ItemType.item))
+    assert plan["items"]["key"] == FORMAT_STATUS_INDEX
+    assert_no_full_scan(plan)
+
+
+@pytest.mark.parametrize("body", [
+    GetCards(type=ItemType.item, city_id=db.CITIES[1]),
+    GetCards(type=ItemType.item, from_price=200, to_price=500),
+    GetCards(type=ItemType.item, category_id=db.CHILD),
+    GetCards(type=ItemType.item, city_id=db.CITIES[1], from_price=200, category_id=db.ROOT),
+], ids=["city", "price", "category", "combined"])
+def test_filters_use_catalog_indexes(dataset, body):
+    plan = catalog_plan(body)
+    assert_no_full_scan(plan)
+    keys = {row["key"] for row in plan.values()}
+    assert keys & {FORMAT_STATUS_INDEX, CITY_INDEX}
+    # Товары читаются по индексу формата и статуса либо по первичному
+    # ключу из строк города
+    assert plan["items"]["key"] in (FORMAT_STATUS_INDEX, "PRIMARY")
+    if body.city_id is not None:
+        assert CITY_INDEX in (plan["items_locations"]["possible_keys"] or "")
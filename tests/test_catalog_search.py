@@ -0,0 +1,96 @@
+"""
+Поиск каталога: запрос MATCH ... AGAINST строится по основам слов и
+читается по FULLTEXT-индексу, а не перебором строк каталога, как ILIKE.
+"""
+import pytest
+from sqlalchemy import select, func
+
+import db
+from app.api.v1.items.requests import GetCards
+from app.repository.items.repository import ItemsRepository
+from app.repository.models import Items
+from app.repository.session import async_session
+from app.utils.search import build_fulltext_query, stem, normalize_text
+from app.utils.types import ItemType
+
+FULLTEXT_INDEX = "ft_items_title_description"
+WORD = "кирпич"
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("столы", "стол"),
+    ("стола", "стол"),
+    ("кирпичи", "кирпич"),
+    ("красный", "красн"),
+    # Короткие слова не обрезаются
+    ("окно", "окно"),
+])
+def test_stem(word, expected):
+    assert stem(word) == expected
+
+
+def test_normalize_text():
+    assert normalize_text("Ёлка") == "елка"
+
+
+@pytest.mark.parametrize("q, expected", [
+    ("Красный кирпич", "+красн* +кирпич*"),
+    ("кирпичи, доски!", "+кирпич* +доск*"),
+    # Однобуквенные слова пропускаются
+    ("a б", None),
+    ("", None),
+])
+def test_build_fulltext_query(q, expected):
+    assert build_fulltext_query(q) == expected
+
+
+def count_statement(body: GetCards):
+    return ItemsRepository.catalog_statement(
+        select(func.count(Items.id)).select_from(Items), body
+    )
+
+
+def ilike_count_statement():
+    """Прежний путь поиска: подстрока в названии"""
+    return count_statement(
+        GetCards(type=ItemType.item)
+    ).filter(
+        Items.title.ilike(f"%{WORD}%")
+    )
+
+
+async def count_with_reads(session, statement) -> tuple[int, int]:
+    before = await db.handler_reads(session)
+    overhead = await db.handler_reads(session) - before
+    before = await db.handler_reads(session)
+    total = await session.scalar(statement)
+    return total, await db.handler_reads(session) - before - overhead
+
+
+@pytest.mark.mysql
+def test_search_uses_fulltext_index(dataset):
+    async def main():
+        async with async_session() as session:
+            return await db.explain(session, count_statement(GetCards(type=ItemType.item, q=WORD)))
+
+    plan = {row["table"]: row for row in db.run(main())}
+    assert plan["items"]["type"] == "fulltext"
+    assert plan["items"]["key"] == FULLTEXT_INDEX
+
+
+@pytest.mark.mysql
+def test_fulltext_reads_fewer_rows_than_ilike(dataset):
+    async def main():
+        async with async_session() as session:
+            fulltext = await count_with_reads(
+                session, count_statement(GetCards(type=ItemType.item, q=WORD))
+            )
+            ilike = await count_with_reads(session, ilike_count_statement())
+            return fulltext, ilike
+
+    (fulltext_total, fulltext_reads), (ilike_total, ilike_reads) = db.run(main())
+    # Оба пути находят одни и те же товары
+    assert fulltext_total == ilike_total > 0
+    # ILIKE проверяет каждую строку каталога, FULLTEXT - только совпадения
+    assert ilike_reads > fulltext_total * 3
+    assert fulltext_reads < ilike_reads
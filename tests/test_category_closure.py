@@ -0,0 +1,152 @@
+"""
+Таблица замыкания категорий: полное перестроение и добавление по одной
+категории дают все пути дерева, включая строки категории к самой себе.
+"""
+import time
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+import db
+from app.repository.common.repository import CommonRepository
+from app.repository.models import Categories, CategoriesClosure
+from app.repository.query_stats import count_queries
+from app.repository.session import async_session
+from app.utils.types import ItemType
+
+pytestmark = pytest.mark.mysql
+
+# Синтетические категории не пересекаются с категориями тестовых данных
+BASE_ID = 10000
+LEVELS = 5
+
+
+def build_tree(levels: int, fanout: int) -> dict[int, int | None]:
+    """Родитель каждой категории; порядок словаря - от корня к листьям"""
+    parents = {BASE_ID: None}
+    level = [BASE_ID]
+    next_id = BASE_ID + 1
+    for _ in range(levels - 1):
+        children = []
+        for parent_id in level:
+            for _ in range(fanout):
+                parents[next_id] = parent_id
+                children.append(next_id)
+                next_id += 1
+        level = children
+    return parents
+
+
+def expected_closure(parents: dict[int, int | None]) -> set[tuple[int, int, int]]:
+    rows = set()
+    for category_id in parents:
+        ancestor_id, depth = category_id, 0
+        while ancestor_id is not None:
+            rows.add((ancestor_id, category_id, depth))
+            ancestor_id, depth = parents[ancestor_id], depth + 1
+    return rows
+
+
+SEED_PARENTS = {db.ROOT: None, db.CHILD: db.ROOT, db.LEAF: db.CHILD, db.SERVICE: None}
+
+
+async def closure_rows(session) -> set[tuple[int, int, int]]:
+    result = await session.execute(
+        select(
+            CategoriesClosure.ancestor_id,
+            CategoriesClosure.descendant_id,
+            CategoriesClosure.depth,
+        ).filter(
+            CategoriesClosure.descendant_id >= BASE_ID
+        )
+    )
+    return {tuple(row) for row in result}
+
+
+def with_tree(parents: dict[int, int | None], action):
+    """action(session) с синтетическим деревом, которое удаляется после теста"""
+    async def main():
+        async with async_session() as session:
+            await session.execute(insert(Categories), [
+                {
+                    "id": category_id,
+                    "type": ItemType.item,
+                    "value": f"Категория {category_id}",
+                    "on_moderating": False,
+                    "depend_on": parent_id,
+                }
+                for category_id, parent_id in parents.items()
+            ])
+            await session.commit()
+            try:
+                return await action(session)
+            finally:
+                await session.rollback()
+                await session.execute(delete(Categories).filter(Categories.id >= BASE_ID))
+                await CommonRepository(session).rebuild_category_closure()
+                await session.commit()
+    return db.run(main())
+
+
+def test_tree_helpers():
+    parents = build_tree(3, 2)
+    assert len(parents) == 1 + 2 + 4
+    rows = expected_closure(parents)
+    assert (BASE_ID, BASE_ID, 0) in rows
+    # Путь от корня до листа третьего уровня
+    leaf = max(parents)
+    assert (BASE_ID, leaf, 2) in rows
+    assert len(rows) == 7 + 6 + 4
+
+
+def test_rebuild(dataset):
+    parents = build_tree(LEVELS, 2)
+
+    async def action(session):
+        with count_queries() as stats:
+            total = await CommonRepository(session).rebuild_category_closure()
+        await session.commit()
+        return total, stats, await closure_rows(session)
+
+    total, stats, rows = with_tree(parents, action)
+    expected = expected_closure(parents)
+    assert rows == expected
+    assert {(category_id, category_id, 0) for category_id in parents} <= rows
+    assert total == len(expected) + len(expected_closure(SEED_PARENTS))
+    # Удаление, строки к себе и по запросу на уровень,
+    # последний из которых ничего не добавляет
+    assert stats.statements == 2 + LEVELS
+
+
+def test_incremental_matches_rebuild(dataset):
+    parents = build_tree(LEVELS, 2)
+
+    async def action(session):
+        await session.execute(
+            delete(CategoriesClosure).filter(CategoriesClosure.descendant_id >= BASE_ID)
+        )
+        repository = CommonRepository(session)
+        for category_id, parent_id in parents.items():
+            await repository.add_category_closure(category_id, parent_id)
+        await session.commit()
+        return await closure_rows(session)
+
+    assert with_tree(parents, action) == expected_closure(parents)
+
+
+def test_rebuild_bound(dataset):
+    # 1 + 4 + 16 + 64 + 256 категорий: число запросов растет с глубиной
+    # дерева, а не с количеством категорий
+    parents = build_tree(LEVELS, 4)
+
+    async def action(session):
+        started = time.perf_counter()
+        with count_queries() as stats:
+            await CommonRepository(session).rebuild_category_closure()
+        await session.commit()
+        return time.perf_counter() - started, stats, await closure_rows(session)
+
+    elapsed, stats, rows = with_tree(parents, action)
+    assert len(rows) == len(expected_closure(parents))
+    assert stats.statements == 2 + LEVELS
+    assert elapsed < 5
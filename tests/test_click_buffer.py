@@ -0,0 +1,236 @@
+"""
+Буфер просмотров под нагрузкой: досрочная запись по CLICKS_FLUSH_SIZE,
+отсечение повторов на время CLICKS_DEDUP_TTL и поведение при
+недоступной БД с ограничением CLICKS_BUFFER_LIMIT.
+"""
+import asyncio
+
+import pytest
+
+from app.services.clicks import buffer as buffer_module
+from app.services.clicks.buffer import ClickBuffer
+from app.settings import settings
+from app.utils import cache as cache_module
+
+FLUSH_SIZE = 100
+BUFFER_LIMIT = 250
+DEDUP_TTL = 60
+
+
+class FakeDatabase:
+    """Записанные пачки просмотров вместо MySQL"""
+
+    def __init__(self):
+        self.down = False
+        self.item_batches: list[list[tuple[int, int]]] = []
+        self.request_batches: list[list[tuple[int, int]]] = []
+
+    @property
+    def items(self) -> list[tuple[int, int]]:
+        return [click for batch in self.item_batches for click in batch]
+
+    @property
+    def requests(self) -> list[tuple[int, int]]:
+        return [click for batch in self.request_batches for click in batch]
+
+    def session(self):
+        if self.down:
+            raise ConnectionError("БД недоступна")
+        return FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def commit(self):
+        pass
+
+
+class FakeClicksRepository:
+    def __init__(self, session: FakeSession):
+        self.database = session.database
+
+    async def add_item_clicks(self, clicks: list[tuple[int, int]]) -> None:
+        self.database.item_batches.append(sorted(clicks))
+
+    async def add_request_clicks(self, clicks: list[tuple[int, int]]) -> None:
+        self.database.request_batches.append(sorted(clicks))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(buffer_module, "async_session", database.session)
+    monkeypatch.setattr(buffer_module, "ClicksRepository", FakeClicksRepository)
+    monkeypatch.setattr(settings, "CLICKS_FLUSH_SIZE", FLUSH_SIZE)
+    monkeypatch.setattr(settings, "CLICKS_FLUSH_INTERVAL", 60.0)
+    monkeypatch.setattr(settings, "CLICKS_BUFFER_LIMIT", BUFFER_LIMIT)
+    monkeypatch.setattr(settings, "CLICKS_DEDUP_TTL", DEDUP_TTL)
+    return database
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Часы подменяются только для кэша, цикл событий идет по настоящим
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.001)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_flush_on_size(database):
+    async def main():
+        buffer = ClickBuffer()
+        buffer.start()
+        for user_id in range(FLUSH_SIZE - 1):
+            buffer.add_item_click(1, user_id)
+        await asyncio.sleep(0.05)
+        # До порога запись ждет CLICKS_FLUSH_INTERVAL
+        assert database.item_batches == []
+
+        buffer.add_item_click(1, FLUSH_SIZE)
+        await wait_for(lambda: database.item_batches)
+        assert len(database.items) == FLUSH_SIZE
+        assert len(buffer) == 0
+        await buffer.close()
+
+    asyncio.run(main())
+
+
+def test_load_writes_each_click_once(database):
+    producers = 20
+    clicks_per_producer = 2000
+    # Каждый производитель повторяет просмотры из общего набора
+    unique_users = 500
+
+    async def produce(buffer: ClickBuffer, producer: int):
+        for index in range(clicks_per_producer):
+            user_id = (producer * 7 + index) % unique_users
+            if index % 2:
+                buffer.add_item_click(index % 10, user_id)
+            else:
+                buffer.add_request_click(index % 10, user_id)
+            if index % 50 == 0:
+                await asyncio.sleep(0)
+
+    async def main():
+        buffer = ClickBuffer()
+        buffer.start()
+        await asyncio.gather(*(produce(buffer, producer) for producer in range(producers)))
+        await buffer.close()
+        return buffer
+
+    buffer = asyncio.run(main())
+    assert len(buffer) == 0
+    # Повторы отсечены в памяти, в БД уходит каждый просмотр один раз
+    assert len(database.items) == len(set(database.items))
+    assert len(database.requests) == len(set(database.requests))
+    expected_items = {
+        (index % 10, (producer * 7 + index) % unique_users)
+        for producer in range(producers)
+        for index in range(1, clicks_per_producer, 2)
+    }
+    assert set(database.items) == expected_items
+    # Запись шла пачками по мере накопления, а не одной в конце
+    assert len(database.item_batches) + len(database.request_batches) > 2
+
+
+def test_dedup_ttl(database, clock):
+    async def main():
+        buffer = ClickBuffer()
+        buffer.add_item_click(1, 2)
+        buffer.add_item_click(1, 2)
+        assert len(buffer) == 1
+        await buffer.flush()
+
+        clock.now += DEDUP_TTL - 1
+        buffer.add_item_click(1, 2)
+        assert len(buffer) == 0
+
+        # После CLICKS_DEDUP_TTL просмотр снова пишется, повтор в БД
+        # отсекает уникальный индекс
+        clock.now += 2
+        buffer.add_item_click(1, 2)
+        assert len(buffer) == 1
+        await buffer.flush()
+
+    asyncio.run(main())
+    assert database.items == [(1, 2), (1, 2)]
+
+
+def test_database_down_keeps_clicks_until_limit(database):
+    async def main():
+        buffer = ClickBuffer()
+        database.down = True
+        for user_id in range(200):
+            buffer.add_item_click(1, user_id)
+        await buffer.flush()
+        # Пачка возвращена в буфер до следующей попытки
+        assert len(buffer) == 200
+
+        database.down = False
+        await buffer.flush()
+        assert len(buffer) == 0
+
+    asyncio.run(main())
+    assert len(database.items) == 200
+
+
+def test_database_down_drops_clicks_over_limit(database):
+    async def main():
+        buffer = ClickBuffer()
+        database.down = True
+        for user_id in range(200):
+            buffer.add_item_click(1, user_id)
+        await buffer.flush()
+        assert len(buffer) == 200
+
+        # С новыми просмотрами буфер превышает CLICKS_BUFFER_LIMIT:
+        # пачка отбрасывается, память не растет
+        for user_id in range(200, 300):
+            buffer.add_request_click(1, user_id)
+        await buffer.flush()
+        assert len(buffer) == 0
+
+        database.down = False
+        buffer.add_item_click(2, 1)
+        await buffer.close()
+
+    asyncio.run(main())
+    assert database.items == [(2, 1)]
+    assert database.requests == []
+
+
+def test_close_flushes_pending(database):
+    async def main():
+        buffer = ClickBuffer()
+        buffer.start()
+        for user_id in range(10):
+            buffer.add_request_click(5, user_id)
+        await buffer.close()
+        return buffer
+
+    buffer = asyncio.run(main())
+    assert len(buffer) == 0
+    assert database.requests == [(5, user_id) for user_id in range(10)]
@@ -0,0 +1,151 @@
+"""
+Потоковая загрузка в S3 на сервере moto: файл по частям собирается
+без изменений, превышение UPLOAD_MAX_SIZE и сбой части прерывают
+загрузку без незавершенных multipart upload в бакете.
+Без moto[server] тесты пропускаются.
+"""
+import asyncio
+import io
+import os
+import socket
+import uuid
+
+import botocore.exceptions as exc
+import pytest
+from fastapi import UploadFile
+
+from app.services.cloud_service import CloudService
+from app.services.exceptions import FileTooLargeException, FileUploadException, UnsupportedFileTypeException
+from app.settings import settings
+
+MB = 1024 * 1024
+# S3 принимает части не меньше 5 МБ, кроме последней
+CHUNK_SIZE = 5 * MB
+MAX_SIZE = 12 * MB
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def s3_url():
+    server_module = pytest.importorskip("moto.server")
+    port = free_port()
+    server = server_module.ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+    server.start()
+    yield f"http://127.0.0.1:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def s3_settings(s3_url, monkeypatch):
+    for name, value in {
+        "S3_URL": s3_url,
+        "S3_KEY_ID": "test",
+        "S3_ACCESS_KEY": "test",
+        "S3_REGION_NAME": "us-east-1",
+        "S3_BUCKET": f"test-{uuid.uuid4().hex}",
+        "S3_MULTIPART_CHUNK_SIZE": CHUNK_SIZE,
+        "S3_PART_CONCURRENCY": 2,
+        "UPLOAD_MAX_SIZE": MAX_SIZE,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+
+
+def with_cloud(action):
+    """action(service) с открытым клиентом и пустым бакетом"""
+    async def main():
+        service = CloudService()
+        await service.start()
+        try:
+            await service.client.create_bucket(Bucket=service.bucket)
+            return await action(service)
+        finally:
+            await service.close()
+    return asyncio.run(main())
+
+
+def image(size: int) -> UploadFile:
+    data = PNG_HEADER + os.urandom(size - len(PNG_HEADER))
+    return UploadFile(io.BytesIO(data), filename="photo.png")
+
+
+async def pending_uploads(service: CloudService) -> list:
+    result = await service.client.list_multipart_uploads(Bucket=service.bucket)
+    return result.get("Uploads", [])
+
+
+async def read_object(service: CloudService, key: str) -> bytes:
+    result = await service.client.get_object(Bucket=service.bucket, Key=key)
+    async with result["Body"] as body:
+        return await body.read()
+
+
+@pytest.mark.parametrize("size", [
+    # Меньше части: один put_object
+    CHUNK_SIZE - 1,
+    # Три части: 5 + 5 + 1 МБ
+    2 * CHUNK_SIZE + MB,
+], ids=["single", "multipart"])
+def test_upload_round_trip(s3_settings, size):
+    upload = image(size)
+    data = upload.file.getvalue()
+
+    async def action(service):
+        uploaded = await service.save_upload(upload, "photo.png")
+        head = await service.client.head_object(Bucket=service.bucket, Key="photo.png")
+        return uploaded, head["ContentType"], await read_object(service, "photo.png"), await pending_uploads(service)
+
+    uploaded, content_type, stored, pending = with_cloud(action)
+    assert uploaded == size
+    assert content_type == "image/png"
+    assert stored == data
+    assert pending == []
+
+
+def test_size_cap_aborts_upload(s3_settings):
+    async def action(service):
+        with pytest.raises(FileTooLargeException):
+            await service.save_upload(image(MAX_SIZE + MB), "large.png")
+        return await service.exists("large.png"), await pending_uploads(service)
+
+    exists, pending = with_cloud(action)
+    assert not exists
+    assert pending == []
+
+
+def test_failed_part_aborts_upload(s3_settings):
+    async def action(service):
+        upload_part = service.client.upload_part
+
+        async def failing_upload_part(**kwargs):
+            if kwargs["PartNumber"] == 2:
+                raise exc.ClientError(
+                    {"Error": {"Code": "InternalError", "Message": "Сбой хранилища"}}, "UploadPart"
+                )
+            return await upload_part(**kwargs)
+
+        service.client.upload_part = failing_upload_part
+        with pytest.raises(FileUploadException):
+            await service.save_upload(image(2 * CHUNK_SIZE + MB), "broken.png")
+        return await service.exists("broken.png"), await pending_uploads(service)
+
+    exists, pending = with_cloud(action)
+    assert not exists
+    assert pending == []
+
+
+def test_unsupported_type_is_not_uploaded(s3_settings):
+    async def action(service):
+        upload = UploadFile(io.BytesIO(b"%PDF-1.7" + b"\0" * CHUNK_SIZE), filename="file.pdf")
+        with pytest.raises(UnsupportedFileTypeException):
+            await service.save_upload(upload, "file.pdf")
+        return await service.exists("file.pdf"), await pending_uploads(service)
+
+    exists, pending = with_cloud(action)
+    assert not exists
+    assert pending == []
@@ -0,0 +1,175 @@
+"""
+Запросы мессенджера читаются по индексам из INDEXES: в выигравшем плане
+explain() есть IXSCAN и нет COLLSCAN.
+"""
+import asyncio
+import datetime
+import os
+import uuid
+
+import pytest
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.repository.mongo.indexes import INDEXES, ensure_indexes, missing_indexes
+
+pytestmark = pytest.mark.mongo
+
+TEST_MONGO_URL = os.environ.get("TEST_MONGO_URL", "mongodb://localhost:27017")
+
+THREADS = 20
+MESSAGES = 50
+THREAD_ID = 7
+RECEIVER = 2
+
+
+def with_database(action):
+    """
+    action(db) на временной базе с индексами INDEXES и тестовыми данными.
+    Без доступной MongoDB тест пропускается.
+    """
+    async def main():
+        client = AsyncIOMotorClient(TEST_MONGO_URL, serverSelectionTimeoutMS=1000)
+        try:
+            await client.admin.command("ping")
+        except Exception:
+            client.close()
+            return None, False
+        db = client[f"test_messages_{uuid.uuid4().hex}"]
+        try:
+            await ensure_indexes(db)
+            assert await missing_indexes(db) == []
+            await seed(db)
+            return await action(db), True
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    result, available = asyncio.run(main())
+    if not available:
+        pytest.skip(f"MongoDB недоступна: {TEST_MONGO_URL}")
+    return result
+
+
+async def seed(db):
+    start = datetime.datetime(2024, 1, 1)
+    messages = []
+    for thread_id in range(1, THREADS + 1):
+        for index in range(MESSAGES):
+            sender, receiver = (1, 2) if index % 2 else (2, 1)
+            messages.append({
+                "_id": ObjectId(),
+                "thread_id": thread_id,
+                "from_user": {"id": sender},
+                "to_user": {"id": receiver},
+                "text": f"Сообщение {index}",
+                "read": index < MESSAGES - 5,
+                "created_at": start + datetime.timedelta(minutes=thread_id * MESSAGES + index),
+            })
+    await db.messages.insert_many(messages)
+    await db.thread_summaries.insert_many([
+        {
+            "_id": thread_id,
+            "participants": [1, 2] if thread_id % 2 else [1, 3],
+            "last_activity": start + datetime.timedelta(hours=thread_id),
+            "unread": {},
+        }
+        for thread_id in range(1, THREADS + 1)
+    ])
+
+
+def winning_stages(explain: dict) -> set[str]:
+    """Стадии выигравших планов во всем ответе explain (в том числе внутри aggregate)"""
+    stages = set()
+
+    def collect(node, in_plan: bool):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "stage" and in_plan:
+                    stages.add(value)
+                collect(value, in_plan or key == "winningPlan")
+        elif isinstance(node, list):
+            for value in node:
+                collect(value, in_plan)
+
+    collect(explain, False)
+    return stages
+
+
+def assert_index_scan(explain: dict):
+    stages = winning_stages(explain)
+    assert "IXSCAN" in stages or "IDHACK" in stages or "EXPRESS_IXSCAN" in stages, stages
+    assert "COLLSCAN" not in stages, stages
+
+
+def test_indexes_declared():
+    names = {
+        index.document["name"]
+        for indexes in INDEXES.values()
+        for index in indexes
+    }
+    assert {"thread_created_at", "thread_to_user_unread", "participants_last_activity"} <= names
+
+
+def test_messages_by_thread():
+    # Запрос get_messages_by_thread
+    async def action(db):
+        return await db.messages.find(
+            {"thread_id": THREAD_ID}
+        ).sort("created_at", -1).skip(0).limit(20).explain()
+
+    assert_index_scan(with_database(action))
+
+
+def test_unread_by_receiver():
+    # Непрочитанные по получателям из refresh_thread_summary
+    pipeline = [
+        {"$match": {"thread_id": THREAD_ID, "read": False}},
+        {"$group": {"_id": "$to_user.id", "count": {"$sum": 1}}},
+    ]
+
+    async def action(db):
+        plan = await db.command("aggregate", "messages", pipeline=pipeline, explain=True)
+        # Частичный индекс применим к запросу: с неподходящим фильтром hint
+        # на него завершился бы ошибкой
+        hinted = await db.command(
+            "aggregate", "messages", pipeline=pipeline, explain=True, hint="thread_to_user_unread"
+        )
+        return plan, hinted
+
+    plan, hinted = with_database(action)
+    assert_index_scan(plan)
+    assert_index_scan(hinted)
+
+
+def test_set_read():
+    # Фильтр update_many из set_read
+    async def action(db):
+        ids = [
+            message["_id"]
+            async for message in db.messages.find({"thread_id": THREAD_ID, "read": False}, {"_id": 1})
+        ]
+        return await db.command("explain", {
+            "update": "messages",
+            "updates": [{
+                "q": {"$and": [
+                    {"_id": {"$in": ids}},
+                    {"thread_id": THREAD_ID},
+                    {"to_user.id": RECEIVER},
+                ]},
+                "u": {"$set": {"read": True}},
+                "multi": True,
+            }],
+        })
+
+    assert_index_scan(with_database(action))
+
+
+def test_thread_summaries():
+    # Запрос get_thread_summaries
+    async def action(db):
+        return await db.thread_summaries.find(
+            {"participants": 1}
+        ).sort("last_activity", -1).skip(0).limit(20).explain()
+
+    assert_index_scan(with_database(action))
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+import db
+from app.api.v1.offers.requests import UpdateOfferStatus
+from app.repository.models import Offers
+from app.repository.offers.repository import OffersRepository
+from app.repository.session import async_session
+from app.services.offers.exceptions import UpdateStatusException
+from app.services.offers.service import OffersService
+from app.utils.types import OrdersStatus
+
+pytestmark = pytest.mark.mysql
+
+
+class ReadTogetherRepository(OffersRepository):
+    """Оба запроса читают заказ до того, как любой из них его изменит"""
+
+    def __init__(self, session, barrier: asyncio.Barrier):
+        super().__init__(session)
+        self.barrier = barrier
+
+    async def get_offer_to_update_status(self, offer_id: int):
+        offer = await super().get_offer_to_update_status(offer_id)
+        await self.barrier.wait()
+        return offer
+
+
+async def update_in_parallel(offer_id: int):
+    barrier = asyncio.Barrier(2)
+
+    async def update(user_id: int, value: UpdateOfferStatus):
+        async with async_session() as session:
+            service = OffersService(ReadTogetherRepository(session, barrier))
+            return await service.update_offer_status(offer_id, user_id, value)
+
+    return await asyncio.gather(
+        update(db.SELLER, UpdateOfferStatus(status=OrdersStatus.REJECTED, comment="Нет в наличии")),
+        update(db.BUYER, UpdateOfferStatus(status=OrdersStatus.COMPLETED)),
+        return_exceptions=True,
+    )
+
+
+async def offer_status(offer_id: int) -> OrdersStatus:
+    async with async_session() as session:
+        return await session.scalar(select(Offers.status).filter_by(id=offer_id))
+
+
+def test_parallel_status_change_has_one_winner(dataset):
+    offer_id = db.run(db.new_item_offer())
+    results = db.run(update_in_parallel(offer_id))
+
+    failed = [result for result in results if isinstance(result, Exception)]
+    assert len(failed) == 1
+    assert isinstance(failed[0], UpdateStatusException)
+    assert "одновременно" in str(failed[0])
+
+    # Победитель вернул id второго участника, и в базе остался его статус
+    (winner,) = [result for result in results if not isinstance(result, Exception)]
+    expected = {db.BUYER: OrdersStatus.REJECTED, db.SELLER: OrdersStatus.COMPLETED}
+    assert db.run(offer_status(offer_id)) == expected[winner]
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.api.v1.offers.requests import UpdateOfferStatus
+from app.models.items import UpdateStatusDTO
+from app.services.offers.exceptions import UpdateStatusException, WrongNewStatus, OfferAlreadyClosed, \
+    OfferNotBelongYouException, OfferNotFoundException
+from app.services.offers.service import OffersService
+from app.utils.types import OrdersStatus
+
+SELLER = 1
+BUYER = 2
+
+
+class FakeOffersRepository:
+    """Репозиторий с заранее заданным результатом условного UPDATE"""
+
+    def __init__(self, updated: bool, offer: UpdateStatusDTO | None):
+        self.updated = updated
+        self.offer = offer
+        self.calls = []
+
+    async def update_status_if(self, *args):
+        self.calls.append(args)
+        return self.updated
+
+    async def get_offer_to_update_status(self, offer_id: int):
+        return self.offer
+
+
+def item_offer(status: OrdersStatus) -> UpdateStatusDTO:
+    return UpdateStatusDTO(
+        from_user_id=BUYER, to_user_id=SELLER,
+        item_id=10, request_id=None, status=status.value,
+    )
+
+
+def update_status(repository, user_id: int, status: OrdersStatus):
+    service = OffersService(repository)
+    return asyncio.run(
+        service.update_offer_status(1, user_id, UpdateOfferStatus(status=status))
+    )
+
+
+def test_updated_returns_receiver():
+    repository = FakeOffersRepository(True, item_offer(OrdersStatus.APPROVED))
+    assert update_status(repository, SELLER, OrdersStatus.APPROVED) == BUYER
+    _, user_id, status, _, allowed_from, item_actor, request_actor = repository.calls[0]
+    assert (user_id, status) == (SELLER, "APPROVED")
+    assert allowed_from == ["PENDING", "APPROVED"]
+    assert (item_actor, request_actor) == ("to_user_id", "from_user_id")
+
+
+def test_lost_update_is_conflict():
+    # Заказ уже в допустимом статусе и пользователь вправе его менять,
+    # но UPDATE не изменил строк: статус сменили параллельно
+    repository = FakeOffersRepository(False, item_offer(OrdersStatus.PENDING))
+    with pytest.raises(UpdateStatusException, match="одновременно"):
+        update_status(repository, SELLER, OrdersStatus.APPROVED)
+
+
+def test_forbidden_move():
+    repository = FakeOffersRepository(False, item_offer(OrdersStatus.PROCESSING))
+    with pytest.raises(WrongNewStatus):
+        update_status(repository, SELLER, OrdersStatus.APPROVED)
+    assert repository.calls == []
+
+
+def test_wrong_actor():
+    repository = FakeOffersRepository(False, item_offer(OrdersStatus.PENDING))
+    with pytest.raises(UpdateStatusException, match="исполнитель"):
+        update_status(repository, BUYER, OrdersStatus.APPROVED)
+    assert repository.calls == []
+
+
+def test_closed_offer():
+    repository = FakeOffersRepository(False, item_offer(OrdersStatus.COMPLETED))
+    with pytest.raises(OfferAlreadyClosed):
+        update_status(repository, SELLER, OrdersStatus.CANCELLED)
+    assert repository.calls == []
+
+
+def test_not_participant():
+    repository = FakeOffersRepository(False, item_offer(OrdersStatus.PENDING))
+    with pytest.raises(OfferNotBelongYouException):
+        update_status(repository, 3, OrdersStatus.APPROVED)
+    assert repository.calls == []
+
+
+def test_not_found():
+    repository = FakeOffersRepository(False, None)
+    with pytest.raises(OfferNotFoundException):
+        update_status(repository, SELLER, OrdersStatus.APPROVED)
+    assert repository.calls == []
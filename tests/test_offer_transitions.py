@@ -0,0 +1,45 @@
+import pytest
+
+from app.services.offers.transitions import TRANSITIONS, CLOSED_STATUSES, FROM_USER, TO_USER
+from app.utils.types import OrdersStatus as S
+
+
+@pytest.mark.parametrize("current, new", [
+    (S.PENDING, S.APPROVED),
+    (S.PENDING, S.REJECTED),
+    (S.APPROVED, S.APPROVED),
+    (S.APPROVED, S.PROCESSING),
+    (S.PROCESSING, S.REJECTED),
+    (S.PROCESSING, S.CANCELLED),
+    (S.PROCESSING, S.COMPLETED),
+    (S.CANCELLED, S.COMPLETED),
+])
+def test_allowed(current, new):
+    assert current in TRANSITIONS[new].allowed_from
+
+
+@pytest.mark.parametrize("current, new", [
+    (S.APPROVED, S.PENDING),
+    (S.PROCESSING, S.APPROVED),
+    (S.CANCELLED, S.PROCESSING),
+    (S.CANCELLED, S.REJECTED),
+])
+def test_backwards_forbidden(current, new):
+    assert current not in TRANSITIONS[new].allowed_from
+
+
+@pytest.mark.parametrize("closed", sorted(CLOSED_STATUSES, key=lambda s: s.value))
+@pytest.mark.parametrize("new", list(S))
+def test_closed_is_final(closed, new):
+    assert closed not in TRANSITIONS[new].allowed_from
+
+
+def test_actors():
+    for status in (S.APPROVED, S.PROCESSING, S.REJECTED):
+        assert TRANSITIONS[status].item_actor == TO_USER
+        assert TRANSITIONS[status].request_actor == FROM_USER
+    assert TRANSITIONS[S.COMPLETED].item_actor == FROM_USER
+    assert TRANSITIONS[S.COMPLETED].request_actor == TO_USER
+    for status in (S.PENDING, S.CANCELLED):
+        assert TRANSITIONS[status].item_actor is None
+        assert TRANSITIONS[status].request_actor is None
@@ -0,0 +1,235 @@
+"""
+Бюджеты SQL-запросов основных страниц: количество запросов не зависит
+от размера страницы, строки ограничены самой страницей.
+"""
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import raiseload
+
+import db
+from app.api.v1.items.requests import GetCards
+from app.repository.items.repository import ItemsRepository
+from app.repository.loaders import user_token, user_short, user_full, item_card, item_full
+from app.repository.models import Base, Users, Items
+from app.repository.offers.repository import OffersRepository
+from app.repository.query_stats import count_queries
+from app.repository.requests.repository import RequestsRepository
+from app.repository.session import async_session
+from app.repository.users.repository import UsersRepository
+from app.services.items.service import ItemsService
+from app.services.offers.service import OffersService
+from app.services.users.service import UserService
+from app.utils.types import ItemType
+
+pytestmark = pytest.mark.mysql
+
+PAGE = 20
+# Одобренный товар (не услуга) из тестовых данных
+ITEM_ID = 1
+
+# Связи lazy="raise", которые не входят ни в один профиль:
+# DTO читают вместо них счетчики rating_sum, rating_count и clicks_count
+NOT_LOADED = {"Users.reviews", "Items.reviews", "Requests.clicks_quantity"}
+PROFILE_RELATIONSHIPS = {
+    "user_token": {"Users.type"},
+    "user_short": {"Users.user_city", "Users.avatar"},
+    "item_card": {"Items.price", "Items.location", "Items.photos"},
+    "item_full": {"Items.category", "Items.production"},
+}
+
+
+def measure(action):
+    """Результат action(session) и статистика запросов внутри него"""
+    async def main():
+        async with async_session() as session:
+            with count_queries() as stats:
+                result = await action(session)
+        return result, stats
+    return db.run(main())
+
+
+def catalog_page(body: GetCards, limit: int = PAGE, after=None):
+    return measure(
+        lambda session: ItemsRepository(session).get_items_by_criteria(body, 0, limit, after)
+    )
+
+
+@pytest.mark.parametrize("body", [
+    GetCards(type=ItemType.item),
+    GetCards(type=ItemType.item, city_id=db.CITIES[1]),
+    GetCards(type=ItemType.item, from_price=200, to_price=500),
+    GetCards(type=ItemType.item, category_id=db.ROOT),
+    GetCards(type=ItemType.item, city_id=db.CITIES[1], from_price=200, category_id=db.CHILD),
+], ids=["all", "city", "price", "category", "combined"])
+def test_catalog_page(dataset, body):
+    items, stats = catalog_page(body)
+    assert len(items) == PAGE
+    # Карточки и фото всей страницы
+    assert stats.statements == 2
+    assert stats.rows == PAGE * (1 + db.PHOTOS)
+
+
+def test_catalog_cursor_page(dataset):
+    body = GetCards(type=ItemType.item)
+    first, _ = catalog_page(body)
+    items, stats = catalog_page(body, after=(first[-1].created_at, first[-1].id))
+    assert len(items) == PAGE
+    assert stats.statements == 2
+    assert stats.rows == PAGE * (1 + db.PHOTOS)
+
+
+def test_catalog_statements_do_not_grow_with_page(dataset):
+    body = GetCards(type=ItemType.item)
+    _, small = catalog_page(body, limit=5)
+    _, large = catalog_page(body, limit=100)
+    assert small.statements == large.statements == 2
+
+
+def test_catalog_total(dataset):
+    total, stats = measure(
+        lambda session: ItemsRepository(session).get_total_items_by_criteria(
+            GetCards(type=ItemType.item, city_id=db.CITIES[1]), 0, PAGE
+        )
+    )
+    assert total > PAGE
+    assert (stats.statements, stats.rows) == (1, 1)
+
+
+def test_item_card(dataset):
+    item, stats = measure(
+        lambda session: ItemsService(ItemsRepository(session)).get_item_by_id(ITEM_ID)
+    )
+    assert item.id == ITEM_ID
+    assert item.seller.id == db.SELLER
+    # Товар со всеми связями одной строкой и фото отдельным запросом
+    assert stats.statements == 2
+    assert stats.rows == 1 + db.PHOTOS
+
+
+@pytest.mark.parametrize("criteria, total, statements, per_offer", [
+    # Количество, заказы, пользователи, карточки товаров и их фото
+    ({"to_user_id": db.SELLER}, db.ITEM_OFFERS, 5, 1 + 1 + db.PHOTOS),
+    # Количество, заказы, пользователи и запросы с фото
+    ({"from_user_id": db.SELLER}, db.REQUEST_OFFERS, 4, 1 + db.PHOTOS),
+], ids=["item_offers", "request_offers"])
+def test_offers_page(dataset, criteria, total, statements, per_offer):
+    def page(limit):
+        return measure(
+            lambda session: OffersService(OffersRepository(session)).get_offers_by_criteria(
+                criteria, 1, limit
+            )
+        )
+
+    (offers, _), small = page(5)
+    assert len(offers) == 5
+    (offers, _), large = page(PAGE)
+    assert len(offers) >= min(PAGE, total)
+    assert small.statements == large.statements == statements
+    # Количество, строки заказов и связанных товаров или запросов, два участника
+    assert large.rows <= 1 + len(offers) * per_offer + 2
+
+
+def test_requests_feed(dataset):
+    def page(limit):
+        return measure(
+            lambda session: RequestsRepository(session).get_feed(db.SELLER, 0, limit)
+        )
+
+    _, small = page(5)
+    requests, large = page(PAGE)
+    assert len(requests) == PAGE
+    # Запросы с автором, ценой, сроком и фото одним запросом
+    assert small.statements == large.statements == 1
+    assert large.rows == PAGE * db.PHOTOS
+
+
+def test_user_profile(dataset):
+    profile, stats = measure(
+        lambda session: UserService(UsersRepository(session)).get_user_profile(db.SELLER, ["seller"])
+    )
+    assert profile["id"] == db.SELLER
+    assert profile["legal_info"]["company_name"]
+    # Пользователь с городом, аватаром и юр. данными, типы и контакты
+    assert stats.statements == 3
+    assert stats.rows == 1 + 2 + 2
+
+
+def test_user_token(dataset):
+    token, stats = measure(
+        lambda session: UsersRepository(session).get_user_token_data_by_id(db.SELLER)
+    )
+    assert sorted(token.types) == ["seller", "user"]
+    assert (stats.statements, stats.rows) == (2, 1 + 2)
+
+
+def test_users_types(dataset):
+    types, stats = measure(
+        lambda session: UsersRepository(session).users_types([db.SELLER, db.BUYER])
+    )
+    assert set(types) == {db.SELLER, db.BUYER}
+    assert (stats.statements, stats.rows) == (2, 2 + 3)
+
+
+def test_raise_relationships_are_covered():
+    """Новая связь lazy="raise" должна попасть в профиль или в NOT_LOADED"""
+    declared = {
+        f"{mapper.class_.__name__}.{relationship.key}"
+        for mapper in Base.registry.mappers
+        for relationship in mapper.relationships
+        if relationship.lazy == "raise"
+    }
+    covered = set().union(*PROFILE_RELATIONSHIPS.values())
+    assert len(declared) == 11
+    assert declared == covered | NOT_LOADED
+
+
+def read_user_token(user: Users):
+    return user.types
+
+
+def read_user_short(user: Users):
+    return user.to_short_dto()
+
+
+def read_user_full(user: Users):
+    return (
+        user.to_short_dto(),
+        user.types,
+        user.user_city.city_id,
+        [contact.value for contact in user.contacts],
+        user.legal_info.company_name,
+    )
+
+
+def read_item_card(item: Items):
+    return (
+        item.price.fix_price,
+        item.location.city.name,
+        item.location.address,
+        [photo.to_dto() for photo in item.photos],
+    )
+
+
+def read_item_full(item: Items):
+    return item.dto_full
+
+
+@pytest.mark.parametrize("model, object_id, profile, read", [
+    (Users, db.SELLER, user_token, read_user_token),
+    (Users, db.SELLER, user_short, read_user_short),
+    (Users, db.SELLER, user_full, read_user_full),
+    (Items, ITEM_ID, item_card, read_item_card),
+    (Items, ITEM_ID, item_full, read_item_full),
+], ids=["user_token", "user_short", "user_full", "item_card", "item_full"])
+def test_profile_covers_dto(dataset, model, object_id, profile, read):
+    """
+    Профиль загружает все, что читает DTO: остальные связи запрещены
+    raiseload("*"), и обращение к ним завершится ошибкой.
+    """
+    async def main():
+        async with async_session() as session:
+            statement = select(model).filter_by(id=object_id).options(*profile(), raiseload("*"))
+            result = await session.execute(statement)
+            return read(result.scalars().unique().one())
+
+    assert db.run(main())